@@ -10,14 +10,29 @@ bl_info = {
 # blender_mof_integration.py
 
 import bpy
-import subprocess
 import os
-import tempfile
 import pathlib
+import types
+import numpy as np
 
 from bpy.props import IntProperty, EnumProperty
 from mathutils import *
 
+from . import core
+from . import telemetry
+from .symmetry import MirrorPlan
+from .sweep import Sweep, operator_settings, sample_variants, variant_arguments
+from . import metrics
+from . import tempio
+from . import speculative
+from . import lod
+from . import snapshots
+from . import costmodel
+from . import preflight
+from . import remote
+from . import udim
+from .cache import UVCache, geometry_cache_key
+
 # Preference settings to specify the path of the MoF executable
 class MOF_AddonPreferences(bpy.types.AddonPreferences):
     bl_idname = __package__
@@ -28,10 +43,211 @@ class MOF_AddonPreferences(bpy.types.AddonPreferences):
         update=lambda self, context: self.correct_executable_path(),
     )
 
+    max_processes: bpy.props.IntProperty(
+        name="Max Processes",
+        description="Maximum number of MoF processes running at the same time when unwrapping several objects",
+        default=os.cpu_count() or 1,
+        min=1,
+        max=256,
+    )
+
+    mof_timeout: bpy.props.FloatProperty(
+        name="Timeout",
+        description="Kill MoF when a single run takes longer than this. 0 for no limit",
+        default=0.0,
+        min=0.0,
+        subtype='TIME_ABSOLUTE',
+        unit='TIME_ABSOLUTE',
+    )
+
+    memory_limit: bpy.props.IntProperty(
+        name="Memory Limit (MB)",
+        description="Kill MoF when a single process uses more memory than this. 0 for no limit",
+        default=0,
+        min=0,
+    )
+
+    memory_budget: bpy.props.IntProperty(
+        name="Memory Budget (MB)",
+        description="Start no more MoF processes than the cost model expects to fit into this much memory together, learned from the logged runs. 0 for no limit",
+        default=0,
+        min=0,
+    )
+
+    process_nice: bpy.props.IntProperty(
+        name="Nice Level",
+        description="Lower the priority of MoF processes so Blender stays responsive, 0 (normal) to 19 (idle). Below normal or idle priority class on Windows",
+        default=0,
+        min=0,
+        max=19,
+    )
+
+    cpu_affinity: bpy.props.StringProperty(
+        name="CPUs",
+        description="Only run MoF on these CPUs, like 0-3,6. Empty for all of them",
+    )
+
+    scratch_directory: bpy.props.StringProperty(
+        name="Scratch Directory",
+        description="Where the OBJ files exchanged with MoF are written. Uses /dev/shm when it has room and the system temp directory otherwise when empty",
+        subtype='DIR_PATH',
+    )
+
+    speculative_unwrap: bpy.props.BoolProperty(
+        name="Pre-unwrap Edited Meshes",
+        description="Unwrap meshes in the background once they stop changing, with the options of the last run, so Unwrap can use the cached result. Needs Cache Results",
+        default=False,
+    )
+
+    speculative_delay: bpy.props.FloatProperty(
+        name="Delay",
+        description="How long a mesh has to stay unchanged before it is pre-unwrapped",
+        default=2.0,
+        min=0.5,
+        subtype='TIME_ABSOLUTE',
+        unit='TIME_ABSOLUTE',
+    )
+
+    stream_input: bpy.props.BoolProperty(
+        name="Stream Input",
+        description="Pipe the mesh to MoF through a named pipe instead of writing a file. Only for MoF builds that read their input once, front to back. Not available on Windows",
+        default=False,
+    )
+
+    use_remote: bpy.props.BoolProperty(
+        name="Remote Workers",
+        description="Send MoF jobs to job servers (server.py) on other machines. Jobs run locally when no server answers",
+        default=False,
+    )
+
+    remote_servers: bpy.props.StringProperty(
+        name="Job Servers",
+        description="Comma separated addresses of job servers, e.g. http://farm01:8642, http://farm02:8642",
+        default="http://localhost:8642",
+    )
+
+    remote_token: bpy.props.StringProperty(
+        name="Token",
+        description="Shared secret the job servers were started with, if any",
+        subtype='PASSWORD',
+    )
+
+    remote_retries: bpy.props.IntProperty(
+        name="Retries",
+        description="Other servers tried when a server fails a job, before running it locally",
+        default=2,
+        min=0,
+        max=10,
+    )
+
+    remote_compression: bpy.props.IntProperty(
+        name="Compression",
+        description="gzip level of uploaded meshes. 0 sends them uncompressed, higher is smaller but slower",
+        default=6,
+        min=0,
+        max=9,
+    )
+
+    use_cache: bpy.props.BoolProperty(
+        name="Cache Results",
+        description="Store MoF results on disk and reuse them when the same geometry is unwrapped with the same options",
+        default=True,
+    )
+
+    cache_directory: bpy.props.StringProperty(
+        name="Cache Directory",
+        description="Where cached results are stored. Uses the system temp directory when empty",
+        subtype='DIR_PATH',
+    )
+
+    cache_size: bpy.props.IntProperty(
+        name="Cache Size (MB)",
+        description="Least recently used results are evicted once the cache grows beyond this size",
+        default=512,
+        min=1,
+    )
+
+    snapshot_memory: bpy.props.IntProperty(
+        name="Snapshot Memory (MB)",
+        description="Memory kept for the UVs of earlier runs, to flip back to them from the side panel. 0 to keep none",
+        default=256,
+        min=0,
+    )
+
+    compact_snapshots: bpy.props.BoolProperty(
+        name="Half Precision",
+        description="Keep snapshots as float16, twice as many fit but UVs are only accurate to about 1/2000 of the UV square",
+        default=False,
+    )
+
+    use_telemetry: bpy.props.BoolProperty(
+        name="Log Runs",
+        description="Append the stage timings of every run to a JSONL log",
+        default=True,
+    )
+
+    telemetry_log: bpy.props.StringProperty(
+        name="Log File",
+        description="JSONL file runs are appended to. Uses mof_integration_runs.jsonl in Blender's config directory when empty",
+        subtype='FILE_PATH',
+    )
+
     def draw(self, context):
         layout = self.layout
         layout.label(text="The path of `UnWrapConsole3.exe`")
         layout.prop(self, "mof_executable")
+        row = layout.row(align=True)
+        row.prop(self, "max_processes")
+        row.prop(self, "memory_budget")
+
+        col = layout.column(align=True)
+        row = col.row(align=True)
+        row.prop(self, "mof_timeout")
+        row.prop(self, "memory_limit")
+        row = col.row(align=True)
+        row.prop(self, "process_nice")
+        row.prop(self, "cpu_affinity")
+
+        row = layout.row(align=True)
+        row.prop(self, "scratch_directory")
+        sub = row.row(align=True)
+        sub.enabled = hasattr(os, "mkfifo")
+        sub.prop(self, "stream_input", toggle=True)
+
+        row = layout.row(align=True)
+        row.prop(self, "use_remote", toggle=True)
+        col = row.column(align=True)
+        col.enabled = self.use_remote
+        col.prop(self, "remote_servers")
+        col.prop(self, "remote_token")
+        sub = col.row(align=True)
+        sub.prop(self, "remote_retries")
+        sub.prop(self, "remote_compression")
+
+        row = layout.row(align=True)
+        row.prop(self, "use_cache", toggle=True)
+        col = row.column(align=True)
+        col.enabled = self.use_cache
+        col.prop(self, "cache_directory")
+        col.prop(self, "cache_size")
+        col.operator(UV_OT_MoFClearCache.bl_idname, icon='TRASH')
+
+        row = layout.row(align=True)
+        row.enabled = self.use_cache
+        row.prop(self, "speculative_unwrap", toggle=True)
+        sub = row.row(align=True)
+        sub.enabled = self.speculative_unwrap
+        sub.prop(self, "speculative_delay")
+
+        row = layout.row(align=True)
+        row.prop(self, "snapshot_memory")
+        row.prop(self, "compact_snapshots", toggle=True)
+
+        row = layout.row(align=True)
+        row.prop(self, "use_telemetry", toggle=True)
+        col = row.column(align=True)
+        col.enabled = self.use_telemetry
+        col.prop(self, "telemetry_log")
 
     def correct_executable_path(self):
         """
@@ -79,12 +295,33 @@ def toggle_option_line(layout: bpy.types.UILayout, toggle_id_data: bpy.types.ID,
     for option_id_data, option_prop in option_list:
         col.prop(option_id_data, option_prop)
 
+def capture_state(context) -> tuple[str, str | None, frozenset[str]]:
+    # Mode, active object and selected objects, by name so deleted or renamed objects count as a change
+    active = context.view_layer.objects.active
+    return (active.mode if active is not None else 'OBJECT', active.name if active is not None else None, frozenset(obj.name for obj in context.selected_objects))
+
+def restore_state(context, state: tuple[str, str | None, frozenset[str]]):
+    mode, active_name, selection = state
+    if context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    bpy.ops.object.select_all(action='DESELECT')
+    for name in selection:
+        obj = context.view_layer.objects.get(name)
+        if obj is not None:
+            obj.select_set(True)
+    active = context.view_layer.objects.get(active_name) if active_name is not None else None
+    if active is not None:
+        context.view_layer.objects.active = active
+        if mode != 'OBJECT':
+            with context.temp_override(active_object=active):
+                bpy.ops.object.mode_set(mode=mode)
+
 # Operator to run MoF
 class UV_OT_MoFUnwrap(bpy.types.Operator):
     bl_idname = "uv.mof_unwrap"
     bl_label = "Unwrap"
     bl_description = "Automatic unwrap with Ministry of Flat"
-    bl_options = {'REGISTER', 'UNDO'}
+    bl_options = {'REGISTER', 'UNDO', 'PRESET'}
 
     texture_resolution: bpy.props.IntProperty(
         name="Texture Resolution",
@@ -114,6 +351,12 @@ class UV_OT_MoFUnwrap(bpy.types.Operator):
         default=False,
     )
 
+    apply_modifiers: bpy.props.BoolProperty(
+        name='Apply Modifiers',
+        description='Unwrap the mesh with its modifiers applied and project the UVs back onto the original faces from the nearest modified face.',
+        default=True,
+    )
+
     overlap_identical_parts: bpy.props.BoolProperty(
         name='Overlap Identical parts',
         description='Overlap identtical parts to take up the same texture space.',
@@ -343,14 +586,157 @@ class UV_OT_MoFUnwrap(bpy.types.Operator):
         description='Expand options',
         default=False,
     )
+    # Deprecated, kept for scripts and presets from before `layout_mode`: on is 'REUNWRAP', off keeps MoF's layout
     auto_reunwrap: bpy.props.BoolProperty(
         name='Auto Re-unwrap',
-        description='Invoke Blender\'s unwrapping tool after MoF finishes its work',
+        description='Deprecated, use After MoF',
+        get=lambda self: self.layout_mode == 'REUNWRAP',
+        set=lambda self, value: setattr(self, "layout_mode", 'REUNWRAP' if value else 'MOF' if self.layout_mode == 'REUNWRAP' else self.layout_mode),
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+    layout_mode: bpy.props.EnumProperty(
+        name='After MoF',
+        description='What to do with the UV layout MoF produced',
+        items=[
+            ('MOF', "Keep MoF Layout", "Use MoF's unwrap and packing as they are"),
+            ('REPACK', "Repack", "Keep MoF's unwrap and repack the islands with Blender"),
+            ('REUNWRAP', "Re-unwrap", "Invoke Blender's unwrapping tool along MoF's seams and pack the islands"),
+        ],
+        default='REUNWRAP',
+    )
+    selected_objects: bpy.props.BoolProperty(
+        name='All Selected Objects',
+        description='Unwrap every selected mesh, running several MoF processes in parallel',
+        default=False,
+    )
+    selection_only: bpy.props.BoolProperty(
+        name='Selected Faces Only',
+        description='In edit mode, unwrap only the selected faces and place their islands next to the untouched ones',
+        default=False,
+    )
+    lod_chain: bpy.props.BoolProperty(
+        name='Transfer to LODs',
+        description='Unwrap only the most detailed of objects named like Rock_LOD0, Rock_LOD1... and project its UVs onto the other LODs of the scene',
+        default=False,
+    )
+    preflight: bpy.props.BoolProperty(
+        name='Pre-flight',
+        description='Measure every mesh first and turn off the detectors it has nothing for, like Tubes on a mesh without curved parts',
+        default=False,
+    )
+    context_rings: bpy.props.IntProperty(
+        name="Context Rings",
+        description='Rings of neighbouring faces exported along with the selection to give MoF some context. Their UVs are left untouched',
+        default=1,
+        min=0,
+        max=10,
+    )
+    symmetry: bpy.props.EnumProperty(
+        name='Mirror Symmetry',
+        description='Unwrap only one half of a mesh mirrored across its local X, Y or Z = 0 plane and mirror the UVs onto the other half. Not used with Apply Modifiers',
+        items=[
+            ('NONE', "Off", "Unwrap every face"),
+            ('AUTO', "Auto", "Use whichever axis the mesh is most symmetric across"),
+            ('X', "X", "Mirrored across the local X axis"),
+            ('Y', "Y", "Mirrored across the local Y axis"),
+            ('Z', "Z", "Mirrored across the local Z axis"),
+        ],
+        default='NONE',
+    )
+    symmetry_tolerance: bpy.props.FloatProperty(
+        name="Symmetry Tolerance",
+        description='Distance within which two vertices count as mirrored',
+        default=0.0001,
+        min=0.000001,
+        max=1.0,
+        precision=6,
+        subtype='DISTANCE',
+    )
+    mirror_layout: bpy.props.EnumProperty(
+        name='Mirrored Half',
+        description='Where the UVs of the mirrored half go',
+        items=[
+            ('OVERLAP', "Overlap", "Share the texture space of the unwrapped half"),
+            ('MIRROR', "Mirror", "Flip the islands and pack them beside the unwrapped half"),
+        ],
+        default='OVERLAP',
+    )
+    split_chunks: bpy.props.BoolProperty(
+        name='Split into Chunks',
+        description='Unwrap huge meshes in chunks, one MoF process each, and pack all islands together afterwards',
+        default=False,
+    )
+    chunk_size: bpy.props.IntProperty(
+        name="Chunk Size",
+        description='Maximum number of faces sent to a single MoF process',
+        default=100000,
+        min=1000,
+        max=10000000,
+    )
+    udim_tiles: bpy.props.BoolProperty(
+        name='UDIM per Material',
+        description='Unwrap the faces of every material slot with their own MoF process and move them into UDIM tile 1001 + slot index, all at the same texel density',
+        default=False,
+    )
+    tile_resolutions: bpy.props.StringProperty(
+        name="Tile Resolutions",
+        description='Texture resolution of every material slot\'s tile, comma separated in slot order. Slots not listed use Texture Resolution',
+        default="",
+    )
+    reuse_seams: bpy.props.BoolProperty(
+        name='Reuse Seams',
+        description='For meshes whose topology didn\'t change since their last MoF run, keep its seams and only re-flatten and repack them with Blender instead of running MoF',
+        default=False,
+        options={'SKIP_SAVE'},
+    )
+    sweep: bpy.props.BoolProperty(
+        name='Parameter Sweep',
+        description='Run MoF with several option sets at once, keep the best scoring layout and save its options as a preset. The winning layout is applied as MoF made it, since repacking would undo what was scored',
+        default=False,
+    )
+    sweep_method: bpy.props.EnumProperty(
+        name='Sweep',
+        description='How the option sets are picked',
+        items=[
+            ('RANDOM', "Random", "Random picks from all swept options"),
+            ('GRID', "Grid", "Every combination of the most influential options"),
+        ],
+        default='RANDOM',
+    )
+    sweep_samples: bpy.props.IntProperty(
+        name="Samples",
+        description='Number of option sets tried, the current settings included',
+        default=8,
+        min=2,
+        max=64,
+    )
+    measure_layout: bpy.props.BoolProperty(
+        name='Measure Layout',
+        description='Compute coverage, distortion and texel density of every result for the side panel and the log. Parameter sweeps always measure their samples',
+        default=True,
+    )
+    run_in_background: bpy.props.BoolProperty(
+        name='Run in Background',
+        description='Keep Blender responsive while MoF runs, showing its progress in the status bar. Press Esc to cancel',
         default=True,
     )
 
 
     def invoke(self, context, event):
+        # Objects that can take the fast path, offered in the dialog
+        objects = context.selected_objects if self.selected_objects else [context.active_object]
+        self._reusable = []
+        # Name, face count and quad ratio of every object, for the time estimate
+        self._sizes = []
+        for obj in objects:
+            if obj is not None and obj.type == 'MESH':
+                if obj.mode == 'EDIT':
+                    obj.update_from_editmode()
+                if core.stored_seams(obj.data) is not None:
+                    self._reusable.append(obj.name)
+                totals = np.empty(len(obj.data.polygons), dtype=np.int32)
+                obj.data.polygons.foreach_get("loop_total", totals)
+                self._sizes.append((obj.name, len(totals), float(np.mean(totals == 4)) if len(totals) else 0.0))
         wm = context.window_manager
         return wm.invoke_props_dialog(self, width=400)
 
@@ -358,9 +744,47 @@ class UV_OT_MoFUnwrap(bpy.types.Operator):
         
     def draw(self, context):
         layout = self.layout
+        reusable = getattr(self, "_reusable", [])
+        if reusable:
+            row = layout.row(align=True)
+            row.prop(self, "reuse_seams", toggle=True)
+            row.label(text="Topology unchanged since the last MoF run" if len(reusable) == 1 else f"{len(reusable)} objects with unchanged topology")
+        estimate = self.estimate(context)
+        if estimate:
+            layout.label(text=estimate, icon='TIME')
+        row = layout.row(align=True)
+        row.use_property_split=True
+        # Sweeps score MoF's own layouts, repacking the winner would apply a layout that was never scored
+        row.enabled = not self.sweep
+        row.prop(self, "layout_mode")
+        if self.sweep:
+            layout.label(text="Parameter Sweep keeps MoF's layout", icon='INFO')
+        row = layout.row(align=True)
+        row.use_property_split=True
+        row.prop(self, "selected_objects")
+        toggle_option_line(layout, self, "selection_only", [(self, "context_rings")])
+        toggle_option_line(layout, self, "split_chunks", [(self, "chunk_size")])
+        toggle_option_line(layout, self, "udim_tiles", [(self, "tile_resolutions")])
+        row = layout.row(align=True)
+        row.prop(self, "lod_chain", toggle=True)
+        row.prop(self, "preflight", toggle=True)
+        toggle_option_line(layout, self, "sweep", [(self, "sweep_method"), (self, "sweep_samples")])
+        row = layout.row(align=True)
+        row.use_property_split=True
+        row.prop(self, "symmetry")
+        if self.symmetry != 'NONE':
+            row = layout.row(align=True)
+            row.use_property_split=True
+            row.prop(self, "symmetry_tolerance")
+            row = layout.row(align=True)
+            row.use_property_split=True
+            row.prop(self, "mirror_layout", expand=True)
+        row = layout.row(align=True)
+        row.use_property_split=True
+        row.prop(self, "run_in_background")
         row = layout.row(align=True)
         row.use_property_split=True
-        row.prop(self, "auto_reunwrap")
+        row.prop(self, "measure_layout")
         layout.prop(self, "expand_optinos", toggle=True, emboss=False, icon='TRIA_DOWN' if self.expand_optinos else 'TRIA_RIGHT', text="Other Options (You don't need them actually)")
 
         if self.expand_optinos:
@@ -371,6 +795,7 @@ class UV_OT_MoFUnwrap(bpy.types.Operator):
             box.prop(self, "separate_hard_edge", toggle=True)
             box.prop(self, "aspect_ratio")
             box.prop(self, "use_normal", toggle=True)
+            box.prop(self, "apply_modifiers", toggle=True)
             row1 = box.row(align=True)
             row1.prop(self, "overlap_identical_parts", toggle=True)
             row1.prop(self, "overlap_mirrored_parts", toggle=True)
@@ -426,184 +851,580 @@ class UV_OT_MoFUnwrap(bpy.types.Operator):
             box.prop(self, "validate", toggle=True)
 
     def assemble_options_command_line(self) -> list[str]:
-        options = []
-        def get_bool(opt: bool) -> str:
-            return "TRUE" if opt else "FALSE"
-        def get_int(opt: int) -> str:
-            return str(opt)
-        def get_float(opt: float) -> str:
-            return str(opt)
-        def get_vec3(opt: tuple[float, float, float]|Vector) -> str:
-            return " ".join(map(str, opt))
-
-        options.append(f"-RESOLUTION {get_int(self.texture_resolution)}")
-        options.append(f"-SEPARATE {get_bool(self.separate_hard_edge)}")
-        options.append(f"-ASPECT {get_float(self.aspect_ratio)}")
-        options.append(f"-NORMALS {get_bool(self.use_normal)}")
-        options.append(f"-OVERLAP {get_bool(self.overlap_identical_parts)}")
-        options.append(f"-MIRROR {get_bool(self.overlap_mirrored_parts)}")
-        options.append(f"-WORLDSCALE {get_bool(self.scale_uv_space_to_worldspace)}")
-        options.append(f"-DENSITY {get_int(self.texture_density)}")
-        options.append(f"-CENTER {get_vec3(self.seam_direction)}")
-
-        options.append(f'-CONE {get_bool(self.cones)}')
-        options.append(f'-GRIDS {get_bool(self.grids)}')
-        options.append(f'-STRIP {get_bool(self.strips)}')
-        options.append(f'-PATCH {get_bool(self.patches)}')
-        options.append(f'-PLANES {get_bool(self.planes)}')
-        options.append(f'-TUBES {get_bool(self.tubes)}')
-        options.append(f'-JUNCTIONSDEBUG {get_bool(self.junctions)}')
-        options.append(f'-SQUARE {get_bool(self.squares)}')
-
-        options.append(f'-CONERATIO {get_float(self.cone_ratio)}')
-        options.append(f'-FLATT {get_float(self.flatness)}')
-        
-
-        options.append(f'-MERGE {get_bool(self.merge)}')
-        options.append(f'-MERGELIMIT {get_float(self.merge_limit)}')
-        options.append(f'-PRESMOOTH {get_bool(self.pre_smooth)}')
-        options.append(f'-SOFTUNFOLD {get_bool(self.soft_unfold)}')
-        options.append(f'-EXTRADEBUG {get_bool(self.extra_ordinary_point)}')
-        options.append(f'-ABF {get_bool(self.angle_based_flatening)}')
-        options.append(f'-SMOOTH {get_bool(self.smooth)}')
-        options.append(f'-REPAIR {get_bool(self.repair)}')
-        options.append(f'-REPAIRSMOOTH {get_bool(self.repair_smooth)}')
-        options.append(f'-RELAX {get_bool(self.relax)}')
-        options.append(f'-RELAX_ITERATIONS {get_int(self.relax_iterations)}')
-        options.append(f'-EXPAND {get_float(self.expand)}')
-        options.append(f'-CUTDEBUG {get_bool(self.cut)}')
-        options.append(f'-STRETCH {get_bool(self.stretch)}')
-        options.append(f'-MATCH {get_bool(self.match)}')
-        options.append(f'-PACKING {get_bool(self.packing)}')
-        options.append(f'-RASTERIZATION {get_int(self.rasterization)}')
-        options.append(f'-PACKING_ITERATIONS {get_int(self.packing_iterations)}')
-        options.append(f'-SCALETOFIT {get_float(self.scale_to_fit)}')
-        options.append(f'-VALIDATE {get_bool(self.validate)}')
-
-        return options
+        return core.assemble_options_command_line(self)
 
-        
-    def execute(self, context):
-        obj: bpy.types.Object = context.active_object
-        if obj is None or obj.type != 'MESH':
+    def estimate(self, context) -> str:
+        """
+        Predicted MoF time of the objects in the dialog with the current options, see costmodel.
+        """
+        reusable = getattr(self, "_reusable", []) if self.reuse_seams else []
+        sizes = [(faces, quad_ratio) for name, faces, quad_ratio in getattr(self, "_sizes", []) if faces and name not in reusable]
+        if not sizes:
+            return ""
+        preferences = context.preferences.addons[__package__].preferences
+        path = telemetry.log_path(preferences)
+        model = costmodel.load(path) if path else costmodel.CostModel()
+        arguments = core.command_line_arguments(self.assemble_options_command_line())
+        seconds, memory = [], []
+        for faces, quad_ratio in sizes:
+            # Chunks and sweeps run several MoF processes per object
+            parts = -(-faces // self.chunk_size) if self.split_chunks and not self.sweep else 1
+            predicted_seconds, predicted_memory = model.predict(faces // parts, quad_ratio, arguments)
+            count = parts * (self.sweep_samples if self.sweep else 1)
+            seconds += [predicted_seconds] * count
+            memory += [predicted_memory] * count
+        total = costmodel.makespan(seconds, memory, preferences.max_processes, preferences.memory_budget * 2**20)
+        source = f"from {model.runs} logged runs" if model.runs else "rough guess until runs are logged"
+        return f"Estimated MoF time: {costmodel.format_duration(total)} ({source})"
+
+    def post_process(self, context, obj: bpy.types.Object, uvs: np.ndarray, run: telemetry.RunRecord):
+        # Selected polygons and the polygons exported with them, when only the selection was unwrapped
+        selection = self._selections.get(obj.name)
+        mirror = self._mirrors.get(obj.name)
+        with run.stage("apply"):
+            if mirror is not None:
+                uvs = mirror.expand(uvs, self.mirror_layout)
+            if selection is not None:
+                uvs = core.merge_selection_uvs(obj.data, uvs, *selection)
+            island_count = core.apply_uvs(obj.data, uvs)
+            speculative.ignore_uv_update(obj)
+            # Tiles would be lost by re-flattening, so only plain layouts offer their seams for reuse
+            if obj.name in self._udims:
+                core.forget_seams(obj.data)
+            else:
+                core.store_seams(obj.data)
+        print(f"MoF {obj.name}: {island_count} UV islands")
+        with run.stage("relayout"):
+            layout_mode = 'MOF' if self.sweep else self.layout_mode
+            repack = obj.name in self._chunked or (mirror is not None and self.mirror_layout == 'MIRROR')
+            margin = core.ISLAND_PADDING / self.texture_resolution if repack else 0.0
+            if obj.name in self._udims or obj.name in self._reused:
+                # MoF packed every tile on its own and Blender would pack them all back into one, reused seams are packed already
+                pass
+            elif mirror is not None and self.mirror_layout == 'OVERLAP' and layout_mode != 'MOF':
+                # Lay out the unwrapped half only, then copy it over the mirrored half again
+                faces = core.selected_faces(obj.data)
+                obj.data.polygons.foreach_set("select", mirror.kept)
+                core.relayout(context, obj, layout_mode, margin=margin)
+                obj.data.polygons.foreach_set("select", faces)
+                core.write_loop_uvs(obj.data, mirror.expand(core.read_loop_uvs(obj.data)[mirror.kept_loops], 'OVERLAP'))
+            else:
+                core.relayout(context, obj, layout_mode, selection[0] if selection is not None else None, margin)
+        if not self.measure_layout:
+            # Scores of an earlier layout would no longer describe this one
+            if "mof_metrics" in obj:
+                del obj["mof_metrics"]
+        else:
+            with run.stage("metrics"):
+                buffers = core.MeshBuffers.from_object(context, obj)
+                if obj.name in self._udims:
+                    tiles, resolutions = udim.face_tiles(buffers, self._tile_resolutions, self.texture_resolution)
+                    run.metrics = metrics.layout_metrics(buffers, core.read_loop_uvs(obj.data), resolutions, self.texture_density, island_count, tiles)
+                else:
+                    run.metrics = metrics.layout_metrics(buffers, core.read_loop_uvs(obj.data), self.texture_resolution, self.texture_density, island_count)
+                obj["mof_metrics"] = run.metrics
+        if run.skipped and "mof" in run.stages:
+            run.estimated_saving = preflight.estimated_saving(run.skipped, run.stages["mof"])
+            print(f"MoF {obj.name}: pre-flight saved about {run.estimated_saving:.1f} s of MoF time")
+        if snapshots.store.max_size:
+            snapshots.store.add(obj.name, run.options, core.read_loop_uvs(obj.data), run.metrics)
+        if run.metrics:
+            print(f"MoF {obj.name}: coverage {run.metrics['coverage']:.1%}, area distortion {run.metrics['area_distortion']:.3f}, angle distortion {run.metrics['angle_distortion']:.1f}°")
+        with run.stage("apply"):
+            # Hand the final layout to the other users of the same geometry
+            written = {obj.data.as_pointer()}
+            for name in self._instances.get(obj.name, ()):
+                instance = bpy.data.objects.get(name)
+                if instance is None:
+                    continue
+                if instance.data.as_pointer() not in written:
+                    core.copy_uvs(obj.data, instance.data)
+                    written.add(instance.data.as_pointer())
+                # Objects sharing the mesh see the update as well
+                speculative.ignore_uv_update(instance)
+            for name in self._lods.get(obj.name, ()):
+                target = bpy.data.objects.get(name)
+                if target is not None and target.data.as_pointer() not in written:
+                    islands = lod.transfer_uvs(obj.data, target.data)
+                    written.add(target.data.as_pointer())
+                    speculative.ignore_uv_update(target)
+                    print(f"MoF {obj.name}: transferred UVs to {name}, {islands} UV islands")
+
+    def set_result(self, name: str, error: str = ""):
+        self._results[name] = error
+        for instance in self._instances.pop(name, ()):
+            self._results[instance] = error
+        run = self._runs.pop(name, None)
+        if run is not None:
+            run.error = error
+            telemetry.finish_run(run, self._log_path)
+
+    def start(self, context) -> bool:
+        """
+        Validates the input, exports the objects and queues their MoF jobs.
+        """
+        if self.selected_objects:
+            objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        else:
+            objects = [context.active_object]
+        if not objects or objects[0] is None or objects[0].type != 'MESH':
             self.report({'ERROR'}, "No mesh object selected")
-            return {'CANCELLED'}
+            return False
 
         
         # Get the path of the MoF executable from preferences
         preferences = bpy.context.preferences.addons[__package__].preferences
         mof_exec = preferences.mof_executable
 
-        if not mof_exec:
-            self.report({'ERROR'}, "MoF executable path not set or not correct in preferences")
-            return {'CANCELLED'}
-
-        if not os.path.isfile(mof_exec) or os.path.basename(mof_exec) != "UnWrapConsole3.exe":
-            self.report({'ERROR'}, "MoF executable path is not correct (should be 'UnWrapConsole3.exe')")
-            return {'CANCELLED'}
+        error = core.executable_error(mof_exec)
+        if error:
+            self.report({'ERROR'}, error)
+            return False
+        try:
+            limits = core.ResourceLimits.from_preferences(preferences)
+            self._tile_resolutions = udim.parse_resolutions(self.tile_resolutions)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return False
     
-        # Save the current mode
-        original_mode = bpy.context.mode
-        if original_mode == 'EDIT_MESH':
-            original_mode = 'EDIT'
+        # Save the current mode, selection and active object
+        self._original_state = capture_state(context)
+        # State the run leaves behind, the original one only comes back if the user didn't change it meanwhile
+        self._started_state = None
+        partial = self.selection_only and self._original_state[0] == 'EDIT'
     
-        # Switch to edit mode
+        # Switch to object mode
         bpy.ops.object.mode_set(mode='OBJECT')
 
+        options = core.command_line_arguments(self.assemble_options_command_line())
+
+        speculative.remember(operator_settings(self))
+        snapshots.store.max_size = preferences.snapshot_memory * 2**20
+        snapshots.store.compact = preferences.compact_snapshots
+        # Job servers get the whole file, so remote runs don't stream
+        self._remote = remote.RemoteBackend.from_preferences(preferences)
+        tempio.configure(bpy.path.abspath(preferences.scratch_directory) if preferences.scratch_directory else "", preferences.stream_input and self._remote is None)
+        self._pool = core.MofJobPool(preferences.max_processes, limits, preferences.memory_budget * 2**20)
+        if self._remote is not None:
+            # Remote servers can take as many jobs at once as they have workers, the pool grows once they answered
+            max_processes = preferences.max_processes
+            def checked(workers: int):
+                if workers:
+                    self._pool.max_processes = max(max_processes, workers)
+                else:
+                    print("MoF: no job server reachable, running MoF locally")
+            self._remote.start_check(checked)
+        self._results: dict[str, str] = {}
+        # Lower LODs get the UVs of the most detailed one instead of their own MoF run
+        self._lods: dict[str, list[str]] = {}
+        if self.lod_chain and not partial:
+            objects, self._lods = lod.lod_chains(objects, context.view_layer.objects)
+            for name, targets in self._lods.items():
+                print(f"MoF {name}: transferring UVs to {', '.join(targets) or 'no other LODs'}")
+        self._total = len(objects)
+        # Objects sharing a mesh, or identical geometry, are unwrapped once through the first of them
+        groups = core.group_instances(objects, not partial and not (self.apply_modifiers and any(core.modified(obj) for obj in objects)), self.scale_uv_space_to_worldspace)
+        objects = [group[0] for group in groups]
+        self._instances: dict[str, list[str]] = {group[0].name: [obj.name for obj in group[1:]] for group in groups if len(group) > 1}
+        for group in groups:
+            if len(group) > 1:
+                print(f"MoF {group[0].name}: shared with {', '.join(obj.name for obj in group[1:])}")
+        self._cache = UVCache.from_preferences(preferences) if preferences.use_cache else None
+        self._cache_keys: dict[str, str] = {}
+        self._buffers: dict[str, core.MeshBuffers] = {}
+        self._selections: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        # Chunk id of every exported polygon and the results received so far
+        self._chunks: dict[str, tuple[np.ndarray, dict[int, core.MofResult]]] = {}
+        # Exported and original buffers of objects unwrapped with their modifiers applied
+        self._originals: dict[str, tuple[core.MeshBuffers, core.MeshBuffers]] = {}
+        self._chunked: set[str] = set()
+        # Objects unwrapped one material per UDIM tile
+        self._udims: set[str] = set()
+        # Objects re-flattened along the seams of their last MoF run
+        self._reused: set[str] = set()
+        self._mirrors: dict[str, MirrorPlan] = {}
+        self._sweeps: dict[str, Sweep] = {}
+        # Samples are scored on MoF's layout, so that is also what the winner and its preset keep
+        variants = sample_variants(dict(operator_settings(self), layout_mode='MOF'), self.sweep_method, self.sweep_samples) if self.sweep else []
+        self._runs: dict[str, telemetry.RunRecord] = {}
+        self._log_path = telemetry.log_path(preferences)
+        model = costmodel.load(self._log_path) if self._log_path else costmodel.CostModel()
+        queued: list[core.MofJob] = []
 
-        bpy.ops.object.select_all(action='DESELECT')
-        obj.select_set(True)
-        context.view_layer.objects.active = obj
-                
-    
-        # Export the active object to an OBJ file
-        with tempfile.NamedTemporaryFile(suffix=".obj", delete=False) as temp_input:
-            input_obj_path = temp_input.name
-        bpy.ops.wm.obj_export(filepath=input_obj_path, export_selected_objects=True, export_materials=False, export_normals=True)
-        
         try:
-            # Run MoF
-            with tempfile.NamedTemporaryFile(suffix=".obj", delete=False) as temp_output:
-                output_obj_path = temp_output.name
-            
-            imported_obj = None # Initialize to None
+            # Export every object, then start MoF on the jobs expected to take longest first
+            for obj in objects:
+                run = telemetry.RunRecord(obj.name, len(obj.data.polygons), options)
+                self._runs[obj.name] = run
+                # Sweeps, tiles and mirrored halves need MoF itself
+                if self.reuse_seams and not partial and not self.sweep and not self.udim_tiles and self.symmetry == 'NONE':
+                    seams = core.stored_seams(obj.data)
+                    if seams is not None:
+                        print(f"MoF {obj.name}: topology unchanged, re-flattening the seams of the last MoF run")
+                        self.reuse(context, obj, seams, run)
+                        continue
+                # A partial unwrap maps onto the selected polygons of the original mesh, so modifiers are ignored
+                apply_modifiers = self.apply_modifiers and not partial and core.modified(obj)
+                with run.stage("export"):
+                    if snapshots.store.max_size and obj.data.uv_layers and not snapshots.store.has_original(obj.name):
+                        # Keep the UVs the object had before its first run
+                        snapshots.store.add(obj.name, None, core.read_loop_uvs(obj.data))
+                    buffers = core.MeshBuffers.from_object(context, obj, apply_modifiers, self.use_normal)
+                    loop_count = len(obj.data.loops)
+                    if partial:
+                        selected = core.selected_faces(obj.data)
+                        exported = core.grow_face_mask(buffers, selected, self.context_rings)
+                        self._selections[obj.name] = (selected, exported)
+                        buffers = buffers.subset(exported)
+                        loop_count = len(buffers.loops)
+                    elif self.symmetry != 'NONE' and not apply_modifiers:
+                        # MoF only sees one half, the other half copies its UVs
+                        mirror = MirrorPlan.from_mesh(obj.data, self.symmetry, self.symmetry_tolerance)
+                        if mirror is not None:
+                            print(f"MoF {obj.name}: mirrored across {'XYZ'[mirror.axis]}, unwrapping {int(mirror.kept.sum())}/{len(mirror.kept)} faces")
+                            self._mirrors[obj.name] = mirror
+                            buffers = buffers.subset(mirror.kept)
+                            loop_count = len(buffers.loops)
+                if not len(buffers.loop_totals):
+                    self.set_result(obj.name, "No faces selected")
+                    continue
+                # A sweep already runs several MoF processes on the object
+                tiled = self.udim_tiles and not partial and not self.sweep and obj.name not in self._mirrors
+                if tiled:
+                    self._udims.add(obj.name)
+                chunked = self.split_chunks and not self.sweep and not tiled and len(buffers.loop_totals) > self.chunk_size
+                if chunked:
+                    self._chunked.add(obj.name)
+
+                object_options = options
+                # A sweep sets the detectors itself
+                if self.preflight and not self.sweep:
+                    with run.stage("preflight"):
+                        object_options, run.preflight, run.skipped = preflight.arguments(types.SimpleNamespace(**operator_settings(self)), buffers)
+                        run.options = object_options
+                    print(f"MoF {obj.name}: pre-flight {preflight.describe(run.preflight, run.skipped)}")
+
+                with run.stage("export"):
+                    uvs = None
+                    adopted = None
+                    if self._cache is not None and not self.sweep:
+                        key_options = object_options + [f"chunks {self.chunk_size}"] if chunked else object_options
+                        if tiled:
+                            key_options = object_options + [f"udim {self._tile_resolutions}"]
+                        key = geometry_cache_key(buffers, key_options, loop_count)
+                        uvs = self._cache.get(key, loop_count)
+                        self._cache_keys[obj.name] = key
+                        if uvs is None:
+                            adopted = speculative.take(key)
+                if uvs is not None:
+                    # Same geometry and options were unwrapped before, skip MoF entirely
+                    print(f"MoF {obj.name}: using cached result {key}")
+                    run.cached = True
+                    self.apply_cached(context, obj, uvs)
+                    continue
+
+                with run.stage("export"):
+                    self._buffers[obj.name] = buffers
+                    if apply_modifiers:
+                        # UVs are projected back onto the original mesh, not the one with modifiers applied
+                        self._originals[obj.name] = (buffers, core.MeshBuffers.from_object(context, obj))
+                    if adopted is not None:
+                        # A pre-unwrap of this exact geometry and options is already running
+                        print(f"MoF {obj.name}: picking up the background pre-unwrap")
+                        adopted.name = obj.name
+                        self._pool.adopt(adopted)
+                        continue
+                    if chunked:
+                        chunks = core.partition_faces(buffers, self.chunk_size)
+                        self._chunks[obj.name] = (chunks, {})
+                        jobs = [core.create_job(obj.name, buffers.subset(chunks == chunk), mof_exec, object_options, chunk) for chunk in range(int(chunks.max()) + 1)]
+                        print(f"MoF {obj.name}: split into {len(jobs)} chunks")
+                    elif tiled:
+                        # One chunk per material slot, every one at the resolution of its tile
+                        chunks, slots = udim.material_chunks(buffers)
+                        self._chunks[obj.name] = (chunks, {})
+                        resolutions = udim.slot_resolutions(slots, self._tile_resolutions, self.texture_resolution).tolist()
+                        jobs = [core.create_job(obj.name, buffers.subset(chunks == chunk), mof_exec, udim.tile_arguments(object_options, resolution), chunk) for chunk, resolution in enumerate(resolutions)]
+                        print(f"MoF {obj.name}: tiles {', '.join(f'{slot + udim.FIRST_TILE} ({resolution} px)' for slot, resolution in zip(slots.tolist(), resolutions))}")
+                    else:
+                        jobs = [core.create_job(obj.name, buffers, mof_exec, object_options)]
+                    if self.sweep:
+                        # Every option set runs on its own copy of the exported file
+                        self._sweeps[obj.name] = Sweep(variants)
+                        jobs += [core.copy_job(jobs[0], variant_arguments(core, variant), index) for index, variant in enumerate(variants[1:], 1)]
+                for job in jobs:
+                    model.estimate(job)
+                queued += remote.offload(jobs, self._remote)
+            for job in sorted(queued, key=lambda job: -job.predicted_seconds):
+                self._pool.submit(job)
+        except:
+            self.cleanup(context)
+            # Exported jobs that never reached the pool
+            for job in queued:
+                job.cleanup()
+            raise
+        self._started_state = capture_state(context)
+        return True
+
+    def reuse(self, context, obj: bpy.types.Object, seams: np.ndarray, run: telemetry.RunRecord):
+        try:
+            self._reused.add(obj.name)
+            run.reused_seams = True
+            with run.stage("relayout"):
+                core.unwrap_along_seams(context, obj, seams, core.ISLAND_PADDING / self.texture_resolution)
+            self.post_process(context, obj, core.read_loop_uvs(obj.data), run)
+            self.set_result(obj.name)
+        except Exception as e:
+            self.set_result(obj.name, str(e))
+
+    def apply_cached(self, context, obj: bpy.types.Object, uvs: np.ndarray):
+        try:
+            self.post_process(context, obj, uvs, self._runs[obj.name])
+            self.set_result(obj.name)
+        except Exception as e:
+            self.set_result(obj.name, str(e))
+
+    def import_result(self, job: core.MofJob) -> np.ndarray | None:
+        """
+        Maps the UVs MoF wrote for `job` onto the exported mesh. Returns None while other jobs of the same object are still running.
+        """
+        sweep = self._sweeps.get(job.name)
+        if sweep is not None:
+            # A failed option set only drops out of the sweep
+            try:
+                if job.error:
+                    raise RuntimeError(job.error)
+                target = self._buffers[job.name]
+                uvs = core.map_uvs_to_loops(core.MofResult.read(job.output_path), target)
+                sweep.add(job.variant, uvs, metrics.layout_metrics(target, uvs, self.texture_resolution, self.texture_density))
+            except Exception as e:
+                sweep.fail(job.variant, str(e))
+            return None
+
+        result = core.MofResult.read(job.output_path)
+        if job.name not in self._chunks:
+            return core.map_uvs_to_loops(result, self._buffers.pop(job.name))
+
+        chunks, results = self._chunks[job.name]
+        results[job.chunk] = result
+        if len(results) <= chunks.max():
+            # Wait for the remaining chunks
+            return None
+        del self._chunks[job.name]
+        results = [results[chunk] for chunk in range(len(results))]
+        target = self._buffers.pop(job.name)
+        uvs = core.map_chunk_uvs_to_loops(chunks, results, target)
+        if job.name in self._udims:
+            uvs = udim.place_tiles(target, uvs, self._tile_resolutions, self.texture_resolution)
+        return uvs
+
+    def finish_sweep(self, obj: bpy.types.Object, run: telemetry.RunRecord) -> np.ndarray:
+        sweep = self._sweeps.pop(obj.name)
+        self._buffers.pop(obj.name)
+        for line in sweep.summary():
+            print(f"MoF {obj.name}: {line}")
+        if sweep.best is None:
+            raise RuntimeError(f"Every sweep run failed: {next(iter(sweep.errors.values()))}")
+        run.options = variant_arguments(core, sweep.variants[sweep.best])
+        print(f"MoF {obj.name}: saved the best options as preset {sweep.save_preset(obj.name)}")
+        return sweep.best_uvs
+
+    def handle_finished(self, context, job: core.MofJob):
+        if job.name in self._results:
+            # Another chunk of this object failed already
+            job.cleanup()
+            return
+        run = self._runs[job.name]
+        run.add_job(job)
+        state = None
+        try:
+            if job.error and job.name not in self._sweeps:
+                self.set_result(job.name, job.error)
+                return
+            obj = bpy.data.objects.get(job.name)
+            if obj is None:
+                self.set_result(job.name, "Object no longer exists")
+                return
+            # Mesh data can only be written in object mode, whatever the user does meanwhile comes back afterwards
+            state = capture_state(context)
+            if context.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            with run.stage("import"):
+                # Read MoF's UVs and write them straight into the active UV layer
+                uvs = self.import_result(job)
+            if job.name in self._sweeps:
+                if not self._sweeps[job.name].done:
+                    return
+                uvs = self.finish_sweep(obj, run)
+            elif uvs is None:
+                return
+            if job.name in self._originals:
+                with run.stage("import"):
+                    exported, original = self._originals.pop(job.name)
+                    uvs = lod.transfer_buffer_uvs(exported, uvs, original)
+            # Sweeps have no cache key
+            if self._cache is not None and job.name in self._cache_keys:
+                with run.stage("import"):
+                    self._cache.put(self._cache_keys[job.name], uvs)
+            self.post_process(context, obj, uvs, run)
+            self.set_result(job.name)
+        except Exception as e:
+            self.set_result(job.name, str(e))
+        finally:
+            job.cleanup()
+            if state is not None and capture_state(context) != state:
+                restore_state(context, state)
+
+    def cleanup(self, context):
+        # Kill whatever is still running and remove its OBJ files
+        for job in self._pool.cancel():
+            if job.name not in self._results:
+                self.set_result(job.name, "Cancelled")
+            job.cleanup()
+
+        # Restore the original selection, active object and mode, unless the user picked others while MoF ran
+        if self._started_state is None or capture_state(context) == self._started_state:
+            restore_state(context, self._original_state)
+
+    def finish(self, context) -> set[str]:
+        self.cleanup(context)
+
+        failed = {name: error for name, error in self._results.items() if error}
+        for name, error in self._results.items():
+            print(f"MoF {name}: {error or 'OK'}")
+
+        if len(failed) == len(self._results):
+            self.report({'ERROR'}, f"MoF failed on {', '.join(f'{name} ({error})' for name, error in failed.items())}")
+            return {'CANCELLED'}
+        if failed:
+            self.report({'WARNING'}, f"MoF unwrapped {len(self._results) - len(failed)}/{len(self._results)} objects, failed: {', '.join(f'{name} ({error})' for name, error in failed.items())}")
+        else:
+            self.report({'INFO'}, "MoF integration completed" if len(self._results) == 1 else f"MoF unwrapped {len(self._results)} objects")
+        return {'FINISHED'}
 
-            options = self.assemble_options_command_line()
-            options = [option.split(' ') for option in options]
-            options = [item for sublist in options for item in sublist]
+    def execute(self, context):
+        if not self.start(context):
+            return {'CANCELLED'}
 
-            print(f'MoF {input_obj_path} {output_obj_path} {" ".join(options)}')
-            subprocess.run([mof_exec, input_obj_path, output_obj_path] + options)
-    
-            # Import the output OBJ file
-            bpy.ops.wm.obj_import(filepath=output_obj_path)
-    
-            # Get the imported object
-            imported_obj = bpy.context.selected_objects[0]
-            
-            # Ensure the original object has a UV map
-            if not obj.data.uv_layers:
-                obj.data.uv_layers.new(name="UVMap")
-                
-            # Get the active UV channel name from the original object
-            selected_uv_channel = obj.data.uv_layers.active.name
-            
-            # Ensure the imported object has a UV map
-            if not imported_obj.data.uv_layers:
-                imported_obj.data.uv_layers.new(name=selected_uv_channel)
-            else:
-                # Rename the first UV channel to match the original object's UV channel
-                imported_obj.data.uv_layers[0].name = selected_uv_channel
-
-            # Add a Data Transfer modifier to copy UVs
-            data_trans = obj.modifiers.new(name="DataTransfer", type='DATA_TRANSFER')
-            data_trans.object = imported_obj
-            data_trans.use_loop_data = True
-            data_trans.data_types_loops = {'UV'}
-            data_trans.loop_mapping = 'NEAREST_POLYNOR'
-
-            with context.temp_override(active_object=obj):
-                bpy.ops.object.datalayout_transfer('INVOKE_DEFAULT', data_type='UV')
-    
-            # Apply the modifier
-            bpy.context.view_layer.objects.active = obj
-            bpy.ops.object.modifier_apply(modifier=data_trans.name)
-            data_trans = None
-            
-            # Enter edit mode and select all UVs
+        if self.run_in_background and context.window is not None:
+            # Poll the MoF processes from a timer so the UI stays responsive
+            wm = context.window_manager
+            self._timer = wm.event_timer_add(0.1, window=context.window)
+            wm.modal_handler_add(self)
+            self.update_status(context)
+            return {'RUNNING_MODAL'}
+
+        try:
+            # Apply results as each job finishes
+            for job in self._pool.wait():
+                self.handle_finished(context, job)
+        except:
+            self.cleanup(context)
+            raise
+        return self.finish(context)
+
+    def update_status(self, context):
+        running = ", ".join(f"{job.name}: {job.last_line}" if job.last_line else job.name for job in self._pool.running)
+        context.workspace.status_text_set(f"MoF {len(self._results)}/{self._total} done | {running} | Esc to cancel")
+
+    def stop_modal(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        context.workspace.status_text_set(None)
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and event.value == 'PRESS':
+            self.stop_modal(context)
+            self.cleanup(context)
+            applied = sum(not error for error in self._results.values())
+            if applied:
+                # Objects that got their UVs before the cancel still need an undo step
+                self.report({'WARNING'}, f"MoF unwrap cancelled, {applied}/{len(self._results)} objects unwrapped")
+                return {'FINISHED'}
+            self.report({'WARNING'}, "MoF unwrap cancelled")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        try:
+            for job in self._pool.update():
+                self.handle_finished(context, job)
+        except:
+            self.stop_modal(context)
+            self.cleanup(context)
+            raise
+
+        if self._pool.busy:
+            self.update_status(context)
+            return {'PASS_THROUGH'}
+
+        self.stop_modal(context)
+        return self.finish(context)
+
+class UV_OT_MoFClearCache(bpy.types.Operator):
+    bl_idname = "uv.mof_clear_cache"
+    bl_label = "Clear Cache"
+    bl_description = "Delete all cached MoF results"
+
+    def execute(self, context):
+        preferences = context.preferences.addons[__package__].preferences
+        UVCache.from_preferences(preferences).clear()
+        self.report({'INFO'}, "MoF cache cleared")
+        return {'FINISHED'}
+
+class UV_OT_MoFRestoreSnapshot(bpy.types.Operator):
+    bl_idname = "uv.mof_restore_snapshot"
+    bl_label = "Restore UVs"
+    bl_description = "Bring back the UVs of an earlier MoF run"
+    # Flipping between layouts doesn't push full mesh undo steps
+    bl_options = {'REGISTER', 'INTERNAL'}
+
+    number: bpy.props.IntProperty()
+
+    @classmethod
+    def description(cls, context, properties):
+        obj = context.active_object
+        # Looked up without find(), hovering a button isn't a use
+        snapshot = next((snapshot for snapshot in snapshots.store.of_object(obj.name) if snapshot.number == properties.number), None) if obj else None
+        if snapshot is None or snapshot.options is None:
+            return "Bring back the UVs the object had before MoF"
+        return "Bring back the UVs made with: " + " ".join(snapshot.options)
+
+    def execute(self, context):
+        obj = context.active_object
+        snapshot = snapshots.store.find(obj.name, self.number) if obj else None
+        if snapshot is None:
+            self.report({'ERROR'}, "Snapshot no longer available")
+            return {'CANCELLED'}
+        if len(snapshot.uvs) != len(obj.data.loops):
+            self.report({'ERROR'}, "The mesh changed since this snapshot was taken")
+            return {'CANCELLED'}
+
+        # Edit mode would overwrite the mesh data with its own copy on exit
+        mode = obj.mode
+        if mode == 'EDIT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        core.apply_uvs(obj.data, snapshot.uvs.astype(np.float32))
+        speculative.ignore_uv_update(obj)
+        if snapshot.metrics:
+            obj["mof_metrics"] = snapshot.metrics
+        elif "mof_metrics" in obj:
+            del obj["mof_metrics"]
+        if mode == 'EDIT':
             bpy.ops.object.mode_set(mode='EDIT')
-            bpy.ops.uv.select_all(action='SELECT')
-            
-            # Run 'Seams from Islands'
-            bpy.ops.uv.seams_from_islands()
-            
-            if self.auto_reunwrap:
-                # Run 'Unwrap' (Angle Based)
-                bpy.ops.uv.unwrap('INVOKE_DEFAULT', method='ANGLE_BASED', margin=0.001)
-                
-                # Pack Islands
-                bpy.ops.uv.pack_islands(margin=0.001)
-    
-            self.report({'INFO'}, "MoF integration completed")
-    
-        finally:
-            # Cleanup OBJ files and imported object
-            if os.path.exists(input_obj_path):
-                os.remove(input_obj_path)
-            if os.path.exists(output_obj_path):
-                os.remove(output_obj_path)
-            if data_trans:
-                obj.modifiers.remove(data_trans)
-            if imported_obj:
-                bpy.data.objects.remove(imported_obj, do_unlink=True)
-    
-            # Restore the original mode
-            with context.temp_override(active_object=obj):
-                bpy.ops.uv.select(deselect=True)
-                bpy.ops.object.mode_set(mode=original_mode)
-                
-    
-            return {'FINISHED'} # Ensure FINISHED is returned even on error for cleanup
+        snapshots.store.current[obj.name] = snapshot.number
+        return {'FINISHED'}
+
+class UV_OT_MoFClearSnapshots(bpy.types.Operator):
+    bl_idname = "uv.mof_clear_snapshots"
+    bl_label = "Clear Snapshots"
+    bl_description = "Forget the UVs of earlier runs on the active object"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        if context.active_object is not None:
+            snapshots.store.clear(context.active_object.name)
+        return {'FINISHED'}
 
 # UI button in the UV editor menu
 def menu_func(self, context):
@@ -621,18 +1442,86 @@ class MOF_PT_Panel(bpy.types.Panel):
         layout = self.layout
         layout.operator(UV_OT_MoFUnwrap.bl_idname, text = "Unwrap")
 
+        obj = context.active_object
+        if obj is None:
+            return
+
+        # UV quality of the object's last MoF layout, kept in the .blend with it
+        scores = obj.get("mof_metrics")
+        if scores is not None:
+            box = layout.box()
+            box.label(text="UV Quality")
+            col = box.column(align=True)
+            for label, text in (
+                ("Coverage", f"{scores['coverage']:.1%}"),
+                ("Islands", str(scores.get('islands', '-'))),
+                ("Area Distortion", f"{scores['area_distortion']:.3f}"),
+                ("Angle Distortion", f"{scores['angle_distortion']:.2f}°"),
+                ("Texel Density", f"{scores['density']:.0f} px/unit"),
+                ("Density Spread", f"{scores['density_spread']:.3f}"),
+            ):
+                row = col.row()
+                row.label(text=label)
+                row.label(text=text)
+
+        # Earlier layouts of the object, restored without running MoF again
+        history = snapshots.store.of_object(obj.name)
+        if history:
+            box = layout.box()
+            row = box.row()
+            row.label(text="Snapshots")
+            row.operator(UV_OT_MoFClearSnapshots.bl_idname, text="", icon='TRASH', emboss=False)
+            col = box.column(align=True)
+            for snapshot in reversed(history):
+                op = col.operator(UV_OT_MoFRestoreSnapshot.bl_idname, text=snapshot.label, depress=snapshots.store.current.get(obj.name) == snapshot.number)
+                op.number = snapshot.number
+
+        # Stage breakdown of the last run on the active object
+        run = telemetry.last_runs.get(obj.name)
+        if run is None:
+            return
+        box = layout.box()
+        box.label(text=f"Last run: {run['total']:.2f} s, {run['polygons']} polygons" + (" (cached)" if run['cached'] else ""))
+        col = box.column(align=True)
+        for stage in telemetry.STAGES:
+            if stage in run['stages']:
+                row = col.row()
+                row.label(text=stage.capitalize())
+                row.label(text=f"{run['stages'][stage]:.3f} s")
+        if not run['cached']:
+            row = col.row()
+            row.label(text="MoF Peak Memory")
+            row.label(text=f"{run['peak_memory'] / 1024 / 1024:.0f} MB")
+            row = col.row()
+            row.label(text="MoF CPU Time")
+            row.label(text=f"{run['cpu_time']:.2f} s")
+            row = col.row()
+            row.label(text="MoF Exit Code")
+            row.label(text=str(run['exit_code']))
+        if run['error']:
+            box.label(text=run['error'], icon='ERROR')
+
 # Register the classes and UI elements
 def register():
     bpy.utils.register_class(MOF_AddonPreferences)
     bpy.utils.register_class(UV_OT_MoFUnwrap)
+    bpy.utils.register_class(UV_OT_MoFClearCache)
+    bpy.utils.register_class(UV_OT_MoFRestoreSnapshot)
+    bpy.utils.register_class(UV_OT_MoFClearSnapshots)
     bpy.utils.register_class(MOF_PT_Panel)
     bpy.types.IMAGE_MT_uvs.append(menu_func)
+    speculative.register()
 
 def unregister():
+    speculative.unregister()
     bpy.types.IMAGE_MT_uvs.remove(menu_func)
     bpy.utils.unregister_class(MOF_PT_Panel)
+    bpy.utils.unregister_class(UV_OT_MoFClearSnapshots)
+    bpy.utils.unregister_class(UV_OT_MoFRestoreSnapshot)
+    bpy.utils.unregister_class(UV_OT_MoFClearCache)
     bpy.utils.unregister_class(UV_OT_MoFUnwrap)
     bpy.utils.unregister_class(MOF_AddonPreferences)
+    tempio.session.cleanup()
 
 if __name__ == "__main__":
     register()
@@ -0,0 +1,71 @@
+# Stand-in for UnWrapConsole3.exe, so the add-on can be benchmarked where MoF doesn't run.
+#
+#   fake_mof.py INPUT.obj OUTPUT.obj [MoF options...]
+#
+# Echoes the input mesh back with a deterministic UV layout after an optional delay:
+#   MOF_FAKE_LATENCY  seconds to sleep before writing the output (default 0)
+#   MOF_FAKE_LAYOUT   'planar' projects the mesh onto its two largest axes (one island),
+#                     'faces' gives every face its own island on a grid (default 'planar')
+#   MOF_FAKE_TRIANGULATE  '1' splits every face into a fan of triangles and writes them in reverse order,
+#                     like MoF does with some inputs
+
+import math
+import os
+import sys
+import time
+
+def main(argv: list[str]) -> int:
+    if len(argv) < 2:
+        print("usage: fake_mof.py INPUT.obj OUTPUT.obj [options...]")
+        return 2
+    input_path, output_path = argv[0], argv[1]
+    latency = float(os.environ.get("MOF_FAKE_LATENCY", "0"))
+    layout = os.environ.get("MOF_FAKE_LAYOUT", "planar")
+
+    positions = []
+    faces = []
+    with open(input_path) as file:
+        for line in file:
+            if line.startswith('v '):
+                positions.append(tuple(map(float, line.split()[1:4])))
+            elif line.startswith('f '):
+                faces.append([int(corner.split('/')[0]) for corner in line.split()[1:]])
+    print(f"Loaded {len(positions)} vertices, {len(faces)} faces")
+    if os.environ.get("MOF_FAKE_TRIANGULATE", "0") == "1":
+        faces = [[face[0], face[corner], face[corner + 1]] for face in reversed(faces) for corner in range(1, len(face) - 1)]
+
+    time.sleep(latency)
+
+    lines = [f"v {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in positions]
+    if layout == 'faces':
+        # One island per face, each corner on a regular polygon inside its grid cell
+        side = max(1, math.ceil(math.sqrt(len(faces))))
+        face_lines = []
+        uv_index = 1
+        for index, face in enumerate(faces):
+            cell_u, cell_v = (index % side + 0.5) / side, (index // side + 0.5) / side
+            corners = []
+            for corner, vertex in enumerate(face):
+                angle = 2.0 * math.pi * corner / len(face)
+                lines.append(f"vt {cell_u + 0.4 / side * math.cos(angle):.6f} {cell_v + 0.4 / side * math.sin(angle):.6f}\n")
+                corners.append(f"{vertex}/{uv_index}")
+                uv_index += 1
+            face_lines.append("f " + " ".join(corners) + "\n")
+    else:
+        # One UV per vertex, projected along the axis the mesh is thinnest in
+        extents = [max(axis) - min(axis) if positions else 0.0 for axis in zip(*positions)] or [0.0, 0.0, 0.0]
+        u_axis, v_axis = sorted(range(3), key=lambda axis: -extents[axis])[:2]
+        low_u = min((p[u_axis] for p in positions), default=0.0)
+        low_v = min((p[v_axis] for p in positions), default=0.0)
+        scale = 1.0 / max(extents[u_axis], extents[v_axis], 1e-12)
+        lines += [f"vt {(p[u_axis] - low_u) * scale:.6f} {(p[v_axis] - low_v) * scale:.6f}\n" for p in positions]
+        face_lines = ["f " + " ".join(f"{vertex}/{vertex}" for vertex in face) + "\n" for face in faces]
+
+    with open(output_path, 'w') as file:
+        file.writelines(lines)
+        file.writelines(face_lines)
+    print(f"Wrote {output_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
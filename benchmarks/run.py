@@ -0,0 +1,224 @@
+# Benchmark UV_OT_MoFUnwrap.execute stage by stage on synthetic meshes, with fake_mof.py standing in for MoF:
+#
+#   blender -b --factory-startup -P benchmarks/run.py -- [--sizes 10000,100000,1000000] [--output results.json]
+#
+# Pass --baseline with an earlier results file to fail when a stage got slower than --tolerance allows.
+
+import bpy
+import addon_utils
+import argparse
+import json
+import os
+import resource
+import stat
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+ADDON_NAME = "mof_integration"
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def enable_addon(scratch: str):
+    # Expose the repository under a stable module name so the add-on's preferences resolve
+    addons = os.path.join(scratch, "addons")
+    os.makedirs(addons, exist_ok=True)
+    os.symlink(REPOSITORY, os.path.join(addons, ADDON_NAME))
+    sys.path.insert(0, addons)
+    addon_utils.enable(ADDON_NAME, default_set=True)
+
+def install_fake_mof(scratch: str) -> str:
+    # The operator insists on the executable's name, the shebang makes it runnable anyway
+    path = os.path.join(scratch, "UnWrapConsole3.exe")
+    with open(path, 'w') as file:
+        file.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(REPOSITORY, "benchmarks", "fake_mof.py")}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+def build_mesh(name: str, positions: np.ndarray, loops: np.ndarray, loop_totals: np.ndarray) -> bpy.types.Object:
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(positions))
+    mesh.vertices.foreach_set("co", positions.astype(np.float32).ravel())
+    mesh.loops.add(len(loops))
+    mesh.loops.foreach_set("vertex_index", loops.astype(np.int32))
+    mesh.polygons.add(len(loop_totals))
+    mesh.polygons.foreach_set("loop_start", (np.cumsum(loop_totals) - loop_totals).astype(np.int32))
+    mesh.update(calc_edges=True)
+    mesh.validate()
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+def grid_quads(columns: int, rows: int) -> np.ndarray:
+    # Quads of a (columns + 1) x (rows + 1) vertex lattice, counter-clockwise
+    x, y = np.meshgrid(np.arange(columns), np.arange(rows))
+    first = (y * (columns + 1) + x).ravel()
+    return np.stack([first, first + 1, first + columns + 2, first + columns + 1], axis=1)
+
+def make_grid(faces: int) -> bpy.types.Object:
+    side = max(1, int(round(np.sqrt(faces))))
+    u, v = np.meshgrid(np.linspace(-1, 1, side + 1), np.linspace(-1, 1, side + 1))
+    positions = np.stack([u.ravel(), v.ravel(), np.zeros(u.size)], axis=1)
+    quads = grid_quads(side, side)
+    return build_mesh(f"grid_{len(quads)}", positions, quads.ravel(), np.full(len(quads), 4))
+
+def make_tube(faces: int) -> bpy.types.Object:
+    segments = max(3, int(round(np.sqrt(faces / 4))))
+    rings = max(1, faces // segments)
+    angle, height = np.meshgrid(np.linspace(0, 2 * np.pi, segments, endpoint=False), np.linspace(0, 4, rings + 1))
+    positions = np.stack([np.cos(angle).ravel(), np.sin(angle).ravel(), height.ravel()], axis=1)
+    # Close every ring by wrapping the last column back onto the first
+    x, y = np.meshgrid(np.arange(segments), np.arange(rings))
+    first, following = (y * segments + x).ravel(), (y * segments + (x + 1) % segments).ravel()
+    quads = np.stack([first, following, following + segments, first + segments], axis=1)
+    return build_mesh(f"tube_{len(quads)}", positions, quads.ravel(), np.full(len(quads), 4))
+
+def make_scan(faces: int, seed: int = 0) -> bpy.types.Object:
+    # Scanned-style soup: a noisy height field, triangles split along random diagonals and stored in random order
+    rng = np.random.default_rng(seed)
+    side = max(1, int(round(np.sqrt(faces / 2))))
+    u, v = np.meshgrid(np.linspace(-1, 1, side + 1), np.linspace(-1, 1, side + 1))
+    height = 0.2 * np.sin(3 * u) * np.cos(2 * v) + rng.normal(0.0, 0.002, u.shape)
+    positions = np.stack([u.ravel(), v.ravel(), height.ravel()], axis=1)
+    quads = grid_quads(side, side)
+    flip = rng.random(len(quads)) < 0.5
+    rotated = np.where(flip[:, None], np.roll(quads, 1, axis=1), quads)
+    triangles = np.concatenate([rotated[:, [0, 1, 2]], rotated[:, [0, 2, 3]]])
+    triangles = triangles[rng.permutation(len(triangles))]
+    return build_mesh(f"scan_{len(triangles)}", positions, triangles.ravel(), np.full(len(triangles), 3))
+
+GENERATORS = {"grid": make_grid, "tube": make_tube, "scan": make_scan}
+
+def unwrap(obj: bpy.types.Object, layout_mode: str) -> tuple[set[str], float, dict]:
+    for other in bpy.context.view_layer.objects:
+        other.select_set(False)
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+
+    start = time.perf_counter()
+    result = bpy.ops.uv.mof_unwrap(run_in_background=False, layout_mode=layout_mode)
+    seconds = time.perf_counter() - start
+    return result, seconds, sys.modules[ADDON_NAME].telemetry.last_runs.get(obj.name, {})
+
+def run_case(obj: bpy.types.Object, layout_mode: str, trace_memory: bool) -> dict:
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result, seconds, run = unwrap(obj, layout_mode)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    memory = {}
+    if trace_memory:
+        # Tracing slows allocations down, so measure memory in a second run that isn't timed
+        tracemalloc.start()
+        try:
+            memory = unwrap(obj, layout_mode)[2].get("memory", {})
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "mesh": obj.name,
+        "polygons": len(obj.data.polygons),
+        "loops": len(obj.data.loops),
+        "result": sorted(result),
+        "error": run.get("error", ""),
+        "seconds": seconds,
+        "stages": run.get("stages", {}),
+        "memory": memory,
+        "blender_rss_growth": max(0, rss_after - rss_before) * 1024,
+        "mof_peak_memory": run.get("peak_memory", 0),
+        "input_size": run.get("input_size", 0),
+        "output_size": run.get("output_size", 0),
+    }
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float, minimum: float) -> list[str]:
+    """
+    Lists every stage that got slower than the baseline by more than `tolerance`, ignoring stages under `minimum` seconds.
+    """
+    previous = {case["mesh"]: case for case in baseline}
+    regressions = []
+    for case in results:
+        old = previous.get(case["mesh"])
+        if old is None:
+            continue
+        for stage, seconds in case["stages"].items():
+            old_seconds = old["stages"].get(stage)
+            if old_seconds is None or max(seconds, old_seconds) < minimum:
+                continue
+            if seconds > old_seconds * (1.0 + tolerance):
+                regressions.append(f"{case['mesh']} {stage}: {old_seconds:.3f} s -> {seconds:.3f} s")
+    return regressions
+
+def print_table(results: list[dict]):
+    stages = sys.modules[ADDON_NAME].telemetry.STAGES
+    print(f"{'seconds':<16}{'polys':>10}" + "".join(f"{stage:>10}" for stage in stages) + f"{'total':>10}{'mof peak':>10}")
+    for case in results:
+        cells = "".join(f"{case['stages'].get(stage, 0.0):>10.3f}" for stage in stages)
+        print(f"{case['mesh']:<16}{case['polygons']:>10}{cells}{case['seconds']:>10.3f}{case['mof_peak_memory'] / 2**20:>9.0f}M")
+    if any(case["memory"] for case in results):
+        print(f"{'peak MB':<16}{'polys':>10}" + "".join(f"{stage:>10}" for stage in stages))
+        for case in results:
+            cells = "".join(f"{case['memory'].get(stage, 0) / 2**20:>10.1f}" for stage in stages)
+            print(f"{case['mesh']:<16}{case['polygons']:>10}{cells}")
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="blender -b -P benchmarks/run.py --")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated target face counts")
+    parser.add_argument("--meshes", default=",".join(GENERATORS), help="Comma separated mesh kinds: " + ", ".join(GENERATORS))
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake MoF sleeps per run")
+    parser.add_argument("--fake-layout", choices=("planar", "faces"), default="planar", help="UV layout the fake MoF writes")
+    parser.add_argument("--fake-triangulate", action="store_true", help="Have the fake MoF return every mesh triangulated and reordered, to check the output is still mapped back")
+    parser.add_argument("--layout-mode", default='MOF', help="The operator's 'After MoF' mode")
+    parser.add_argument("--no-memory", dest="trace_memory", action="store_false", help="Skip the second, memory traced run of every case")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown per stage, as a fraction")
+    parser.add_argument("--minimum", type=float, default=0.05, help="Stages faster than this many seconds are not compared")
+    return parser.parse_args(argv)
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    os.environ["MOF_FAKE_LATENCY"] = str(args.latency)
+    os.environ["MOF_FAKE_LAYOUT"] = args.fake_layout
+    os.environ["MOF_FAKE_TRIANGULATE"] = "1" if args.fake_triangulate else "0"
+
+    with tempfile.TemporaryDirectory(prefix="mof_bench_") as scratch:
+        enable_addon(scratch)
+        preferences = bpy.context.preferences.addons[ADDON_NAME].preferences
+        preferences.mof_executable = install_fake_mof(scratch)
+        # Every case has to reach MoF, and benchmark runs should not end up in the artists' log
+        preferences.use_cache = False
+        preferences.use_telemetry = False
+
+        results = []
+        for size in (int(size) for size in args.sizes.split(",")):
+            for kind in args.meshes.split(","):
+                obj = GENERATORS[kind](size)
+                case = run_case(obj, args.layout_mode, args.trace_memory)
+                results.append(case)
+                print(f"MoF bench: {case['mesh']} {case['seconds']:.3f} s {case['error']}")
+                mesh = obj.data
+                bpy.data.objects.remove(obj)
+                bpy.data.meshes.remove(mesh)
+
+        addon_utils.disable(ADDON_NAME, default_set=True)
+
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"blender": bpy.app.version_string, "results": results}, file, indent=2)
+
+    failed = [case["mesh"] for case in results if case["error"] or case["result"] != ["FINISHED"]]
+    if failed:
+        print(f"MoF bench: failed on {', '.join(failed)}")
+        return 1
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.tolerance, args.minimum)
+        for regression in regressions:
+            print(f"MoF bench: regression {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(main(argv))
@@ -0,0 +1,73 @@
+# On-disk cache of MoF results
+
+import bpy
+import os
+import tempfile
+import pathlib
+import hashlib
+import numpy as np
+
+from .core import MeshBuffers
+
+# One .npy file of per-loop UVs per geometry and option set
+class UVCache:
+    def __init__(self, directory: str, max_size: int):
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+
+    @classmethod
+    def from_preferences(cls, preferences) -> "UVCache":
+        directory = bpy.path.abspath(preferences.cache_directory) if preferences.cache_directory else os.path.join(tempfile.gettempdir(), "mof_integration_cache")
+        return cls(directory, preferences.cache_size * 1024 * 1024)
+
+    def get(self, key: str, loop_count: int) -> np.ndarray | None:
+        path = self.directory / f"{key}.npy"
+        try:
+            uvs = np.load(path)
+        except (OSError, ValueError):
+            return None
+        if uvs.shape != (loop_count, 2):
+            return None
+        # Touch the file so eviction sees it as recently used
+        os.utime(path)
+        return uvs
+
+    def put(self, key: str, uvs: np.ndarray):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{key}.npy"
+        temp_path = self.directory / f"{key}.npy.tmp"
+        with open(temp_path, 'wb') as file:
+            np.save(file, uvs.astype(np.float32).reshape(-1, 2))
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.directory.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for path in self.directory.glob("*.npy*"):
+            path.unlink(missing_ok=True)
+
+def geometry_cache_key(buffers: MeshBuffers, options: list[str], loop_count: int) -> str:
+    """
+    Hashes the exported vertex/face buffers together with the MoF command line options.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for buffer in (buffers.positions, buffers.loops, buffers.loop_totals):
+        digest.update(buffer.tobytes())
+    # The UVs are stored per loop of the original mesh
+    digest.update(str(loop_count).encode())
+    digest.update(" ".join(options).encode())
+    return digest.hexdigest()
@@ -0,0 +1,317 @@
+# Batch unwrap every mesh in a directory of .blend files, without the UI:
+#
+#   blender -b -P cli.py -- --input /path/to/blends --mof /path/to/UnWrapConsole3.exe
+#
+# The meshes of the next files are exported while MoF works on earlier ones, so every worker stays busy.
+# Results are saved next to the originals (or under --output) and a JSON summary with per-asset
+# timings is written after every file, so an interrupted run picks up where it stopped.
+
+import bpy
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import types
+
+def load_addon(name: str = "mof_integration") -> types.ModuleType:
+    """
+    Imports the add-on package this script lives in, whatever its folder is called.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    directory = os.path.dirname(os.path.abspath(__file__))
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, "__init__.py"), submodule_search_locations=[directory])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+# Operator options the batch run has no equivalent for: they act on the selection or the UI, or only the
+# operator implements them
+UNSUPPORTED_OPTIONS = {
+    "selected_objects", "selection_only", "context_rings", "run_in_background", "expand_optinos",
+    "symmetry", "symmetry_tolerance", "mirror_layout",
+    "split_chunks", "chunk_size",
+    "udim_tiles", "tile_resolutions",
+    "sweep", "sweep_method", "sweep_samples",
+    "reuse_seams", "measure_layout",
+}
+
+def default_settings(operator_class) -> types.SimpleNamespace:
+    """
+    Returns the defaults of every property declared on `operator_class`.
+    """
+    settings = {}
+    for name, prop in operator_class.__annotations__.items():
+        keywords = getattr(prop, "keywords", {})
+        if "default" in keywords:
+            settings[name] = keywords["default"]
+        elif "items" in keywords:
+            settings[name] = keywords["items"][0][0]
+    return types.SimpleNamespace(**settings)
+
+def parse_value(text: str, default):
+    if isinstance(default, bool):
+        return text.lower() in {"1", "true", "yes", "on"}
+    if isinstance(default, (tuple, list)):
+        return tuple(float(value) for value in text.split(","))
+    return type(default)(text)
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="blender -b -P cli.py --", description="Unwrap every mesh in a directory of .blend files with Ministry of Flat.")
+    parser.add_argument("--input", required=True, help="Directory searched recursively for .blend files")
+    parser.add_argument("--output", help="Directory to save the unwrapped files to, mirroring --input. Files are overwritten in place when omitted")
+    parser.add_argument("--mof", required=True, help="Path of UnWrapConsole3.exe")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Maximum number of MoF processes running at the same time")
+    parser.add_argument("--timeout", type=float, default=0.0, help="Kill a MoF process after this many seconds, 0 for no limit")
+    parser.add_argument("--memory-limit", type=int, default=0, help="Kill a MoF process using more than this many MB, 0 for no limit")
+    parser.add_argument("--nice", type=int, default=0, choices=range(20), metavar="0-19", help="Priority of the MoF processes, 19 being the lowest")
+    parser.add_argument("--cpus", default="", help="Only run MoF on these CPUs, e.g. 0-3,6")
+    parser.add_argument("--scratch", default="", help="Directory for the OBJ files exchanged with MoF. Defaults to /dev/shm when it has room, the temp directory otherwise")
+    parser.add_argument("--stream", action="store_true", help="Pipe meshes to MoF through named pipes instead of files, for MoF builds that read their input sequentially")
+    parser.add_argument("--summary", help="JSON summary file, also used to resume. Defaults to mof_summary.json in the output directory")
+    parser.add_argument("--set", action="append", default=[], metavar="OPTION=VALUE", help="Override an operator option, e.g. --set relax_iterations=100")
+    parser.add_argument("--restart", action="store_true", help="Ignore the existing summary and unwrap every file again")
+    return parser.parse_args(argv)
+
+def write_summary(path: str, summary: dict):
+    # Write to a temp file first so a crash never leaves a truncated summary behind
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(summary, file, indent=2)
+    os.replace(temp_path, path)
+
+# A .blend file whose meshes were exported and handed to the pool, waiting for its MoF jobs
+class PendingFile:
+    def __init__(self, asset: str, blend_path: str, output_path: str):
+        self.asset = asset
+        self.blend_path = blend_path
+        self.output_path = output_path
+        self.record = {"status": "failed", "meshes": {}}
+        self.start = 0.0
+        self.buffers = {}
+        self.instances = {}
+        self.lods = {}
+        self.jobs = []
+        self.finished = []
+
+    @property
+    def done(self) -> bool:
+        return len(self.finished) == len(self.jobs)
+
+def open_file(blend_path: str):
+    bpy.ops.wm.open_mainfile(filepath=blend_path)
+    if bpy.context.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+def export_file(addon, pending: PendingFile, pool, settings, arguments: list[str], mof_exec: str):
+    """
+    Opens the file of `pending` and submits a MoF job for each of its meshes to `pool`, without waiting for them.
+    """
+    core = addon.core
+    pending.start = time.perf_counter()
+    open_file(pending.blend_path)
+    context = bpy.context
+
+    # UVs live on the mesh, so unwrap each local mesh datablock, or set of identical meshes, once through its first user
+    objects = [obj for obj in context.view_layer.objects if obj.type == 'MESH' and obj.data.library is None and len(obj.data.polygons)]
+    # Lower LODs get the UVs of the most detailed one
+    if settings.lod_chain:
+        objects, pending.lods = addon.lod.lod_chains(objects, objects)
+    groups = core.group_instances(objects, not (settings.apply_modifiers and any(core.modified(obj) for obj in objects)), settings.scale_uv_space_to_worldspace)
+    pending.instances = {group[0].name: [obj.name for obj in group[1:]] for group in groups}
+
+    for group in groups:
+        obj = group[0]
+        export_start = time.perf_counter()
+        apply_modifiers = settings.apply_modifiers and core.modified(obj)
+        mesh_buffers = core.MeshBuffers.from_object(context, obj, apply_modifiers, settings.use_normal)
+        # UVs of a modified mesh are projected back onto the original one
+        pending.buffers[obj.name] = (mesh_buffers, core.MeshBuffers.from_object(context, obj) if apply_modifiers else None)
+        mesh_arguments, skipped = arguments, []
+        if settings.preflight:
+            mesh_arguments, _, skipped = addon.preflight.arguments(settings, mesh_buffers)
+        job = core.create_job(obj.name, mesh_buffers, mof_exec, mesh_arguments)
+        pending.jobs.append(job)
+        pool.submit(job)
+        pending.record["meshes"][obj.name] = {"polygons": len(obj.data.polygons), "export": time.perf_counter() - export_start, "skipped": skipped}
+
+def apply_file(addon, pending: PendingFile, settings) -> dict:
+    """
+    Applies the finished MoF jobs of `pending` to its file, reopening it when another file was opened since, and saves it.
+    """
+    core = addon.core
+    if bpy.data.filepath != pending.blend_path:
+        open_file(pending.blend_path)
+    context = bpy.context
+    record = pending.record
+
+    for job in pending.finished:
+        mesh_record = record["meshes"][job.name]
+        mesh_record["mof"] = job.seconds
+        mesh_record["mof_cpu_time"] = job.cpu_time
+        mesh_record["mof_peak_memory"] = job.peak_memory
+        mesh_record["estimated_saving"] = addon.preflight.estimated_saving(mesh_record["skipped"], job.seconds) if mesh_record["skipped"] else 0.0
+        try:
+            if job.error:
+                raise RuntimeError(job.error)
+            apply_start = time.perf_counter()
+            obj = bpy.data.objects[job.name]
+            exported, target = pending.buffers.pop(job.name)
+            uvs = core.map_uvs_to_loops(core.MofResult.read(job.output_path), exported)
+            if target is not None:
+                uvs = addon.lod.transfer_buffer_uvs(exported, uvs, target)
+            else:
+                target = exported
+            mesh_record["islands"] = core.apply_uvs(obj.data, uvs)
+            core.relayout(context, obj, settings.layout_mode)
+            mesh_record["metrics"] = addon.metrics.layout_metrics(target, core.read_loop_uvs(obj.data), settings.texture_resolution, settings.texture_density, mesh_record["islands"])
+            obj["mof_metrics"] = mesh_record["metrics"]
+            written = {obj.data.as_pointer()}
+            for name in pending.instances[job.name]:
+                instance = bpy.data.objects[name]
+                if instance.data.as_pointer() not in written:
+                    core.copy_uvs(obj.data, instance.data)
+                    written.add(instance.data.as_pointer())
+            mesh_record["instances"] = pending.instances[job.name]
+            for name in pending.lods.get(job.name, ()):
+                lod_mesh = bpy.data.objects[name].data
+                if lod_mesh.as_pointer() not in written:
+                    addon.lod.transfer_uvs(obj.data, lod_mesh)
+                    written.add(lod_mesh.as_pointer())
+            mesh_record["lods"] = pending.lods.get(job.name, [])
+            mesh_record["apply"] = time.perf_counter() - apply_start
+            mesh_record["status"] = "done"
+        except Exception as e:
+            mesh_record["status"] = "failed"
+            mesh_record["error"] = str(e)
+
+    os.makedirs(os.path.dirname(pending.output_path), exist_ok=True)
+    bpy.ops.wm.save_as_mainfile(filepath=pending.output_path)
+
+    failed = [name for name, mesh in record["meshes"].items() if mesh.get("status") != "done"]
+    record["status"] = "failed" if failed else "done"
+    # Wall time from opening the file to saving it, overlapping with the files exported around it
+    record["seconds"] = time.perf_counter() - pending.start
+    return record
+
+def discard(pool, pending: PendingFile):
+    # Stops the jobs of a failed file that are still in the pool and removes their files
+    for job in pending.jobs:
+        if pool.remove(job):
+            job.kill()
+        job.cleanup()
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    addon = load_addon()
+    core = addon.core
+
+    error = core.executable_error(args.mof)
+    if error:
+        print(f"MoF: {error}", file=sys.stderr)
+        return 1
+
+    settings = default_settings(addon.UV_OT_MoFUnwrap)
+    for override in args.set:
+        name, _, value = override.partition("=")
+        if name in UNSUPPORTED_OPTIONS:
+            print(f"MoF: option '{name}' is not supported by the batch CLI", file=sys.stderr)
+            return 1
+        if not hasattr(settings, name):
+            print(f"MoF: unknown option '{name}'", file=sys.stderr)
+            return 1
+        items = getattr(addon.UV_OT_MoFUnwrap.__annotations__[name], "keywords", {}).get("items")
+        try:
+            parsed = parse_value(value, getattr(settings, name))
+        except ValueError:
+            parsed = None
+        if parsed is None or (items and parsed not in {item[0] for item in items}):
+            print(f"MoF: invalid value '{value}' for option '{name}'", file=sys.stderr)
+            return 1
+        setattr(settings, name, parsed)
+    arguments = core.command_line_arguments(core.assemble_options_command_line(settings))
+
+    input_dir = os.path.abspath(args.input)
+    output_dir = os.path.abspath(args.output or args.input)
+    summary_path = args.summary or os.path.join(output_dir, "mof_summary.json")
+    summary = {"options": arguments, "assets": {}}
+    if os.path.exists(summary_path) and not args.restart:
+        with open(summary_path) as file:
+            summary["assets"] = json.load(file).get("assets", {})
+
+    blend_paths = []
+    for root, _, files in os.walk(input_dir):
+        blend_paths += [os.path.join(root, name) for name in files if name.endswith(".blend")]
+
+    try:
+        limits = core.ResourceLimits(args.timeout, args.memory_limit * 2**20, args.nice, core.parse_cpu_list(args.cpus))
+    except ValueError as e:
+        print(f"MoF: {e}", file=sys.stderr)
+        return 1
+    addon.tempio.configure(os.path.abspath(args.scratch) if args.scratch else "", args.stream)
+    pool = core.MofJobPool(args.workers, limits)
+    queue = []
+    for blend_path in sorted(blend_paths):
+        asset = os.path.relpath(blend_path, input_dir)
+        if summary["assets"].get(asset, {}).get("status") == "done":
+            print(f"MoF: skipping {asset}, already done")
+            continue
+        queue.append(PendingFile(asset, blend_path, os.path.join(output_dir, asset)))
+
+    def finish(pending: PendingFile, record: dict):
+        in_flight.remove(pending)
+        summary["assets"][pending.asset] = record
+        write_summary(summary_path, summary)
+
+    # Files are exported ahead while the pool has fewer queued jobs than workers, so the jobs of many small
+    # files run side by side. Each file is reopened to apply its results once all of its jobs are done.
+    in_flight: list[PendingFile] = []
+    owners = {}
+    try:
+        while queue or in_flight:
+            if queue and len(pool.pending) < pool.max_processes:
+                pending = queue.pop(0)
+                in_flight.append(pending)
+                # Mark the asset before touching it, a crash leaves it 'started' and it is retried next time
+                summary["assets"][pending.asset] = {"status": "started"}
+                write_summary(summary_path, summary)
+                print(f"MoF: unwrapping {pending.asset}")
+                try:
+                    export_file(addon, pending, pool, settings, arguments, args.mof)
+                except Exception as e:
+                    discard(pool, pending)
+                    finish(pending, {"status": "failed", "error": str(e)})
+                    continue
+                owners.update((job, pending) for job in pending.jobs)
+            else:
+                finished = pool.update()
+                for job in finished:
+                    owners.pop(job).finished.append(job)
+                if not finished and pool.busy:
+                    time.sleep(0.05)
+
+            # Files are applied in the order they were exported, keeping the summary in input order
+            while in_flight and in_flight[0].done:
+                pending = in_flight[0]
+                try:
+                    record = apply_file(addon, pending, settings)
+                except Exception as e:
+                    record = {"status": "failed", "error": str(e)}
+                finally:
+                    for job in pending.jobs:
+                        job.cleanup()
+                finish(pending, record)
+    finally:
+        for job in pool.cancel():
+            job.cleanup()
+
+    failed = [asset for asset, record in summary["assets"].items() if record["status"] != "done"]
+    print(f"MoF: {len(summary['assets']) - len(failed)}/{len(summary['assets'])} assets unwrapped, summary in {summary_path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(main(argv))
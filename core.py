@@ -0,0 +1,1186 @@
+# Headless core of the add-on: MoF option assembly, mesh to OBJ, running MoF and applying its UVs.
+# Nothing in here depends on the UI, so it can be driven from `blender -b` as well as from the operator.
+
+import bpy
+import subprocess
+import os
+import shutil
+import sys
+import collections
+import contextlib
+import hashlib
+import time
+import threading
+import numpy as np
+
+from mathutils import Vector
+
+from . import tempio
+
+def assemble_options_command_line(settings) -> list[str]:
+    """
+    Builds MoF's command line options from `settings`, any object carrying the operator's option attributes.
+    """
+    options = []
+    def get_bool(opt: bool) -> str:
+        return "TRUE" if opt else "FALSE"
+    def get_int(opt: int) -> str:
+        return str(opt)
+    def get_float(opt: float) -> str:
+        return str(opt)
+    def get_vec3(opt: tuple[float, float, float]|Vector) -> str:
+        return " ".join(map(str, opt))
+
+    options.append(f"-RESOLUTION {get_int(settings.texture_resolution)}")
+    options.append(f"-SEPARATE {get_bool(settings.separate_hard_edge)}")
+    options.append(f"-ASPECT {get_float(settings.aspect_ratio)}")
+    options.append(f"-NORMALS {get_bool(settings.use_normal)}")
+    options.append(f"-OVERLAP {get_bool(settings.overlap_identical_parts)}")
+    options.append(f"-MIRROR {get_bool(settings.overlap_mirrored_parts)}")
+    options.append(f"-WORLDSCALE {get_bool(settings.scale_uv_space_to_worldspace)}")
+    options.append(f"-DENSITY {get_int(settings.texture_density)}")
+    options.append(f"-CENTER {get_vec3(settings.seam_direction)}")
+
+    options.append(f'-CONE {get_bool(settings.cones)}')
+    options.append(f'-GRIDS {get_bool(settings.grids)}')
+    options.append(f'-STRIP {get_bool(settings.strips)}')
+    options.append(f'-PATCH {get_bool(settings.patches)}')
+    options.append(f'-PLANES {get_bool(settings.planes)}')
+    options.append(f'-TUBES {get_bool(settings.tubes)}')
+    options.append(f'-JUNCTIONSDEBUG {get_bool(settings.junctions)}')
+    options.append(f'-SQUARE {get_bool(settings.squares)}')
+
+    options.append(f'-CONERATIO {get_float(settings.cone_ratio)}')
+    options.append(f'-FLATT {get_float(settings.flatness)}')
+
+
+    options.append(f'-MERGE {get_bool(settings.merge)}')
+    options.append(f'-MERGELIMIT {get_float(settings.merge_limit)}')
+    options.append(f'-PRESMOOTH {get_bool(settings.pre_smooth)}')
+    options.append(f'-SOFTUNFOLD {get_bool(settings.soft_unfold)}')
+    options.append(f'-EXTRADEBUG {get_bool(settings.extra_ordinary_point)}')
+    options.append(f'-ABF {get_bool(settings.angle_based_flatening)}')
+    options.append(f'-SMOOTH {get_bool(settings.smooth)}')
+    options.append(f'-REPAIR {get_bool(settings.repair)}')
+    options.append(f'-REPAIRSMOOTH {get_bool(settings.repair_smooth)}')
+    options.append(f'-RELAX {get_bool(settings.relax)}')
+    options.append(f'-RELAX_ITERATIONS {get_int(settings.relax_iterations)}')
+    options.append(f'-EXPAND {get_float(settings.expand)}')
+    options.append(f'-CUTDEBUG {get_bool(settings.cut)}')
+    options.append(f'-STRETCH {get_bool(settings.stretch)}')
+    options.append(f'-MATCH {get_bool(settings.match)}')
+    options.append(f'-PACKING {get_bool(settings.packing)}')
+    options.append(f'-RASTERIZATION {get_int(settings.rasterization)}')
+    options.append(f'-PACKING_ITERATIONS {get_int(settings.packing_iterations)}')
+    options.append(f'-SCALETOFIT {get_float(settings.scale_to_fit)}')
+    options.append(f'-VALIDATE {get_bool(settings.validate)}')
+
+    return options
+
+def command_line_arguments(options: list[str]) -> list[str]:
+    # Split "-NAME VALUE" options into separate arguments
+    return [item for option in options for item in option.split(' ')]
+
+def executable_error(mof_exec: str) -> str:
+    if not mof_exec:
+        return "MoF executable path not set or not correct in preferences"
+    if not os.path.isfile(mof_exec) or os.path.basename(mof_exec) != "UnWrapConsole3.exe":
+        return "MoF executable path is not correct (should be 'UnWrapConsole3.exe')"
+    return ""
+
+def windows_memory_counters(process: subprocess.Popen):
+    """
+    Returns the PROCESS_MEMORY_COUNTERS of a Windows process, None if they can't be read.
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(wintypes.HANDLE(int(process._handle)), ctypes.byref(counters), counters.cb):
+        return None
+    return counters
+
+def windows_peak_memory(process: subprocess.Popen) -> int:
+    """
+    Returns the peak working set of a Windows process, in bytes.
+    """
+    counters = windows_memory_counters(process)
+    return counters.PeakWorkingSetSize if counters else 0
+
+def windows_cpu_time(process: subprocess.Popen) -> float:
+    """
+    Returns the user and kernel time a Windows process used so far, in seconds.
+    """
+    import ctypes
+    from ctypes import wintypes
+
+    # Creation, exit, kernel and user time, in 100 ns intervals
+    filetimes = [wintypes.FILETIME() for _ in range(4)]
+    if not ctypes.windll.kernel32.GetProcessTimes(wintypes.HANDLE(int(process._handle)), *(ctypes.byref(filetime) for filetime in filetimes)):
+        return 0.0
+    return sum(filetime.dwHighDateTime << 32 | filetime.dwLowDateTime for filetime in filetimes[2:]) / 1e7
+
+def process_usage(process: subprocess.Popen) -> tuple[int, float]:
+    """
+    Returns the resident memory in bytes and the CPU seconds of a running process, zeros where the platform doesn't tell.
+    """
+    if sys.platform == 'win32':
+        counters = windows_memory_counters(process)
+        return (counters.WorkingSetSize if counters else 0), windows_cpu_time(process)
+    try:
+        with open(f"/proc/{process.pid}/stat") as file:
+            # The command name may contain spaces, the fields after it don't
+            fields = file.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return 0, 0.0
+    ticks = os.sysconf("SC_CLK_TCK")
+    return int(fields[21]) * os.sysconf("SC_PAGE_SIZE"), (int(fields[11]) + int(fields[12])) / ticks
+
+def parse_cpu_list(text: str) -> set[int]:
+    """
+    Parses a CPU list like "0-3,6" into CPU indices.
+    """
+    cpus = set()
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        first, _, last = part.partition("-")
+        try:
+            cpus.update(range(int(first), int(last or first) + 1))
+        except ValueError:
+            raise ValueError(f"Invalid CPU list '{text}', expected something like 0-3,6") from None
+    return cpus
+
+# Limits and scheduling applied to every MoF process, zero or empty means unlimited
+class ResourceLimits:
+    def __init__(self, timeout: float = 0.0, memory: int = 0, nice: int = 0, cpus: set[int] | None = None):
+        # Wall-clock seconds
+        self.timeout = timeout
+        # Bytes of address space (POSIX) and of resident memory, sampled while MoF runs
+        self.memory = memory
+        # 0 to 19 like POSIX nice, below normal and idle priority classes on Windows
+        self.nice = nice
+        self.cpus = cpus or set()
+
+    @classmethod
+    def from_preferences(cls, preferences) -> "ResourceLimits":
+        return cls(preferences.mof_timeout, preferences.memory_limit * 2**20, preferences.process_nice, parse_cpu_list(preferences.cpu_affinity))
+
+    def popen_arguments(self) -> dict:
+        if sys.platform != 'win32':
+            return {}
+        if self.nice >= 15:
+            return {"creationflags": subprocess.IDLE_PRIORITY_CLASS}
+        if self.nice > 0:
+            return {"creationflags": subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+        return {}
+
+    def apply(self, process: subprocess.Popen):
+        # Set on the running process rather than in a preexec_fn, which isn't safe to fork with while Blender's
+        # threads run. MoF spends its first moments reading the input, long before it needs the memory.
+        if sys.platform == 'win32':
+            if self.cpus:
+                import ctypes
+                from ctypes import wintypes
+                mask = sum(1 << cpu for cpu in self.cpus)
+                ctypes.windll.kernel32.SetProcessAffinityMask(wintypes.HANDLE(int(process._handle)), ctypes.c_size_t(mask))
+            return
+        import resource
+        # A process that already exited has nothing left to limit
+        with contextlib.suppress(ProcessLookupError):
+            # Without prlimit (macOS) the sampled resident memory is the only limit
+            if self.memory and hasattr(resource, "prlimit"):
+                resource.prlimit(process.pid, resource.RLIMIT_AS, (self.memory, self.memory))
+            if self.nice:
+                # Relative to Blender's own priority, like os.nice
+                nice = os.getpriority(os.PRIO_PROCESS, 0) + self.nice
+                os.setpriority(os.PRIO_PROCESS, process.pid, min(nice, 19))
+            if self.cpus and hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(process.pid, self.cpus)
+
+# A single MoF run on one exported OBJ file
+class MofJob:
+    def __init__(self, name: str, command: list[str], input_path: str, output_path: str):
+        self.name = name
+        self.command = command
+        self.input_path = input_path
+        self.output_path = output_path
+        self.process: subprocess.Popen | None = None
+        self.returncode: int | None = None
+        self.error = ""
+        self.last_line = ""
+        self.reader: threading.Thread | None = None
+        # Writes the input to a path, set when the input is streamed through a named pipe instead of a file
+        self.input_writer = None
+        self.writer: threading.Thread | None = None
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.peak_memory = 0
+        self.cpu_time = 0.0
+        self.limits: ResourceLimits | None = None
+        # Index of the mesh chunk this job unwraps, see `partition_faces`
+        self.chunk = 0
+        # Index of the option set this job tries in a parameter sweep
+        self.variant = 0
+        # Size and shape of the exported mesh, and the run time and memory the cost model predicts for it
+        self.faces = 0
+        self.quad_ratio = 0.0
+        self.predicted_seconds = 0.0
+        self.predicted_memory = 0
+
+    @property
+    def seconds(self) -> float:
+        return self.finished_at - self.started_at
+
+    @property
+    def arguments(self) -> list[str]:
+        # Everything after MoF's input and output paths
+        return self.command[3:]
+
+    def start(self, limits: ResourceLimits | None = None):
+        self.limits = limits
+        self.started_at = time.perf_counter()
+        try:
+            self.process = subprocess.Popen(
+                self.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace',
+                **(limits.popen_arguments() if limits else {}),
+            )
+            if limits:
+                try:
+                    limits.apply(self.process)
+                except OSError:
+                    # MoF must not run without the limits it was asked to run with
+                    self.process.kill()
+                    self.process.communicate()
+                    raise
+        except OSError as e:
+            self.error = f"Failed to start MoF: {e}"
+            self.returncode = -1
+            self.finished_at = time.perf_counter()
+            return
+        # Pipes can't be read without blocking on Windows, so drain stdout from a thread
+        self.reader = threading.Thread(target=self.read_output, daemon=True)
+        self.reader.start()
+        if self.input_writer is not None:
+            # Opening a named pipe blocks until MoF opens the other end
+            self.writer = threading.Thread(target=self.stream_input, daemon=True)
+            self.writer.start()
+
+    def stream_input(self):
+        try:
+            self.input_writer(self.input_path)
+        except OSError as e:
+            # MoF closed the pipe early or exited, its exit code tells what went wrong
+            print(f"MoF [{self.name}] stopped reading its input: {e}")
+
+    def stop_streaming(self):
+        if self.writer is not None and self.writer.is_alive():
+            tempio.open_fifo_reader(self.input_path)
+            self.writer.join()
+
+    def read_output(self):
+        for line in self.process.stdout:
+            line = line.strip()
+            if line:
+                print(f"MoF [{self.name}] {line}")
+                self.last_line = line
+        self.process.stdout.close()
+
+    def poll(self) -> int | None:
+        if self.process is not None and self.returncode is None:
+            if self.process.returncode is None and hasattr(os, "wait4"):
+                # Reap the process ourselves, the resource usage is only available at this point
+                pid, status, usage = os.wait4(self.process.pid, os.WNOHANG)
+                if pid == 0:
+                    self.check_limits()
+                    return None
+                self.process.returncode = os.waitstatus_to_exitcode(status)
+                # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+                self.peak_memory = max(self.peak_memory, usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024))
+                self.cpu_time = usage.ru_utime + usage.ru_stime
+            elif self.process.poll() is None:
+                self.check_limits()
+                return None
+            elif sys.platform == 'win32':
+                self.peak_memory = max(self.peak_memory, windows_peak_memory(self.process))
+                self.cpu_time = windows_cpu_time(self.process)
+            self.returncode = self.process.returncode
+            self.finished_at = time.perf_counter()
+            self.reader.join()
+            self.stop_streaming()
+            if not self.error:
+                self.error = self.result_error()
+        return self.returncode
+
+    def check_limits(self):
+        """
+        Samples the memory and CPU time of the running process and kills it once it breaks a limit.
+        """
+        memory, cpu_time = process_usage(self.process)
+        self.peak_memory = max(self.peak_memory, memory)
+        self.cpu_time = max(self.cpu_time, cpu_time)
+        if self.limits is None:
+            return
+        if self.limits.timeout and time.perf_counter() - self.started_at > self.limits.timeout:
+            self.error = f"MoF timed out after {self.limits.timeout:g} s"
+        elif self.limits.memory and memory > self.limits.memory:
+            self.error = f"MoF exceeded the memory limit ({self.limits.memory / 2**20:.0f} MB)"
+        else:
+            return
+        print(f"MoF [{self.name}] {self.error}, killing it")
+        self.terminate()
+
+    def result_error(self) -> str:
+        # A crashed or killed MoF may still leave a truncated or empty file behind
+        if self.returncode != 0:
+            return f"MoF exited with code {self.returncode}" + (f": {self.last_line}" if self.last_line else "")
+        if not os.path.exists(self.output_path) or os.path.getsize(self.output_path) == 0:
+            return "MoF finished without writing a result" + (f": {self.last_line}" if self.last_line else "")
+        return ""
+
+    def terminate(self, grace: float = 1.0):
+        # Ask first, so MoF can clean up, then kill
+        self.process.terminate()
+        try:
+            self.process.wait(grace)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+    def kill(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+            self.reader.join()
+            self.stop_streaming()
+
+    def cleanup(self):
+        for path in (self.input_path, self.output_path):
+            if path and os.path.exists(path):
+                os.remove(path)
+
+def create_job(name: str, buffers: "MeshBuffers", mof_exec: str, arguments: list[str], chunk: int = 0) -> MofJob:
+    """
+    Writes `buffers` to a scratch OBJ file, or prepares to stream them, and returns the (not yet started) MoF job for it.
+    """
+    input_obj_path, output_obj_path = tempio.session.paths(tempio.estimate_size(len(buffers.positions), len(buffers.loops), buffers.normals is not None))
+    job = MofJob(name, [mof_exec, input_obj_path, output_obj_path] + arguments, input_obj_path, output_obj_path)
+    if tempio.session.stream:
+        os.mkfifo(input_obj_path)
+        job.input_writer = lambda path: write_obj(path, buffers)
+    else:
+        write_obj(input_obj_path, buffers)
+
+    print(f'MoF {input_obj_path} {output_obj_path} {" ".join(arguments)}')
+    job.chunk = chunk
+    job.faces = len(buffers.loop_totals)
+    job.quad_ratio = float(np.mean(buffers.loop_totals == 4)) if job.faces else 0.0
+    return job
+
+def copy_job(job: MofJob, arguments: list[str], variant: int) -> MofJob:
+    """
+    Returns a job running MoF with other `arguments` on a copy of the input file of `job`.
+    """
+    size = os.path.getsize(job.input_path) if job.input_writer is None else 0
+    input_obj_path, output_obj_path = tempio.session.paths(size * 2)
+    copy = MofJob(job.name, [job.command[0], input_obj_path, output_obj_path] + arguments, input_obj_path, output_obj_path)
+    if job.input_writer is not None:
+        os.mkfifo(input_obj_path)
+        copy.input_writer = job.input_writer
+    else:
+        shutil.copyfile(job.input_path, input_obj_path)
+
+    print(f'MoF {input_obj_path} {output_obj_path} {" ".join(arguments)}')
+    copy.variant = variant
+    copy.faces = job.faces
+    copy.quad_ratio = job.quad_ratio
+    return copy
+
+# Runs at most `max_processes` MoF jobs at once, queueing the rest longest predicted first
+class MofJobPool:
+    def __init__(self, max_processes: int, limits: ResourceLimits | None = None, memory_budget: int = 0):
+        self.max_processes = max(1, max_processes)
+        self.limits = limits
+        # Bytes the predicted peak memory of the running jobs stays under, a single job always runs
+        self.memory_budget = memory_budget
+        self.pending: collections.deque[MofJob] = collections.deque()
+        self.running: list[MofJob] = []
+        self.finished: list[MofJob] = []
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.pending or self.running or self.finished)
+
+    def submit(self, job: MofJob):
+        # Jobs without a prediction keep their order behind the predicted ones
+        index = next((index for index, queued in enumerate(self.pending) if queued.predicted_seconds < job.predicted_seconds), len(self.pending))
+        self.pending.insert(index, job)
+        self.fill()
+
+    def fits(self, job: MofJob) -> bool:
+        if not self.memory_budget or not self.running:
+            return True
+        return sum(running.predicted_memory for running in self.running) + job.predicted_memory <= self.memory_budget
+
+    def remove(self, job: MofJob) -> bool:
+        """
+        Drops `job` from the pool without touching its process, returns whether it was there.
+        """
+        for jobs in (self.pending, self.running, self.finished):
+            if job in jobs:
+                jobs.remove(job)
+                return True
+        return False
+
+    def adopt(self, job: MofJob):
+        """
+        Takes over a job queued or started by another pool.
+        """
+        if not job.started_at:
+            self.submit(job)
+        else:
+            # Finished jobs are handed out on the next update
+            self.running.append(job)
+
+    def fill(self):
+        while self.pending and len(self.running) < self.max_processes and self.fits(self.pending[0]):
+            job = self.pending.popleft()
+            job.start(self.limits)
+            # Jobs that failed to start are done already
+            if job.returncode is not None:
+                self.finished.append(job)
+            else:
+                self.running.append(job)
+
+    def update(self) -> list[MofJob]:
+        """
+        Returns the jobs that finished since the last call and starts queued ones in their place.
+        """
+        for job in list(self.running):
+            if job.poll() is not None:
+                self.running.remove(job)
+                self.finished.append(job)
+        self.fill()
+        finished, self.finished = self.finished, []
+        return finished
+
+    def wait(self, interval: float = 0.05):
+        """
+        Blocks until all jobs are done, yielding each one as soon as it finishes.
+        """
+        while self.busy:
+            finished = self.update()
+            yield from finished
+            if not finished:
+                time.sleep(interval)
+
+    def cancel(self) -> list[MofJob]:
+        """
+        Kills running jobs and drops queued ones, returning every job that was not yet handed out.
+        """
+        for job in self.running:
+            job.kill()
+        jobs = self.finished + self.running + list(self.pending)
+        self.pending.clear()
+        self.running.clear()
+        self.finished.clear()
+        return jobs
+
+def write_loop_uvs(mesh: bpy.types.Mesh, uvs: np.ndarray):
+    if not mesh.uv_layers:
+        mesh.uv_layers.new(name="UVMap")
+    mesh.uv_layers.active.data.foreach_set("uv", uvs.astype(np.float32).ravel())
+    mesh.update()
+
+def read_loop_uvs(mesh: bpy.types.Mesh) -> np.ndarray:
+    uvs = np.zeros(len(mesh.loops) * 2, dtype=np.float32)
+    if mesh.uv_layers:
+        mesh.uv_layers.active.data.foreach_get("uv", uvs)
+    return uvs.reshape(-1, 2)
+
+def selected_faces(mesh: bpy.types.Mesh) -> np.ndarray:
+    selected = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get("select", selected)
+    return selected
+
+# Axis conversion matching the defaults of `wm.obj_export` (-Z forward, Y up)
+OBJ_AXIS_CONVERSION = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, -1.0, 0.0]], dtype=np.float32)
+
+# Gap in texels left between islands when packing chunks or mirrored halves together
+ISLAND_PADDING = 4
+
+# Vertex and face buffers of a mesh, in the coordinate system of the exported OBJ file
+class MeshBuffers:
+    def __init__(self, positions: np.ndarray, loops: np.ndarray, loop_totals: np.ndarray, normals: np.ndarray | None = None, materials: np.ndarray | None = None):
+        self.positions = positions
+        self.loops = loops
+        self.loop_totals = loop_totals
+        self.loop_starts = np.cumsum(loop_totals) - loop_totals
+        self.normals = normals
+        self.materials = materials
+
+    @classmethod
+    def from_object(cls, context, obj: bpy.types.Object, apply_modifiers: bool = False, use_normals: bool = False) -> "MeshBuffers":
+        evaluated = obj.evaluated_get(context.evaluated_depsgraph_get()) if apply_modifiers else None
+        mesh = evaluated.to_mesh() if evaluated else obj.data
+        try:
+            co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", co)
+            loops = np.empty(len(mesh.loops), dtype=np.int32)
+            mesh.loops.foreach_get("vertex_index", loops)
+            loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+            mesh.polygons.foreach_get("loop_total", loop_totals)
+            materials = np.empty(len(mesh.polygons), dtype=np.int32)
+            mesh.polygons.foreach_get("material_index", materials)
+            normals = None
+            if use_normals:
+                normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+                mesh.corner_normals.foreach_get("vector", normals)
+        finally:
+            if evaluated:
+                evaluated.to_mesh_clear()
+
+        # Bake the object transform like the OBJ exporter does
+        matrix = np.array(obj.matrix_world, dtype=np.float32)
+        positions = (co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]) @ OBJ_AXIS_CONVERSION.T
+        if normals is not None:
+            normal_matrix = np.array(obj.matrix_world.to_3x3().inverted_safe().transposed(), dtype=np.float32)
+            normals = normals.reshape(-1, 3) @ normal_matrix.T
+            normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+            normals = normals @ OBJ_AXIS_CONVERSION.T
+        return cls(positions.astype(np.float32), loops, loop_totals, normals, materials)
+
+    def subset(self, faces: np.ndarray) -> "MeshBuffers":
+        """
+        Returns the buffers of the polygons in the mask `faces`, keeping only the vertices they use.
+        """
+        corners = np.repeat(faces, self.loop_totals)
+        used, loops = np.unique(self.loops[corners], return_inverse=True)
+        normals = self.normals[corners] if self.normals is not None else None
+        materials = self.materials[faces] if self.materials is not None else None
+        return MeshBuffers(self.positions[used], loops.ravel().astype(np.int32), self.loop_totals[faces], normals, materials)
+
+def grow_face_mask(buffers: MeshBuffers, faces: np.ndarray, rings: int) -> np.ndarray:
+    """
+    Adds `rings` rings of neighbouring polygons, sharing at least a vertex, to the mask `faces`.
+    """
+    for _ in range(rings):
+        vertices = np.zeros(len(buffers.positions), dtype=bool)
+        vertices[buffers.loops[np.repeat(faces, buffers.loop_totals)]] = True
+        faces = np.logical_or.reduceat(vertices[buffers.loops], buffers.loop_starts)
+    return faces
+
+def write_obj(path: str, buffers: MeshBuffers):
+    """
+    Writes a minimal OBJ file for MoF: vertices, optional per-corner normals and faces, in one write.
+    """
+    parts = [("v %.6f %.6f %.6f\n" * len(buffers.positions)) % tuple(buffers.positions.ravel().tolist())]
+    corners = buffers.loops.astype(np.int64) + 1
+    if buffers.normals is not None:
+        parts.append(("vn %.4f %.4f %.4f\n" * len(buffers.normals)) % tuple(buffers.normals.ravel().tolist()))
+        corner_format = " %d//%d"
+        corners = np.stack([corners, np.arange(1, len(corners) + 1)], axis=1)
+    else:
+        corner_format = " %d"
+    templates = {total: "f" + corner_format * total + "\n" for total in np.unique(buffers.loop_totals).tolist()}
+    face_format = "".join([templates[total] for total in buffers.loop_totals.tolist()])
+    parts.append(face_format % tuple(corners.ravel().tolist()))
+    with open(path, 'w') as file:
+        file.write("".join(parts))
+
+# UVs read back from the OBJ file MoF writes
+class MofResult:
+    def __init__(self, uvs: np.ndarray, corner_uvs: np.ndarray, loop_totals: np.ndarray, corner_vertices: np.ndarray, position_lines: list[str]):
+        self.uvs = uvs
+        self.corner_uvs = corner_uvs
+        self.loop_totals = loop_totals
+        self.loop_starts = np.cumsum(loop_totals) - loop_totals
+        self.corner_vertices = corner_vertices
+        self.position_lines = position_lines
+        self._positions = None
+
+    @property
+    def positions(self) -> np.ndarray:
+        # Parsed on first use, only to check and recover the face mapping
+        if self._positions is None:
+            values = np.fromstring(" ".join(self.position_lines), sep=" ")
+            self._positions = values.reshape(len(self.position_lines), -1)[:, :3]
+        return self._positions
+
+    @classmethod
+    def read(cls, path: str) -> "MofResult":
+        """
+        Streams the OBJ file, keeping only its `v`, `vt` and `f` records.
+        """
+        position_lines = []
+        uv_lines = []
+        face_lines = []
+        with open(path, 'r', errors='replace') as file:
+            for line in file:
+                if line.startswith('vt '):
+                    uv_lines.append(line[3:])
+                elif line.startswith('v '):
+                    position_lines.append(line[2:])
+                elif line.startswith('f '):
+                    face_lines.append(line[2:])
+
+        if not uv_lines or not face_lines:
+            raise RuntimeError("MoF output contains no UVs")
+
+        uvs = np.fromstring(" ".join(uv_lines), sep=" ").reshape(len(uv_lines), -1)[:, :2]
+
+        corners = " ".join(face_lines).split()
+        loop_totals = np.fromiter((len(line.split()) for line in face_lines), dtype=np.int64, count=len(face_lines))
+        # MoF writes every corner in the same `v/vt[/vn]` layout
+        fields = corners[0].split('/')
+        if len(fields) < 2 or not fields[1]:
+            raise RuntimeError("MoF output faces have no UV indices")
+        indices = np.fromstring(" ".join(corners).replace('/', ' '), dtype=np.int64, sep=" ").reshape(len(corners), len(fields))
+        corner_vertices = _resolve_obj_indices(indices[:, 0], len(position_lines))
+        corner_uvs = _resolve_obj_indices(indices[:, 1], len(uv_lines))
+        return cls(uvs, corner_uvs, loop_totals, corner_vertices, position_lines)
+
+def _resolve_obj_indices(indices: np.ndarray, count: int) -> np.ndarray:
+    # OBJ indices are 1-based, negative ones count back from the last element
+    return np.where(indices < 0, indices + count, indices - 1)
+
+def nearest_points(points: np.ndarray, reference: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Returns the index of the closest `reference` point within `tolerance` of every point, -1 where there is none.
+    """
+    nearest = np.full(len(points), -1, dtype=np.int64)
+    if not len(points) or not len(reference):
+        return nearest
+    # Bucket the reference points in cells of size `tolerance` and compare every point with the 27 cells around
+    # its own, so points on either side of a cell boundary still meet
+    origin = reference.min(axis=0)
+    reference_cells = np.floor((reference - origin) / tolerance).astype(np.int64) + 1
+    size = reference_cells.max(axis=0) + 2
+    point_cells = np.clip(np.floor((points - origin) / tolerance), 0, size - 1).astype(np.int64)
+    def cell_keys(cells: np.ndarray) -> np.ndarray:
+        cells = np.clip(cells, 0, size - 1)
+        return (cells[:, 0] * size[1] + cells[:, 1]) * size[2] + cells[:, 2]
+
+    order = np.argsort(cell_keys(reference_cells), kind='stable')
+    sorted_keys = cell_keys(reference_cells)[order]
+    best_distance = np.full(len(points), tolerance * tolerance * 3.0)
+    for offset in np.stack(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1]), axis=-1).reshape(-1, 3):
+        keys = cell_keys(point_cells + offset)
+        first = np.searchsorted(sorted_keys, keys, side='left')
+        count = np.searchsorted(sorted_keys, keys, side='right') - first
+        for k in range(int(count.max(initial=0))):
+            candidates = np.flatnonzero(count > k)
+            matches = order[first[candidates] + k]
+            distance = np.sum((reference[matches] - points[candidates]) ** 2, axis=1)
+            closer = distance <= best_distance[candidates]
+            nearest[candidates[closer]] = matches[closer]
+            best_distance[candidates[closer]] = distance[closer]
+    return nearest
+
+def map_uvs_to_loops(result: MofResult, buffers: MeshBuffers) -> np.ndarray:
+    """
+    Returns the MoF UVs for every loop of `buffers`, matching faces by index when MoF kept them
+    and by corner position otherwise.
+    """
+    extent = np.ptp(buffers.positions, axis=0).max() if len(buffers.positions) else 0.0
+    tolerance = max(float(extent) * 1e-4, 1e-6)
+    loop_positions = buffers.positions[buffers.loops]
+
+    if np.array_equal(result.loop_totals, buffers.loop_totals):
+        corner_positions = result.positions[result.corner_vertices]
+        if np.abs(corner_positions - loop_positions).max(initial=0.0) <= tolerance:
+            return result.uvs[result.corner_uvs].astype(np.float32)
+
+    # Faces were re-triangulated or reordered: match MoF's vertices to the positions write_obj exported,
+    # then look up the output corners at each loop's vertex and take the one whose face lies closest to the loop's polygon
+    exported, position_ids = np.unique(np.round(buffers.positions.astype(np.float64), 6), axis=0, return_inverse=True)
+    loop_ids = position_ids.ravel()[buffers.loops]
+    corner_ids = nearest_points(result.positions, exported, tolerance)[result.corner_vertices]
+    corner_positions = result.positions[result.corner_vertices]
+
+    polygon_centers = np.add.reduceat(loop_positions, buffers.loop_starts, axis=0) / buffers.loop_totals[:, None]
+    loop_centers = np.repeat(polygon_centers, buffers.loop_totals, axis=0)
+    face_centers = np.add.reduceat(corner_positions, result.loop_starts, axis=0) / result.loop_totals[:, None]
+    corner_centers = np.repeat(face_centers, result.loop_totals, axis=0)
+
+    order = np.argsort(corner_ids, kind='stable')
+    sorted_ids = corner_ids[order]
+    first = np.searchsorted(sorted_ids, loop_ids, side='left')
+    count = np.searchsorted(sorted_ids, loop_ids, side='right') - first
+    if not count.all():
+        raise RuntimeError(f"MoF output does not match the mesh ({np.count_nonzero(count == 0)} loops without a counterpart)")
+
+    best = order[first]
+    best_distance = np.sum((corner_centers[best] - loop_centers) ** 2, axis=1)
+    for k in range(1, int(count.max())):
+        candidates = np.flatnonzero(count > k)
+        corners = order[first[candidates] + k]
+        distance = np.sum((corner_centers[corners] - loop_centers[candidates]) ** 2, axis=1)
+        closer = distance < best_distance[candidates]
+        best[candidates[closer]] = corners[closer]
+        best_distance[candidates[closer]] = distance[closer]
+    return result.uvs[result.corner_uvs[best]].astype(np.float32)
+
+def next_loop_indices(loop_starts: np.ndarray, loop_totals: np.ndarray) -> np.ndarray:
+    """
+    Returns the index of the loop following every loop around its polygon.
+    """
+    next_loops = np.arange(1, int(loop_totals.sum()) + 1)
+    next_loops[loop_starts + loop_totals - 1] = loop_starts
+    return next_loops
+
+def polygon_areas(corners: np.ndarray, loop_starts: np.ndarray, next_loops: np.ndarray) -> np.ndarray:
+    """
+    Returns the area of every polygon from its per-loop 2D (UV) or 3D corner positions.
+    """
+    corners = corners.astype(np.float64)
+    following = corners[next_loops]
+    if corners.shape[1] == 2:
+        cross = corners[:, 0] * following[:, 1] - following[:, 0] * corners[:, 1]
+        return 0.5 * np.abs(np.add.reduceat(cross, loop_starts))
+    cross = np.cross(corners, following)
+    return 0.5 * np.linalg.norm(np.add.reduceat(cross, loop_starts, axis=0), axis=1)
+
+def uv_seams(loop_vertices: np.ndarray, loop_edges: np.ndarray, loop_totals: np.ndarray, uvs: np.ndarray, edge_count: int) -> np.ndarray:
+    """
+    Returns a per-edge mask of UV seams: edges whose two sides disagree on the UV of a shared vertex.
+    """
+    next_loops = next_loop_indices(np.cumsum(loop_totals) - loop_totals, loop_totals)
+
+    # Compare UV pairs bit for bit as single 64-bit values, shared MoF corners are exactly equal
+    packed = np.ascontiguousarray(uvs, dtype=np.float32).view(np.uint64).ravel()
+    next_packed = packed[next_loops]
+
+    # Orient every loop's edge from its lower to its higher vertex index
+    forward = loop_vertices < loop_vertices[next_loops]
+    low = np.where(forward, packed, next_packed)
+    high = np.where(forward, next_packed, packed)
+
+    # Compare each side against whichever side was scattered last into the edge
+    reference_low = np.zeros(edge_count, dtype=np.uint64)
+    reference_high = np.zeros(edge_count, dtype=np.uint64)
+    reference_low[loop_edges] = low
+    reference_high[loop_edges] = high
+    differs = (low != reference_low[loop_edges]) | (high != reference_high[loop_edges])
+
+    seams = np.zeros(edge_count, dtype=bool)
+    seams[loop_edges[differs]] = True
+    return seams
+
+def connected_components(count: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Labels `count` nodes linked by the pairs (a, b) with component ids 0..n-1.
+    """
+    labels = np.arange(count)
+    while True:
+        # Hook every root onto the smallest root it is linked to, then flatten the trees
+        low = np.minimum(labels[a], labels[b])
+        np.minimum.at(labels, labels[a], low)
+        np.minimum.at(labels, labels[b], low)
+        while True:
+            parents = labels[labels]
+            if np.array_equal(parents, labels):
+                break
+            labels = parents
+        if np.array_equal(labels[a], labels[b]):
+            break
+    return np.unique(labels, return_inverse=True)[1].ravel()
+
+def buffer_loop_edges(buffers: "MeshBuffers") -> tuple[np.ndarray, int]:
+    """
+    Returns an edge index for every loop of `buffers`, numbering the edges like `mesh_topology` does for meshes, and the edge count.
+    """
+    next_loops = next_loop_indices(buffers.loop_starts, buffers.loop_totals)
+    a = buffers.loops.astype(np.int64)
+    b = a[next_loops]
+    keys = np.minimum(a, b) * len(buffers.positions) + np.maximum(a, b)
+    edges, loop_edges = np.unique(keys, return_inverse=True)
+    return loop_edges.ravel(), len(edges)
+
+def modified(obj: bpy.types.Object) -> bool:
+    # Objects whose evaluated mesh can differ from their own
+    return any(modifier.show_viewport for modifier in obj.modifiers)
+
+def uv_islands(loop_edges: np.ndarray, loop_totals: np.ndarray, seams: np.ndarray) -> np.ndarray:
+    """
+    Returns the UV island id of every polygon, islands being split by `seams`.
+    """
+    loop_polygons = np.repeat(np.arange(len(loop_totals)), loop_totals)
+    order = np.argsort(loop_edges, kind='stable')
+    edges, polygons = loop_edges[order], loop_polygons[order]
+    linked = (edges[1:] == edges[:-1]) & ~seams[edges[1:]]
+    return connected_components(len(loop_totals), polygons[:-1][linked], polygons[1:][linked])
+
+def _split_oversized(labels: np.ndarray, keys: np.ndarray, budget: int) -> np.ndarray:
+    # Splits every part with more than `budget` polygons by the non-negative integer `keys` of its polygons
+    oversized = np.bincount(labels)[labels] > budget
+    keys = np.where(oversized, keys, 0).astype(np.int64)
+    return np.unique(labels.astype(np.int64) * (int(keys.max()) + 1) + keys, return_inverse=True)[1].ravel()
+
+def partition_faces(buffers: MeshBuffers, budget: int) -> np.ndarray:
+    """
+    Assigns every polygon to a chunk of at most `budget` polygons and returns the chunk ids.
+    Meshes are split into connected parts, oversized parts by material, then by dominant normal direction,
+    then in halves along their longest axis. Small parts are grouped into shared chunks.
+    """
+    count = len(buffers.loop_totals)
+    if count <= budget:
+        return np.zeros(count, dtype=np.int64)
+
+    # Polygons sharing a vertex belong to the same part
+    loop_polygons = np.repeat(np.arange(count), buffers.loop_totals)
+    order = np.argsort(buffers.loops, kind='stable')
+    vertices, polygons = buffers.loops[order], loop_polygons[order]
+    linked = vertices[1:] == vertices[:-1]
+    labels = connected_components(count, polygons[:-1][linked], polygons[1:][linked])
+
+    if buffers.materials is not None:
+        labels = _split_oversized(labels, buffers.materials, budget)
+
+    corners = buffers.positions[buffers.loops].astype(np.float64)
+    next_loops = next_loop_indices(buffers.loop_starts, buffers.loop_totals)
+    normals = np.add.reduceat(np.cross(corners, corners[next_loops]), buffers.loop_starts, axis=0)
+    axis = np.abs(normals).argmax(axis=1)
+    directions = axis * 2 + (normals[np.arange(count), axis] < 0)
+    labels = _split_oversized(labels, directions, budget)
+
+    centroids = np.add.reduceat(corners, buffers.loop_starts, axis=0) / buffers.loop_totals[:, None]
+    while True:
+        sizes = np.bincount(labels)
+        if sizes.max() <= budget:
+            break
+        starts = np.cumsum(sizes) - sizes
+        grouped = centroids[np.argsort(labels, kind='stable')]
+        extents = np.maximum.reduceat(grouped, starts) - np.minimum.reduceat(grouped, starts)
+        # Rank the polygons of every part along its longest axis and cut at the median
+        coordinates = centroids[np.arange(count), extents.argmax(axis=1)[labels]]
+        order = np.argsort(coordinates)
+        order = order[np.argsort(labels[order], kind='stable')]
+        ranks = np.empty(count, dtype=np.int64)
+        ranks[order] = np.arange(count) - starts[labels[order]]
+        labels = _split_oversized(labels, ranks >= sizes[labels] // 2, budget)
+
+    # Fill chunks with the largest parts first
+    sizes = np.bincount(labels)
+    chunks = np.empty(len(sizes), dtype=np.int64)
+    chunk, filled = 0, 0
+    for label in np.argsort(-sizes, kind='stable').tolist():
+        if filled and filled + sizes[label] > budget:
+            chunk, filled = chunk + 1, 0
+        chunks[label] = chunk
+        filled += int(sizes[label])
+    return chunks[labels]
+
+def map_chunk_uvs_to_loops(chunks: np.ndarray, results: list[MofResult], buffers: MeshBuffers) -> np.ndarray:
+    """
+    Maps the MoF result of every chunk onto the loops of the polygons it was exported from.
+    """
+    uvs = np.empty((len(buffers.loops), 2), dtype=np.float32)
+    for chunk, result in enumerate(results):
+        faces = chunks == chunk
+        uvs[np.repeat(faces, buffers.loop_totals)] = map_uvs_to_loops(result, buffers.subset(faces))
+    return uvs
+
+def mesh_topology(mesh: bpy.types.Mesh) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the vertex and edge index of every loop and the loop count of every polygon.
+    """
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    return loop_vertices, loop_edges, loop_totals
+
+def mark_seams_from_uvs(mesh: bpy.types.Mesh, uvs: np.ndarray) -> int:
+    """
+    Sets `use_seam` on every edge from the UV layout and returns the number of UV islands.
+    """
+    loop_vertices, loop_edges, loop_totals = mesh_topology(mesh)
+    seams = uv_seams(loop_vertices, loop_edges, loop_totals, uvs, len(mesh.edges))
+    mesh.edges.foreach_set("use_seam", seams)
+    mesh.update()
+    islands = uv_islands(loop_edges, loop_totals, seams)
+    return int(islands.max()) + 1 if len(islands) else 0
+
+def apply_uvs(mesh: bpy.types.Mesh, uvs: np.ndarray) -> int:
+    """
+    Writes per-loop UVs into the active UV layer, marks seams along the island borders and returns the island count.
+    """
+    write_loop_uvs(mesh, uvs)
+    return mark_seams_from_uvs(mesh, uvs)
+
+def mesh_fingerprint(mesh: bpy.types.Mesh) -> bytes:
+    """
+    Hashes the local vertex positions, edges and faces of `mesh`. Identical meshes hash the same.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for collection, attribute, size, dtype in (
+        (mesh.vertices, "co", 3, np.float32),
+        (mesh.edges, "vertices", 2, np.int32),
+        (mesh.loops, "vertex_index", 1, np.int32),
+        (mesh.polygons, "loop_total", 1, np.int32),
+    ):
+        buffer = np.empty(len(collection) * size, dtype=dtype)
+        collection.foreach_get(attribute, buffer)
+        digest.update(buffer.tobytes())
+    return digest.digest()
+
+def topology_fingerprint(mesh: bpy.types.Mesh) -> str:
+    """
+    Hashes the edges and faces of `mesh`, but not where its vertices are, so moving vertices keeps the hash.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array([len(mesh.vertices)], dtype=np.int64).tobytes())
+    for collection, attribute, size in ((mesh.edges, "vertices", 2), (mesh.loops, "vertex_index", 1), (mesh.polygons, "loop_total", 1)):
+        buffer = np.empty(len(collection) * size, dtype=np.int32)
+        collection.foreach_get(attribute, buffer)
+        digest.update(buffer.tobytes())
+    return digest.hexdigest()
+
+def store_seams(mesh: bpy.types.Mesh):
+    """
+    Keeps the topology fingerprint and the seams of `mesh` on it, for `stored_seams` to reuse while the topology stays the same.
+    """
+    seams = np.empty(len(mesh.edges), dtype=bool)
+    mesh.edges.foreach_get("use_seam", seams)
+    mesh["mof_topology"] = topology_fingerprint(mesh)
+    mesh["mof_seams"] = np.flatnonzero(seams).tolist()
+
+def forget_seams(mesh: bpy.types.Mesh):
+    for key in ("mof_topology", "mof_seams"):
+        if key in mesh:
+            del mesh[key]
+
+def stored_seams(mesh: bpy.types.Mesh) -> np.ndarray | None:
+    """
+    Returns the seam mask of the last MoF run on `mesh`, None when there was none or the topology changed since.
+    """
+    if "mof_topology" not in mesh or "mof_seams" not in mesh or mesh["mof_topology"] != topology_fingerprint(mesh):
+        return None
+    seams = np.zeros(len(mesh.edges), dtype=bool)
+    seams[np.array(list(mesh["mof_seams"]), dtype=np.int64)] = True
+    return seams
+
+def group_instances(objects: list[bpy.types.Object], match_geometry: bool = True, world_scale: bool = False) -> list[list[bpy.types.Object]]:
+    """
+    Groups mesh objects that share a mesh datablock or, with `match_geometry`, have identical meshes.
+    With `world_scale` MoF sizes the UVs by the exported, scaled mesh, so identical meshes only match at the same scale.
+    The first object of every group is unwrapped for all of them.
+    """
+    shared: dict[int, list[bpy.types.Object]] = {}
+    for obj in objects:
+        shared.setdefault(obj.data.as_pointer(), []).append(obj)
+    if not match_geometry:
+        return list(shared.values())
+    groups: dict = {}
+    for users in shared.values():
+        key = mesh_fingerprint(users[0].data)
+        if world_scale:
+            # Objects sharing a mesh share its UVs whatever their scale
+            key = (key, tuple(round(value, 6) for value in users[0].matrix_world.to_scale()))
+        groups.setdefault(key, []).extend(users)
+    return list(groups.values())
+
+def copy_uvs(source: bpy.types.Mesh, target: bpy.types.Mesh):
+    """
+    Copies the active UV layer and the seams of `source` onto the identical mesh `target`.
+    """
+    seams = np.empty(len(source.edges), dtype=bool)
+    source.edges.foreach_get("use_seam", seams)
+    target.edges.foreach_set("use_seam", seams)
+    write_loop_uvs(target, read_loop_uvs(source))
+
+def merge_selection_uvs(mesh: bpy.types.Mesh, uvs: np.ndarray, selected: np.ndarray, exported: np.ndarray) -> np.ndarray:
+    """
+    Returns the current UVs of `mesh` with those of the `selected` polygons taken from `uvs`, the UVs of the `exported` polygons.
+    """
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    merged = read_loop_uvs(mesh)
+    merged[np.repeat(selected, loop_totals)] = uvs[np.repeat(selected[exported], loop_totals[exported])]
+    return merged
+
+# Cells per side of the occupancy grid new islands are placed on, and how often they shrink when they don't fit
+PLACEMENT_GRID = 512
+PLACEMENT_SHRINK = 0.9
+PLACEMENT_ATTEMPTS = 40
+
+def occupancy_grid(low: np.ndarray, high: np.ndarray, margin: float) -> np.ndarray:
+    """
+    Returns which cells of a PLACEMENT_GRID grid over the 0-1 UV square the boxes from `low` to `high`, grown by `margin`, touch.
+    """
+    grid = PLACEMENT_GRID
+    first = np.clip(np.floor((low - margin) * grid), 0, grid).astype(np.int64)
+    last = np.clip(np.floor((high + margin) * grid) + 1, 0, grid).astype(np.int64)
+    inside = (first < last).all(axis=1)
+    first, last = first[inside], last[inside]
+    # Corners of every box in a difference array, summed up along both axes it counts the boxes over every cell
+    counts = np.zeros((grid + 1, grid + 1), dtype=np.int64)
+    np.add.at(counts, (first[:, 1], first[:, 0]), 1)
+    np.add.at(counts, (first[:, 1], last[:, 0]), -1)
+    np.add.at(counts, (last[:, 1], first[:, 0]), -1)
+    np.add.at(counts, (last[:, 1], last[:, 0]), 1)
+    return counts.cumsum(axis=0).cumsum(axis=1)[:grid, :grid] > 0
+
+def find_free_spots(occupied: np.ndarray, sizes: np.ndarray, margin: float) -> np.ndarray | None:
+    """
+    Places boxes of `sizes` one after another, largest first, at the lowest then leftmost free spot of the `occupied` grid.
+    Returns the lower left corner of every box in UV space, or None when one of them finds no room.
+    """
+    grid = PLACEMENT_GRID
+    occupied = occupied.copy()
+    cells = np.maximum(np.ceil((sizes + margin) * grid), 1).astype(np.int64)
+    corners = np.empty((len(sizes), 2))
+    for box in np.argsort(-sizes.prod(axis=1), kind='stable').tolist():
+        width, height = cells[box]
+        if width > grid or height > grid:
+            return None
+        # Occupied cells under every window of the box's size, from a summed area table
+        table = np.zeros((grid + 1, grid + 1), dtype=np.int64)
+        table[1:, 1:] = occupied.cumsum(axis=0).cumsum(axis=1)
+        windows = table[height:, width:] - table[:-height, width:] - table[height:, :-width] + table[:-height, :-width]
+        free = np.flatnonzero(windows.ravel() == 0)
+        if not len(free):
+            return None
+        y, x = divmod(int(free[0]), windows.shape[1])
+        occupied[y:y + height, x:x + width] = True
+        corners[box] = (x / grid, y / grid)
+    return corners
+
+def place_new_islands(mesh: bpy.types.Mesh, uvs: np.ndarray, faces: np.ndarray, margin: float = 0.001) -> np.ndarray:
+    """
+    Scales the UV islands of the polygons in `faces` to the texel density of the other polygons and moves them
+    into free space of the 0-1 UV square around the untouched islands, shrinking them only when they don't fit.
+    """
+    if faces.all() or not faces.any():
+        return uvs
+    loop_vertices, loop_edges, loop_totals = mesh_topology(mesh)
+    loop_starts = np.cumsum(loop_totals) - loop_totals
+    next_loops = next_loop_indices(loop_starts, loop_totals)
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+
+    # Texel density as UV area per surface area, on each side of the selection
+    areas = polygon_areas(co.reshape(-1, 3)[loop_vertices], loop_starts, next_loops)
+    uv_areas = polygon_areas(uvs, loop_starts, next_loops)
+    old_density = uv_areas[~faces].sum() / max(areas[~faces].sum(), 1e-12)
+    new_density = uv_areas[faces].sum() / max(areas[faces].sum(), 1e-12)
+    density_scale = np.sqrt(old_density / new_density) if old_density > 0 and new_density > 0 else 1.0
+
+    islands = uv_islands(loop_edges, loop_totals, uv_seams(loop_vertices, loop_edges, loop_totals, uvs, len(mesh.edges)))
+    corners = np.repeat(faces, loop_totals)
+    loop_islands = np.unique(np.repeat(islands, loop_totals)[corners], return_inverse=True)[1].ravel()
+    count = int(loop_islands.max()) + 1
+    new_uvs = uvs[corners].astype(np.float64)
+    low = np.full((count, 2), np.inf)
+    high = np.full((count, 2), -np.inf)
+    np.minimum.at(low, loop_islands, new_uvs)
+    np.maximum.at(high, loop_islands, new_uvs)
+
+    # The untouched polygons' boxes are what the new islands have to stay clear of
+    polygon_corners = np.repeat(np.arange(len(loop_totals)), loop_totals)[~corners]
+    old_low = np.full((len(loop_totals), 2), np.inf)
+    old_high = np.full((len(loop_totals), 2), -np.inf)
+    np.minimum.at(old_low, polygon_corners, uvs[~corners])
+    np.maximum.at(old_high, polygon_corners, uvs[~corners])
+    occupied = occupancy_grid(old_low[~faces], old_high[~faces], margin)
+
+    offsets = None
+    scale = density_scale
+    for _ in range(PLACEMENT_ATTEMPTS):
+        offsets = find_free_spots(occupied, (high - low) * scale, margin)
+        if offsets is not None:
+            break
+        scale *= PLACEMENT_SHRINK
+    if offsets is None:
+        # Not a single free cell left, overlapping the corner of the tile is all that's possible
+        offsets = np.zeros((count, 2))
+    elif scale < density_scale:
+        print(f"MoF: new UV islands shrunk to {scale / density_scale:.0%} of the texel density to fit beside the others")
+
+    placed = uvs.copy()
+    placed[corners] = (new_uvs - low[loop_islands]) * scale + offsets[loop_islands] + margin / 2
+    return placed
+
+def blender_unwrap(context, obj: bpy.types.Object, unwrap: bool, pack: bool, margin: float = 0.001, margin_method: str = 'SCALED', average_scale: bool = False):
+    """
+    Runs Blender's angle based unwrap and/or island packing on the selected polygons of `obj`.
+    """
+    bpy.ops.object.select_all(action='DESELECT')
+    obj.select_set(True)
+    context.view_layer.objects.active = obj
+
+    # Enter edit mode and select all UVs
+    bpy.ops.object.mode_set(mode='EDIT')
+    try:
+        bpy.ops.uv.select_all(action='SELECT')
+
+        if unwrap:
+            # Run 'Unwrap' (Angle Based)
+            bpy.ops.uv.unwrap('INVOKE_DEFAULT', method='ANGLE_BASED', margin=0.001)
+
+        if pack:
+            if average_scale:
+                # Islands unwrapped separately don't share a scale yet
+                bpy.ops.uv.average_islands_scale()
+            # Pack Islands
+            bpy.ops.uv.pack_islands(margin=margin, margin_method=margin_method)
+    finally:
+        with context.temp_override(active_object=obj):
+            bpy.ops.uv.select(deselect=True)
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+@contextlib.contextmanager
+def all_faces_selected(mesh: bpy.types.Mesh):
+    # Blender's unwrap and packing only see selected polygons, the user's selection comes back afterwards
+    selection = selected_faces(mesh)
+    mesh.polygons.foreach_set("select", np.ones(len(mesh.polygons), dtype=bool))
+    try:
+        yield
+    finally:
+        mesh.polygons.foreach_set("select", selection)
+        mesh.update()
+
+def unwrap_along_seams(context, obj: bpy.types.Object, seams: np.ndarray, margin: float):
+    """
+    Marks `seams` on `obj`, then flattens and packs all of its polygons with Blender's unwrap, keeping the polygon selection.
+    """
+    obj.data.edges.foreach_set("use_seam", seams)
+    with all_faces_selected(obj.data):
+        blender_unwrap(context, obj, unwrap=True, pack=True, margin=margin, margin_method='FRACTION', average_scale=True)
+
+def relayout(context, obj: bpy.types.Object, layout_mode: str, faces: np.ndarray | None = None, margin: float = 0.0):
+    """
+    Repacks (`'REPACK'`) or re-unwraps along the seams and repacks (`'REUNWRAP'`) the UVs of `obj` with Blender's tools.
+    When only the polygons in `faces` were unwrapped, their islands are placed next to the untouched ones instead of repacking everything.
+    A non-zero `margin`, as a fraction of the UV space, always packs all islands together (chunked or mirrored unwraps).
+    """
+    if faces is not None:
+        if layout_mode == 'REUNWRAP':
+            obj.data.polygons.foreach_set("select", faces)
+            blender_unwrap(context, obj, unwrap=True, pack=False)
+        write_loop_uvs(obj.data, place_new_islands(obj.data, read_loop_uvs(obj.data), faces))
+        return
+    if margin:
+        # MoF laid every chunk or half out on its own, only one packing pass over all of them avoids overlaps
+        with all_faces_selected(obj.data):
+            blender_unwrap(context, obj, unwrap=layout_mode == 'REUNWRAP', pack=True, margin=margin, margin_method='FRACTION', average_scale=True)
+        return
+    if layout_mode == 'MOF':
+        return
+    blender_unwrap(context, obj, unwrap=layout_mode == 'REUNWRAP', pack=True)
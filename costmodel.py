@@ -0,0 +1,158 @@
+# Cost model of MoF runs, fitted to the telemetry log: predicts wall time and peak memory of a job
+# from its face count, quad ratio and the options that scale its work
+
+import json
+import math
+import os
+import numpy as np
+
+# Options the cost depends on, with the operator's defaults
+SCALING_OPTIONS = {
+    "-RELAX_ITERATIONS": 50,
+    "-PACKING_ITERATIONS": 4,
+    "-RASTERIZATION": 64,
+}
+# Switches that make the iterations of an option count for nothing when off
+SWITCHES = {
+    "-RELAX_ITERATIONS": "-RELAX",
+    "-PACKING_ITERATIONS": "-PACKING",
+}
+
+# Face count the features are centred on, along with the default options
+REFERENCE_FACES = 10000
+
+# Log-linear model over [1, log faces, quad ratio, log(relax iterations + 1), log(packing iterations + 1), log rasterization],
+# all but the quad ratio relative to REFERENCE_FACES and the defaults so the intercept is the cost of a typical run.
+# Guesses the fit is pulled towards while few runs are logged: about 2 s and 100 MB for 10k faces at the defaults.
+PRIOR_SECONDS = np.array([math.log(2.0), 1.1, 0.0, 0.3, 0.2, 0.3])
+PRIOR_MEMORY = np.array([math.log(100 * 2**20), 0.75, 0.0, 0.0, 0.0, 0.1])
+# Weight of the prior, in logged runs
+PRIOR_WEIGHT = 1.0
+# Most recent runs read from the log
+MAX_RECORDS = 5000
+
+def option_value(arguments: list[str], name: str, default: float) -> float:
+    # Options are "-NAME VALUE" pairs split into separate arguments
+    switch = SWITCHES.get(name)
+    if switch in arguments and arguments.index(switch) + 1 < len(arguments) and arguments[arguments.index(switch) + 1] == "FALSE":
+        return 0.0
+    try:
+        return float(arguments[arguments.index(name) + 1])
+    except (ValueError, IndexError):
+        return default
+
+def features(faces: int, quad_ratio: float, arguments: list[str]) -> np.ndarray:
+    relax, packing, rasterization = (option_value(arguments, name, default) for name, default in SCALING_OPTIONS.items())
+    relax_default, packing_default, rasterization_default = SCALING_OPTIONS.values()
+    return np.array([
+        1.0,
+        math.log(max(faces, 1) / REFERENCE_FACES),
+        quad_ratio,
+        math.log1p(max(relax, 0.0)) - math.log1p(relax_default),
+        math.log1p(max(packing, 0.0)) - math.log1p(packing_default),
+        math.log(max(rasterization, 1.0) / rasterization_default),
+    ])
+
+def fit(rows: np.ndarray, targets: np.ndarray, prior: np.ndarray) -> np.ndarray:
+    """
+    Least squares fit of log `targets` on `rows`, regularized towards `prior`.
+    """
+    weight = math.sqrt(PRIOR_WEIGHT)
+    a = np.vstack([rows, weight * np.eye(len(prior))]) if len(rows) else weight * np.eye(len(prior))
+    b = np.concatenate([np.log(targets), weight * prior]) if len(rows) else weight * prior
+    return np.linalg.lstsq(a, b, rcond=None)[0]
+
+class CostModel:
+    def __init__(self, seconds: np.ndarray = PRIOR_SECONDS, memory: np.ndarray = PRIOR_MEMORY, runs: int = 0):
+        self.seconds = seconds
+        self.memory = memory
+        # Logged runs the model was fitted to
+        self.runs = runs
+
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "CostModel":
+        """
+        Fits the model to telemetry records of single-job MoF runs that succeeded.
+        """
+        time_rows, times, memory_rows, memories = [], [], [], []
+        for record in records:
+            if record.get("cached") or record.get("reused_seams") or record.get("error") or record.get("jobs") != 1 or "quad_ratio" not in record:
+                continue
+            # Faces sent to MoF, fewer than the object's polygons for partial and mirrored unwraps
+            seconds, faces = record.get("stages", {}).get("mof", 0.0), record.get("faces", 0)
+            if seconds <= 0 or faces <= 0:
+                continue
+            row = features(faces, record["quad_ratio"], record.get("options", []))
+            time_rows.append(row)
+            times.append(seconds)
+            if record.get("peak_memory", 0) > 0:
+                memory_rows.append(row)
+                memories.append(record["peak_memory"])
+        return cls(
+            fit(np.array(time_rows).reshape(-1, len(PRIOR_SECONDS)), np.array(times), PRIOR_SECONDS),
+            fit(np.array(memory_rows).reshape(-1, len(PRIOR_MEMORY)), np.array(memories), PRIOR_MEMORY),
+            len(times),
+        )
+
+    def predict(self, faces: int, quad_ratio: float, arguments: list[str]) -> tuple[float, int]:
+        """
+        Returns the predicted wall time in seconds and peak memory in bytes of a MoF run.
+        """
+        row = features(faces, quad_ratio, arguments)
+        return float(np.exp(row @ self.seconds)), int(np.exp(row @ self.memory))
+
+    def estimate(self, job):
+        # Jobs without a known face count were not exported by this run, e.g. adopted pre-unwraps
+        if job.faces:
+            job.predicted_seconds, job.predicted_memory = self.predict(job.faces, job.quad_ratio, job.arguments)
+
+# Model fitted to the log last read, with the log's path, modification time and size
+_loaded: tuple[tuple[str, float, int], CostModel] | None = None
+
+def load(path: str) -> CostModel:
+    """
+    Fits a model to the last MAX_RECORDS runs of the JSONL log at `path`, refitting only when the log changed.
+    """
+    global _loaded
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return CostModel()
+    key = (path, stat.st_mtime, stat.st_size)
+    if _loaded is None or _loaded[0] != key:
+        records = []
+        try:
+            with open(path) as file:
+                lines = file.readlines()[-MAX_RECORDS:]
+        except OSError:
+            lines = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        _loaded = (key, CostModel.from_records(records))
+    return _loaded[1]
+
+def makespan(seconds: list[float], memory: list[int], slots: int, budget: int = 0) -> float:
+    """
+    Simulates running jobs longest first on `slots` processes, starting a job only while the predicted memory
+    of the running ones stays under `budget` (when set), and returns when the last one finishes.
+    """
+    order = sorted(range(len(seconds)), key=lambda index: -seconds[index])
+    running: list[tuple[float, int]] = []
+    now = 0.0
+    for index in order:
+        # Wait for jobs to finish until there is a free slot and enough memory
+        while running and (len(running) >= slots or (budget and sum(used for _, used in running) + memory[index] > budget)):
+            running.sort()
+            now, _ = running.pop(0)
+        running.append((now + seconds[index], memory[index]))
+    return max((end for end, _ in running), default=now)
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min {int(seconds % 60)} s"
+    return f"{int(seconds // 3600)} h {int(seconds % 3600 // 60)} min"
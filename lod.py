@@ -0,0 +1,138 @@
+# LOD chains: MoF unwraps the most detailed LOD, the others get its UVs projected onto them
+
+import bpy
+import re
+import numpy as np
+
+from mathutils.bvhtree import BVHTree
+
+from . import core
+
+# "Rock_LOD0", "Rock.lod1", "Rock LOD2"...
+LOD_NAME = re.compile(r"^(.*?)[\s._-]*LOD(\d+)$", re.IGNORECASE)
+
+def parse_lod_name(name: str) -> tuple[str, int] | None:
+    """
+    Returns the base name and LOD index of an object named like `Rock_LOD1`, None for other names.
+    """
+    match = LOD_NAME.match(name)
+    if match is None:
+        return None
+    return match.group(1).lower(), int(match.group(2))
+
+def lod_chains(objects: list[bpy.types.Object], candidates) -> tuple[list[bpy.types.Object], dict[str, list[str]]]:
+    """
+    Keeps the most detailed LOD of every chain among `objects` and finds the mesh objects of its chain in `candidates`.
+    Returns the objects to unwrap and the names of the LODs every one of them transfers its UVs to.
+    """
+    sources: dict[str, tuple[int, bpy.types.Object]] = {}
+    for obj in objects:
+        parsed = parse_lod_name(obj.name)
+        if parsed is not None and (parsed[0] not in sources or parsed[1] < sources[parsed[0]][0]):
+            sources[parsed[0]] = (parsed[1], obj)
+
+    chains = {obj.name: [] for _, obj in sources.values()}
+    for candidate in candidates:
+        parsed = parse_lod_name(candidate.name)
+        if candidate.type == 'MESH' and parsed is not None and parsed[0] in sources:
+            level, source = sources[parsed[0]]
+            if parsed[1] > level and candidate.data is not source.data:
+                chains[source.name].append(candidate.name)
+    unwrapped = [obj for obj in objects if any(obj is source for _, source in sources.values()) or parse_lod_name(obj.name) is None]
+    return unwrapped, chains
+
+def nearest_polygons(co: np.ndarray, loops: np.ndarray, loop_starts: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Returns the index of the polygon closest to every point.
+    """
+    polygons = [loop.tolist() for loop in np.split(loops, loop_starts[1:])]
+    tree = BVHTree.FromPolygons(co.tolist(), polygons, all_triangles=False)
+    return np.array([tree.find_nearest(point)[2] for point in points.tolist()], dtype=np.int64)
+
+def project_uvs(source_corners: np.ndarray, source_uvs: np.ndarray, source_starts: np.ndarray, source_totals: np.ndarray, faces: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Interpolates the UVs of polygon `faces[i]` at `points[i]`, extrapolating linearly for points outside it.
+    Every polygon is fan triangulated and the triangle the point lies deepest in is used.
+    """
+    totals = source_totals[faces]
+    starts = source_starts[faces]
+    best = np.full(len(points), -np.inf)
+    uvs = np.zeros((len(points), 2), dtype=np.float64)
+    for triangle in range(int(totals.max(initial=3)) - 2):
+        valid = triangle < totals - 2
+        first = starts
+        second = starts + np.minimum(triangle + 1, totals - 1)
+        third = starts + np.minimum(triangle + 2, totals - 1)
+        a, b, c = source_corners[first], source_corners[second], source_corners[third]
+        # Barycentric coordinates of the point projected onto the triangle's plane
+        ab, ac, ap = b - a, c - a, points - a
+        d00 = np.einsum('ij,ij->i', ab, ab)
+        d01 = np.einsum('ij,ij->i', ab, ac)
+        d11 = np.einsum('ij,ij->i', ac, ac)
+        d20 = np.einsum('ij,ij->i', ap, ab)
+        d21 = np.einsum('ij,ij->i', ap, ac)
+        denominator = d00 * d11 - d01 * d01
+        valid &= np.abs(denominator) > 1e-20
+        denominator = np.where(valid, denominator, 1.0)
+        v = (d11 * d20 - d01 * d21) / denominator
+        w = (d00 * d21 - d01 * d20) / denominator
+        u = 1.0 - v - w
+        depth = np.minimum(np.minimum(u, v), w)
+        better = valid & (depth > best)
+        best = np.where(better, depth, best)
+        interpolated = u[:, None] * source_uvs[first] + v[:, None] * source_uvs[second] + w[:, None] * source_uvs[third]
+        uvs[better] = interpolated[better]
+    # Polygons too degenerate for any triangle take the UV of their first corner
+    degenerate = np.isinf(best)
+    uvs[degenerate] = source_uvs[starts[degenerate]]
+    return uvs
+
+def weld_uvs(uvs: np.ndarray, vertices: np.ndarray, islands: np.ndarray) -> np.ndarray:
+    """
+    Averages the UVs of the corners sharing a vertex and a source island, so islands only split where the source's do.
+    """
+    groups = np.unique(vertices.astype(np.int64) * (int(islands.max(initial=0)) + 1) + islands, return_inverse=True)[1].ravel()
+    counts = np.bincount(groups)
+    welded = np.stack([np.bincount(groups, weights=uvs[:, axis]) for axis in range(2)], axis=1) / counts[:, None]
+    return welded[groups]
+
+def mesh_positions(mesh: bpy.types.Mesh) -> np.ndarray:
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3).astype(np.float64)
+
+def transfer(source_co: np.ndarray, source_vertices: np.ndarray, source_totals: np.ndarray, source_uvs: np.ndarray, source_islands: np.ndarray,
+             target_co: np.ndarray, target_vertices: np.ndarray, target_totals: np.ndarray) -> np.ndarray:
+    """
+    Returns UVs for every target loop, projected from the closest source polygon, so no target polygon straddles two islands.
+    """
+    source_starts = np.cumsum(source_totals) - source_totals
+    target_starts = np.cumsum(target_totals) - target_totals
+    corners = target_co[target_vertices]
+    centroids = np.add.reduceat(corners, target_starts, axis=0) / target_totals[:, None]
+
+    faces = np.repeat(nearest_polygons(source_co, source_vertices, source_starts, centroids), target_totals)
+    uvs = project_uvs(source_co[source_vertices], source_uvs.astype(np.float64), source_starts, source_totals, faces, corners)
+    return weld_uvs(uvs, target_vertices, source_islands[faces]).astype(np.float32)
+
+def transfer_uvs(source: bpy.types.Mesh, target: bpy.types.Mesh) -> int:
+    """
+    Projects the active UVs of `source` onto `target`, both in local space, and returns the island count of `target`.
+    """
+    source_vertices, source_edges, source_totals = core.mesh_topology(source)
+    if not len(source_totals):
+        raise ValueError("The source LOD has no faces")
+    source_uvs = core.read_loop_uvs(source)
+    islands = core.uv_islands(source_edges, source_totals, core.uv_seams(source_vertices, source_edges, source_totals, source_uvs, len(source.edges)))
+    target_vertices, _, target_totals = core.mesh_topology(target)
+    uvs = transfer(mesh_positions(source), source_vertices, source_totals, source_uvs, islands, mesh_positions(target), target_vertices, target_totals)
+    return core.apply_uvs(target, uvs)
+
+def transfer_buffer_uvs(source: core.MeshBuffers, uvs: np.ndarray, target: core.MeshBuffers) -> np.ndarray:
+    """
+    Returns `uvs`, one per loop of the evaluated mesh `source`, projected onto the loops of the original mesh `target`,
+    for meshes whose modifiers add or move vertices.
+    """
+    loop_edges, edge_count = core.buffer_loop_edges(source)
+    islands = core.uv_islands(loop_edges, source.loop_totals, core.uv_seams(source.loops, loop_edges, source.loop_totals, uvs, edge_count))
+    return transfer(source.positions.astype(np.float64), source.loops, source.loop_totals, uvs, islands, target.positions.astype(np.float64), target.loops, target.loop_totals)
@@ -0,0 +1,226 @@
+# UV layout quality metrics, computed with NumPy over the loop and UV arrays
+
+import numpy as np
+
+from .core import MeshBuffers
+
+# Candidate pixels tested per rasterization batch, bounds the temporary arrays
+RASTER_BATCH = 1 << 22
+# Largest raster coverage is measured on, its cost grows with the square of the resolution
+# while the share of covered texels barely changes above it
+MAX_COVERAGE_RESOLUTION = 1024
+
+# Loops of the polygons of a mesh. When all polygons have the same size, which is common for meshes large
+# enough to matter, their first and last loops are strided slices and sums over them strided additions,
+# both several times faster than gathering and `reduceat`
+class PolygonLoops:
+    def __init__(self, loop_starts: np.ndarray, loop_totals: np.ndarray):
+        self.count = len(loop_starts)
+        self.size = int(loop_totals[0]) if self.count and (loop_totals == loop_totals[0]).all() else 0
+        self.starts = loop_starts
+        self.totals = loop_totals
+        self.firsts = slice(0, None, self.size) if self.size else loop_starts
+        self.lasts = slice(self.size - 1, None, self.size) if self.size else loop_starts + loop_totals - 1
+
+    def reduce(self, ufunc: np.ufunc, values: np.ndarray) -> np.ndarray:
+        """
+        Reduces `values`, one per loop along the last axis, over every polygon with `ufunc`.
+        """
+        if not self.size:
+            return ufunc.reduceat(values, self.starts, axis=-1)
+        result = values[..., ::self.size].copy()
+        for corner in range(1, self.size):
+            ufunc(result, values[..., corner::self.size], out=result)
+        return result
+
+def loop_edges(corners: np.ndarray, polygons: PolygonLoops) -> np.ndarray:
+    """
+    Returns the vector from every loop to the next one around its polygon, from one row per axis of corner positions.
+    """
+    # Every loop but the last of a polygon is followed by its neighbouring column, only the wrap-around differs
+    edges = np.empty_like(corners)
+    for corner, edge in zip(corners, edges):
+        np.subtract(corner[1:], corner[:-1], out=edge[:-1])
+        edge[polygons.lasts] = corner[polygons.firsts] - corner[polygons.lasts]
+    return edges
+
+def corner_geometry(corners: np.ndarray, polygons: PolygonLoops) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the area of every polygon and the cosine of the interior angle at every loop, from one row per axis
+    of 2D (UV) or 3D corner positions.
+    """
+    # One vector per edge, shared by the areas and the angles. Everything below works one axis at a time
+    # and in place where it can, temporaries of all axes at once cost more to allocate than to compute
+    edges = loop_edges(corners, polygons)
+    # Twice the area is the sum of every corner crossed with its edge, which only multiplies coordinates
+    # by small differences and so stays precise in float32 far from the origin
+    if len(corners) == 2:
+        areas = 0.5 * np.abs(polygons.reduce(np.add, corners[0] * edges[1] - corners[1] * edges[0]))
+    else:
+        areas = np.zeros(polygons.count, dtype=corners.dtype)
+        for i, j in ((1, 2), (2, 0), (0, 1)):
+            areas += polygons.reduce(np.add, corners[i] * edges[j] - corners[j] * edges[i]) ** 2
+        areas = 0.5 * np.sqrt(areas)
+
+    # Cosines from the dot products of the normalized edges meeting at every loop
+    lengths = np.zeros(corners.shape[1], dtype=corners.dtype)
+    for edge in edges:
+        lengths += edge * edge
+    # Degenerate edges stay zero and count as a right angle
+    np.maximum(np.sqrt(lengths, out=lengths), np.finfo(corners.dtype).tiny, out=lengths)
+    cosines = np.zeros_like(lengths)
+    wrapped = np.zeros(polygons.count, dtype=corners.dtype)
+    for edge in edges:
+        edge /= lengths
+        cosines[1:] -= edge[1:] * edge[:-1]
+        wrapped -= edge[polygons.firsts] * edge[polygons.lasts]
+    # The first loop of a polygon follows its last one, not the previous polygon's
+    cosines[polygons.firsts] = wrapped
+    return areas, np.clip(cosines, -1.0, 1.0, out=cosines)
+
+def face_distortion(buffers: MeshBuffers, uvs: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the surface area, UV area, area distortion (1 when undistorted) and mean angle distortion
+    in radians of every polygon.
+    """
+    polygons = PolygonLoops(buffers.loop_starts, buffers.loop_totals)
+    # Relative to the first vertex, which keeps the corner coordinates small
+    positions = np.ascontiguousarray(buffers.positions.T, dtype=np.float32)
+    if positions.size:
+        positions -= positions[:, :1]
+    corners = np.take(positions, buffers.loops, axis=1)
+    areas, cosines = corner_geometry(corners, polygons)
+    uv_areas, uv_cosines = corner_geometry(np.ascontiguousarray(uvs.T, dtype=np.float32), polygons)
+    areas = areas.astype(np.float64)
+    uv_areas = uv_areas.astype(np.float64)
+
+    # Share of the texture over share of the surface, folded so that shrinking and growing count the same
+    ratios = np.clip((uv_areas / max(float(uv_areas.sum()), 1e-12)) / np.maximum(areas / max(float(areas.sum()), 1e-12), 1e-12), 1e-3, 1e3)
+    area_distortion = np.maximum(ratios, 1.0 / ratios)
+
+    # Difference of the surface and UV angle at every corner, interior angles lie in [0, pi] so their cosines tell them apart
+    errors = np.abs(np.arccos(cosines) - np.arccos(uv_cosines))
+    angle_distortion = polygons.reduce(np.add, errors) / buffers.loop_totals
+    return areas, uv_areas, area_distortion, angle_distortion
+
+def raster_coverage(uvs: np.ndarray, loop_starts: np.ndarray, loop_totals: np.ndarray, resolution: int) -> float:
+    """
+    Returns the share of texels of a `resolution` square texture whose centre lies in at least one polygon,
+    measured at no more than MAX_COVERAGE_RESOLUTION.
+    """
+    resolution = min(resolution, MAX_COVERAGE_RESOLUTION)
+    pixels = np.ascontiguousarray(uvs.T, dtype=np.float32) * np.float32(resolution)
+    covered = np.zeros(resolution * resolution, dtype=bool)
+    if not len(loop_starts):
+        return 0.0
+    polygons = PolygonLoops(loop_starts, loop_totals)
+
+    # Range of texel centres inside every polygon's bounding box
+    low = np.maximum(np.ceil(polygons.reduce(np.minimum, pixels) - 0.5), 0).astype(np.int32)
+    high = np.minimum(np.floor(polygons.reduce(np.maximum, pixels) - 0.5), resolution - 1).astype(np.int32)
+    spans = high - low + 1
+
+    # Polygons of dense meshes mostly hold one texel centre at most: test it against all their edges at once,
+    # which is exact for convex polygons
+    single = (spans == 1).all(axis=0)
+    if single.any():
+        edges = loop_edges(pixels, polygons)
+        centres = np.repeat(low.astype(np.float32) + np.float32(0.5), loop_totals, axis=1) - pixels
+        sides = edges[0] * centres[1] - edges[1] * centres[0]
+        inside = single & ((polygons.reduce(np.minimum, sides) >= 0) | (polygons.reduce(np.maximum, sides) <= 0))
+        covered[low[1, inside] * resolution + low[0, inside]] = True
+
+    # Fan-triangulate the larger polygons
+    larger = np.flatnonzero((spans > 0).all(axis=0) & ~single)
+    counts = loop_totals[larger].astype(np.int64) - 2
+    firsts = np.repeat(loop_starts[larger], counts)
+    seconds = firsts + np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    corners = [np.take(pixels, indices, axis=1) for indices in (firsts, seconds, seconds + 1)]
+
+    # Range of texel centres inside every triangle's bounding box
+    low = np.maximum(np.ceil(np.minimum(np.minimum(corners[0], corners[1]), corners[2]) - 0.5), 0).astype(np.int32)
+    high = np.minimum(np.floor(np.maximum(np.maximum(corners[0], corners[1]), corners[2]) - 0.5), resolution - 1).astype(np.int32)
+    spans = (high - low + 1).max(axis=0)
+
+    # Sort the triangles that contain texel centres by the power of two their box fits in, so every size is one slice
+    hit = np.flatnonzero(spans > 0)
+    buckets = np.ceil(np.log2(spans[hit])).astype(np.int32)
+    order = hit[np.argsort(buckets, kind='stable')]
+    bounds = np.searchsorted(np.sort(buckets), np.arange(int(buckets.max(initial=0)) + 2))
+    a, b, c = (np.take(corner, order, axis=1) for corner in corners)
+    low, high = np.take(low, order, axis=1), np.take(high, order, axis=1)
+
+    # Test triangles of similar size together, each against the texels of its own box
+    for bucket in range(len(bounds) - 1):
+        size = 1 << bucket
+        offsets = np.arange(size * size, dtype=np.int32)
+        offset_x, offset_y = offsets % size, offsets // size
+        step = max(1, RASTER_BATCH // (size * size))
+        for start in range(bounds[bucket], bounds[bucket + 1], step):
+            batch = slice(start, min(start + step, bounds[bucket + 1]))
+            x = low[0, batch, None] + offset_x
+            y = low[1, batch, None] + offset_y
+            inside = (x <= high[0, batch, None]) & (y <= high[1, batch, None])
+            centre_x, centre_y = x + np.float32(0.5), y + np.float32(0.5)
+            signs = None
+            for p, q in ((a, b), (b, c), (c, a)):
+                edge = (q[0, batch, None] - p[0, batch, None]) * (centre_y - p[1, batch, None]) - (q[1, batch, None] - p[1, batch, None]) * (centre_x - p[0, batch, None])
+                positive, negative = edge >= 0, edge <= 0
+                signs = (positive, negative) if signs is None else (signs[0] & positive, signs[1] & negative)
+            inside &= signs[0] | signs[1]
+            covered[(y * resolution + x)[inside]] = True
+    return float(covered.mean())
+
+def tile_coverage(buffers: MeshBuffers, uvs: np.ndarray, tiles: np.ndarray, resolutions: np.ndarray) -> float:
+    """
+    Returns the mean coverage of the UDIM tiles of `tiles` (the tile number of every polygon, 1001 onwards),
+    each at the texture resolution of its polygons in `resolutions`.
+    """
+    coverages = []
+    for tile in np.unique(tiles).tolist():
+        faces = tiles == tile
+        totals = buffers.loop_totals[faces]
+        offset = np.array([(tile - 1001) % 10, (tile - 1001) // 10], dtype=np.float32)
+        tile_uvs = uvs[np.repeat(faces, buffers.loop_totals)] - offset
+        coverages.append(raster_coverage(tile_uvs, np.cumsum(totals) - totals, totals, int(resolutions[faces][0])))
+    return float(np.mean(coverages)) if coverages else 0.0
+
+def layout_metrics(buffers: MeshBuffers, uvs: np.ndarray, texture_resolution: int | np.ndarray = 1024, texture_density: int = 1024, islands: int | None = None, tiles: np.ndarray | None = None) -> dict[str, float]:
+    """
+    Measures how much of the texture `uvs` (one per loop of `buffers`) cover and how evenly they spread it over the surface.
+    UDIM layouts pass the tile number of every polygon as `tiles` and the resolution of every polygon's tile as `texture_resolution`.
+    """
+    resolution = texture_resolution
+    scaled = uvs
+    if tiles is not None:
+        # Compare tiles of different resolutions in texels, as if all had the largest one
+        resolution = int(texture_resolution.max(initial=1))
+        scaled = uvs * np.repeat(texture_resolution / resolution, buffers.loop_totals)[:, None].astype(np.float32)
+    areas, uv_areas, area_distortion, angle_distortion = face_distortion(buffers, scaled)
+    valid = areas > max(float(areas.sum()), 1e-12) * 1e-9
+    weights = areas[valid] if valid.any() else None
+    area = float(np.average(area_distortion[valid], weights=weights)) if valid.any() else 1.0
+    angle = float(np.average(angle_distortion[valid], weights=weights)) if valid.any() else 0.0
+
+    # Texels per unit of surface
+    densities = np.sqrt(uv_areas[valid] / areas[valid]) * resolution
+    density = float(np.average(densities, weights=weights)) if valid.any() else 0.0
+    density_std = float(np.sqrt(np.average((densities - density) ** 2, weights=weights))) if valid.any() else 0.0
+    density_variance = (density_std / density) ** 2 if density > 0 else 0.0
+
+    if tiles is not None:
+        coverage = tile_coverage(buffers, uvs, tiles, texture_resolution)
+    else:
+        coverage = raster_coverage(uvs, buffers.loop_starts, buffers.loop_totals, texture_resolution)
+    metrics = {
+        "coverage": coverage,
+        "area_distortion": area,
+        "angle_distortion": float(np.degrees(angle)),
+        "density": density,
+        "density_spread": density_std / texture_density,
+        "density_variance": density_variance,
+        "score": coverage / (area * (1.0 + density_variance)),
+    }
+    if islands is not None:
+        metrics["islands"] = islands
+    return metrics
@@ -0,0 +1,170 @@
+# Pre-flight analysis: cheap NumPy measurements of a mesh that turn off MoF's feature detectors
+# when the mesh has nothing for them to find
+
+import types
+import numpy as np
+
+from .core import MeshBuffers, assemble_options_command_line, command_line_arguments, connected_components, next_loop_indices
+from .metrics import PolygonLoops, corner_geometry
+
+# Rough share of MoF's run time every detector takes on a mesh without the feature, only used for the saving estimate
+DETECTOR_COST = {
+    "cones": 0.04,
+    "grids": 0.08,
+    "strips": 0.05,
+    "patches": 0.08,
+    "planes": 0.05,
+    "tubes": 0.12,
+    "junctions": 0.04,
+    "squares": 0.02,
+}
+
+# Below this share of quads there are no quad grids or strips worth searching for
+MIN_QUAD_RATIO = 0.25
+# Area shares below which planes and tubes count as absent
+MIN_PLANAR_SHARE = 0.01
+MIN_CYLINDRICITY = 0.02
+# Triangle fans around a vertex with at least this many triangles can be cone tips
+POLE_VALENCE = 5
+# Neighbouring polygons bend when their normals differ by more than about 3°, and meet at a hard edge beyond 60°
+BEND_DOT = np.cos(np.radians(3.0))
+SHARP_DOT = 0.5
+# A polygon curves in one direction only when the normals of its neighbours vary along one axis
+CYLINDER_ANISOTROPY = 0.1
+# Corners within 5° of a right angle
+RIGHT_ANGLE_COS = np.cos(np.radians(85.0))
+
+def face_adjacency(buffers: MeshBuffers) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the pairs of polygons sharing an edge and a mask of the vertices on an open boundary.
+    """
+    next_loops = next_loop_indices(buffers.loop_starts, buffers.loop_totals)
+    a = buffers.loops.astype(np.int64)
+    b = a[next_loops]
+    keys = np.minimum(a, b) * len(buffers.positions) + np.maximum(a, b)
+    loop_polygons = np.repeat(np.arange(len(buffers.loop_totals)), buffers.loop_totals)
+    order = np.argsort(keys, kind='stable')
+    keys, polygons = keys[order], loop_polygons[order]
+    shared = keys[1:] == keys[:-1]
+
+    # Edges used by a single polygon
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    open_edges = unique_keys[counts == 1]
+    boundary = np.zeros(len(buffers.positions), dtype=bool)
+    boundary[open_edges // len(buffers.positions)] = True
+    boundary[open_edges % len(buffers.positions)] = True
+    return polygons[:-1][shared], polygons[1:][shared], boundary
+
+def analyze(buffers: MeshBuffers, flatness: float = 0.9) -> dict:
+    """
+    Measures the features MoF's detectors look for: quad ratio, valence histogram of inner vertices,
+    share of the surface in planar clusters (polygons within `flatness` of their cluster's normal),
+    share curved in one direction only (cylindricity), triangle fan poles and right angled corners.
+    """
+    count = len(buffers.loop_totals)
+    corners = buffers.positions[buffers.loops].astype(np.float64)
+    next_loops = next_loop_indices(buffers.loop_starts, buffers.loop_totals)
+    normals = np.add.reduceat(np.cross(corners, corners[next_loops]), buffers.loop_starts, axis=0)
+    areas = 0.5 * np.linalg.norm(normals, axis=1)
+    normals /= np.maximum(2.0 * areas, 1e-30)[:, None]
+    total_area = max(float(areas.sum()), 1e-30)
+    first, second, boundary = face_adjacency(buffers)
+
+    # Valence of every vertex, counted in polygons, and how many of them are quads or triangles
+    quads = buffers.loop_totals == 4
+    valence = np.bincount(buffers.loops, minlength=len(buffers.positions))
+    quad_valence = np.bincount(buffers.loops, weights=np.repeat(quads, buffers.loop_totals), minlength=len(buffers.positions))
+    triangle_valence = np.bincount(buffers.loops, weights=np.repeat(buffers.loop_totals == 3, buffers.loop_totals), minlength=len(buffers.positions))
+    inner = ~boundary & (valence > 0)
+    regular = inner & (valence == 4) & (quad_valence == 4)
+    poles = inner & (valence >= POLE_VALENCE) & (triangle_valence == valence)
+
+    # Flat clusters: neighbours within `flatness` of each other, kept when every polygon is within it of the cluster normal
+    dots = np.einsum('ij,ij->i', normals[first], normals[second])
+    flat = dots >= flatness
+    labels = connected_components(count, first[flat], second[flat])
+    sizes = np.bincount(labels)
+    cluster_normals = np.stack([np.bincount(labels, weights=normals[:, axis] * areas) for axis in range(3)], axis=1)
+    cluster_normals /= np.maximum(np.linalg.norm(cluster_normals, axis=1), 1e-30)[:, None]
+    deviation = np.einsum('ij,ij->i', normals, cluster_normals[labels])
+    worst = np.ones(len(sizes))
+    np.minimum.at(worst, labels, deviation)
+    planar = (sizes[labels] >= 2) & (worst[labels] >= flatness)
+
+    # Scatter of the normal changes towards every neighbour: a polygon on a tube bends along one axis only,
+    # one on a sphere along two
+    differences = normals[second] - normals[first]
+    scatter = {}
+    for i, j in ((0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (0, 2)):
+        weights = differences[:, i] * differences[:, j]
+        scatter[i, j] = np.bincount(first, weights=weights, minlength=count) + np.bincount(second, weights=weights, minlength=count)
+    # The changes are close to perpendicular to the normal, so the scatter has two eigenvalues that matter:
+    # their sum is its trace and their product the sum of its principal 2x2 minors
+    trace = scatter[0, 0] + scatter[1, 1] + scatter[2, 2]
+    minors = sum(scatter[i, i] * scatter[j, j] - scatter[i, j] ** 2 for i, j in ((0, 1), (1, 2), (0, 2)))
+    root = np.sqrt(np.maximum(trace ** 2 - 4.0 * minors, 0.0))
+    bending = dots < BEND_DOT
+    bends = np.bincount(first[bending], minlength=count) + np.bincount(second[bending], minlength=count)
+    sharp = dots < SHARP_DOT
+    sharp_edges = np.bincount(first[sharp], minlength=count) + np.bincount(second[sharp], minlength=count)
+    cylindrical = (bends >= 2) & (sharp_edges == 0) & (trace - root < CYLINDER_ANISOTROPY * (trace + root))
+
+    _, cosines = corner_geometry(corners.T.astype(np.float32), PolygonLoops(buffers.loop_starts, buffers.loop_totals))
+    right_angles = np.abs(cosines) < RIGHT_ANGLE_COS
+
+    return {
+        "polygons": count,
+        "quad_ratio": float(quads.mean()) if count else 0.0,
+        "valence": np.bincount(valence[inner]).tolist(),
+        "extraordinary": float(np.mean(valence[inner] != 4)) if inner.any() else 0.0,
+        "regular_vertices": int(regular.sum()),
+        "poles": int(poles.sum()),
+        "planar_share": float(areas[planar].sum()) / total_area,
+        "cylindricity": float(areas[cylindrical].sum()) / total_area,
+        "right_angles": int(right_angles.sum()),
+    }
+
+def choose_options(settings: types.SimpleNamespace, features: dict) -> tuple[types.SimpleNamespace, list[str]]:
+    """
+    Returns a copy of `settings` with the detectors turned off that have nothing to find in a mesh with `features`,
+    and the names of the ones it turned off.
+    """
+    absent = {
+        "grids": features["quad_ratio"] < MIN_QUAD_RATIO or not features["regular_vertices"],
+        "patches": features["quad_ratio"] < MIN_QUAD_RATIO or not features["regular_vertices"],
+        "strips": features["quad_ratio"] < MIN_QUAD_RATIO,
+        "planes": features["planar_share"] < MIN_PLANAR_SHARE,
+        "tubes": features["cylindricity"] < MIN_CYLINDRICITY,
+        # Junctions join tubes
+        "junctions": features["cylindricity"] < MIN_CYLINDRICITY,
+        "cones": not features["poles"],
+        "squares": not features["right_angles"],
+    }
+    skipped = [name for name in DETECTOR_COST if absent[name] and getattr(settings, name)]
+    return types.SimpleNamespace(**{**vars(settings), **{name: False for name in skipped}}), skipped
+
+def skipped_share(skipped: list[str]) -> float:
+    """
+    Estimated share of MoF's time the `skipped` detectors would have taken.
+    """
+    return sum(DETECTOR_COST[name] for name in skipped)
+
+def estimated_saving(skipped: list[str], seconds: float) -> float:
+    # `seconds` is the time MoF took without them
+    share = min(skipped_share(skipped), 0.9)
+    return seconds * share / (1.0 - share)
+
+def arguments(settings: types.SimpleNamespace, buffers: MeshBuffers) -> tuple[list[str], dict, list[str]]:
+    """
+    Analyzes `buffers` and returns MoF's arguments for `settings` without the detectors the mesh doesn't need,
+    the measured features and the detectors turned off.
+    """
+    features = analyze(buffers, settings.flatness)
+    settings, skipped = choose_options(settings, features)
+    return command_line_arguments(assemble_options_command_line(settings)), features, skipped
+
+def describe(features: dict, skipped: list[str]) -> str:
+    summary = f"{features['quad_ratio']:.0%} quads, {features['planar_share']:.0%} planar, {features['cylindricity']:.0%} cylindrical"
+    if not skipped:
+        return f"{summary}, running every detector"
+    return f"{summary}, skipping {', '.join(skipped)} (about {skipped_share(skipped):.0%} of MoF's time)"
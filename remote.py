@@ -0,0 +1,245 @@
+# Remote backend: MoF jobs sent to job servers (see server.py) on other machines, run locally when none answers
+
+import gzip
+import http.client
+import itertools
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from . import core
+
+# Seconds between status requests while a job runs remotely
+POLL_INTERVAL = 0.5
+# Seconds to wait for a server to answer a single request
+REQUEST_TIMEOUT = 10.0
+# Seconds a health check waits, kept short as it runs before every unwrap
+HEALTH_TIMEOUT = 2.0
+
+# Errors that mean the server or the network failed, not MoF
+TRANSIENT_ERRORS = (urllib.error.URLError, http.client.HTTPException, ConnectionError, TimeoutError)
+
+class RemoteError(Exception):
+    pass
+
+# Job servers a run sends its jobs to, and how
+class RemoteBackend:
+    def __init__(self, servers: list[str], token: str = "", retries: int = 2, compression: int = 6):
+        self.servers = [server.rstrip("/") for server in servers]
+        self.token = token
+        self.retries = retries
+        # gzip level of uploads, 0 to send them uncompressed
+        self.compression = compression
+        self.workers: dict[str, int] = {}
+        # Set once the health check finished, jobs wait for it before picking a server
+        self.checked = threading.Event()
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_preferences(cls, preferences) -> "RemoteBackend | None":
+        servers = [server.strip() for server in preferences.remote_servers.split(",") if server.strip()]
+        if not preferences.use_remote or not servers:
+            return None
+        return cls(servers, preferences.remote_token, preferences.remote_retries, preferences.remote_compression)
+
+    def request(self, method: str, url: str, data: bytes | None = None, headers: dict | None = None, timeout: float = REQUEST_TIMEOUT) -> tuple[bytes, dict]:
+        headers = dict(headers or {})
+        if self.token:
+            headers["X-MoF-Token"] = self.token
+        request = urllib.request.Request(url, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.read(), dict(response.headers)
+        except urllib.error.HTTPError as e:
+            # 5xx are worth retrying elsewhere, 4xx are refusals of this request
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except (ValueError, OSError):
+                message = e.reason
+            if e.code >= 500:
+                raise ConnectionError(f"{url}: {e.code} {message}") from e
+            raise RemoteError(f"{url}: {message}") from e
+
+    def check(self) -> int:
+        """
+        Asks every server for its worker count and returns the total of the ones that answered.
+        """
+        self.workers.clear()
+        for server in self.servers:
+            try:
+                body, _ = self.request("GET", f"{server}/health", timeout=HEALTH_TIMEOUT)
+                self.workers[server] = int(json.loads(body)["workers"])
+            except (*TRANSIENT_ERRORS, RemoteError, ValueError, KeyError) as e:
+                print(f"MoF remote {server} unavailable: {e}")
+        return sum(self.workers.values())
+
+    def start_check(self, on_done=None):
+        """
+        Runs `check` on its own thread, so unreachable servers don't block the caller, and passes the total to `on_done`.
+        """
+        def run():
+            try:
+                workers = self.check()
+                if on_done is not None:
+                    on_done(workers)
+            finally:
+                self.checked.set()
+        threading.Thread(target=run, daemon=True).start()
+
+    def pick(self, exclude: set[str]) -> str | None:
+        # Round robin over the servers that answered, weighted by their worker count
+        candidates = [server for server, workers in self.workers.items() if server not in exclude for _ in range(workers)]
+        if not candidates:
+            candidates = [server for server in self.servers if server not in exclude]
+        if not candidates:
+            return None
+        with self._lock:
+            return candidates[next(self._next) % len(candidates)]
+
+# A MoF job run by a job server, falling back to a local process when no server can take it
+class RemoteMofJob(core.MofJob):
+    def __init__(self, name: str, command: list[str], input_path: str, output_path: str, backend: RemoteBackend):
+        super().__init__(name, command, input_path, output_path)
+        self.backend = backend
+        self.server = ""
+        self.remote_id = ""
+        self.fallback = False
+        self.thread: threading.Thread | None = None
+        self.cancelled = threading.Event()
+
+    @classmethod
+    def from_job(cls, job: core.MofJob, backend: RemoteBackend) -> "RemoteMofJob":
+        remote = cls(job.name, job.command, job.input_path, job.output_path, backend)
+        remote.chunk = job.chunk
+        remote.variant = job.variant
+        remote.faces = job.faces
+        remote.quad_ratio = job.quad_ratio
+        # Memory is the job server's concern
+        remote.predicted_seconds = job.predicted_seconds
+        return remote
+
+    def start(self, limits: core.ResourceLimits | None = None):
+        self.limits = limits
+        self.started_at = time.perf_counter()
+        self.thread = threading.Thread(target=self.run_remote, daemon=True)
+        self.thread.start()
+
+    def run_remote(self):
+        try:
+            with open(self.input_path, 'rb') as file:
+                data = file.read()
+            if self.backend.compression:
+                data = gzip.compress(data, compresslevel=self.backend.compression)
+        except OSError as e:
+            self.error = f"Failed to read the MoF input: {e}"
+            self.returncode = -1
+            return
+        while not self.backend.checked.wait(POLL_INTERVAL):
+            if self.cancelled.is_set():
+                return
+        if not self.backend.workers:
+            self.fallback = True
+            return
+
+        failed: set[str] = set()
+        for attempt in range(self.backend.retries + 1):
+            if self.cancelled.is_set():
+                return
+            self.server = self.backend.pick(failed)
+            if self.server is None:
+                break
+            try:
+                self.run_on_server(data)
+                return
+            except TRANSIENT_ERRORS as e:
+                print(f"MoF [{self.name}] remote attempt {attempt + 1} on {self.server} failed: {e}")
+                failed.add(self.server)
+                # The server may still hold the job if only the connection broke
+                self.cancel_remote()
+                self.remote_id = ""
+                # Give a restarting server a moment before the next attempt
+                self.cancelled.wait(min(2.0 ** attempt * 0.5, 8.0))
+            except (RemoteError, ValueError, KeyError) as e:
+                self.error = f"MoF server refused the job: {e}"
+                self.returncode = -1
+                return
+        self.fallback = True
+
+    def run_on_server(self, data: bytes):
+        headers = {"Content-Type": "text/plain", "X-MoF-Arguments": json.dumps(self.arguments)}
+        if self.backend.compression:
+            headers["Content-Encoding"] = "gzip"
+        body, _ = self.backend.request("POST", f"{self.server}/jobs", data, headers)
+        self.remote_id = json.loads(body)["id"]
+        print(f"MoF [{self.name}] sent to {self.server} as job {self.remote_id}")
+
+        while not self.cancelled.wait(POLL_INTERVAL):
+            body, _ = self.backend.request("GET", f"{self.server}/jobs/{self.remote_id}")
+            status = json.loads(body)
+            self.last_line = status.get("last_line") or self.last_line
+            if self.limits and self.limits.timeout and time.perf_counter() - self.started_at > self.limits.timeout:
+                self.error = f"MoF timed out after {self.limits.timeout:g} s"
+                self.cancel_remote()
+                self.returncode = -1
+                return
+            if status["state"] in ("done", "failed"):
+                break
+        else:
+            # Killed while MoF ran remotely
+            self.cancel_remote()
+            return
+
+        self.returncode = status["returncode"] if status["returncode"] is not None else -1
+        if status["state"] == "failed":
+            self.error = status.get("error", "")
+            return
+        body, headers = self.backend.request("GET", f"{self.server}/jobs/{self.remote_id}/result")
+        if headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        with open(self.output_path, 'wb') as file:
+            file.write(body)
+
+    def cancel_remote(self):
+        if self.remote_id:
+            try:
+                self.backend.request("DELETE", f"{self.server}/jobs/{self.remote_id}", timeout=HEALTH_TIMEOUT)
+            except (*TRANSIENT_ERRORS, RemoteError):
+                pass
+
+    def poll(self) -> int | None:
+        if self.process is not None:
+            # Fell back to a local MoF process
+            return super().poll()
+        if self.returncode is not None and self.finished_at:
+            return self.returncode
+        if self.thread is None or self.thread.is_alive():
+            return None
+        self.thread.join()
+        if self.fallback and not self.cancelled.is_set():
+            print(f"MoF [{self.name}] no job server reachable, running MoF locally")
+            super().start(self.limits)
+            return self.poll() if self.process is not None else self.returncode
+        if self.returncode is None:
+            self.returncode = -1
+        self.finished_at = time.perf_counter()
+        if not self.error:
+            self.error = self.result_error()
+        return self.returncode
+
+    def kill(self):
+        if self.process is not None:
+            super().kill()
+            return
+        # The thread cancels the remote job itself, joining it could block on a slow server
+        self.cancelled.set()
+
+def offload(jobs: list[core.MofJob], backend: RemoteBackend | None) -> list[core.MofJob]:
+    """
+    Returns `jobs` as remote jobs when a backend is set.
+    """
+    if backend is None:
+        return jobs
+    return [RemoteMofJob.from_job(job, backend) for job in jobs]
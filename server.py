@@ -0,0 +1,300 @@
+# Reference MoF job server: runs MoF for the add-on's remote backend on a machine with spare CPUs.
+# Plain Python, no Blender needed:
+#
+#   python server.py --mof /path/to/UnWrapConsole3.exe --workers 8 --host 0.0.0.0 --port 8642
+#
+#   POST   /jobs             gzip OBJ body, JSON list of MoF options in X-MoF-Arguments -> {"id": ...}
+#   GET    /jobs/<id>        {"state": "queued" | "running" | "done" | "failed", "returncode", "last_line", ...}
+#   GET    /jobs/<id>/result gzip OBJ written by MoF, the job is removed once fetched
+#   DELETE /jobs/<id>        cancels the job
+#   GET    /health           {"workers", "queued", "running"}
+
+import argparse
+import gzip
+import hmac
+import itertools
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds a finished job's result is kept for the client to fetch
+RESULT_TTL = 3600
+# Bytes inflated at a time from a gzip upload
+INFLATE_CHUNK = 1 << 20
+
+class UploadTooLarge(Exception):
+    pass
+
+def inflate(data: bytes, limit: int) -> bytes:
+    """
+    Decompresses the gzip `data` a chunk at a time, failing as soon as the output grows beyond `limit` bytes (0 for no limit).
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    chunks, size = [], 0
+    while data:
+        chunk = decompressor.decompress(data, INFLATE_CHUNK)
+        size += len(chunk)
+        if limit and size > limit:
+            raise UploadTooLarge(f"Uploads are limited to {limit / 2**20:.0f} MB uncompressed")
+        chunks.append(chunk)
+        data = decompressor.unconsumed_tail
+        if decompressor.eof:
+            break
+    if not decompressor.eof:
+        raise ValueError("Truncated gzip upload")
+    return b"".join(chunks)
+
+# One uploaded mesh and the MoF process working on it
+class Job:
+    def __init__(self, number: int, directory: str, arguments: list[str]):
+        self.id = f"{number}-{os.urandom(4).hex()}"
+        self.directory = directory
+        self.arguments = arguments
+        self.state = "queued"
+        self.process: subprocess.Popen | None = None
+        self.returncode: int | None = None
+        self.last_line = ""
+        self.error = ""
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.cancelled = False
+
+    @property
+    def input_path(self) -> str:
+        return os.path.join(self.directory, "input.obj")
+
+    @property
+    def output_path(self) -> str:
+        return os.path.join(self.directory, "output.obj")
+
+    def status(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "returncode": self.returncode,
+            "last_line": self.last_line,
+            "error": self.error,
+            "seconds": (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0,
+        }
+
+# Queue of jobs worked off by a fixed number of MoF processes
+class JobServer:
+    def __init__(self, mof_exec: str, workers: int, scratch: str, timeout: float = 0.0, max_upload: int = 0, token: str = ""):
+        self.mof_exec = mof_exec
+        self.workers = workers
+        self.scratch = scratch
+        self.timeout = timeout
+        self.max_upload = max_upload
+        self.token = token
+        self.jobs: dict[str, Job] = {}
+        self.queue: queue.Queue[Job] = queue.Queue()
+        self.lock = threading.Lock()
+        self._numbers = itertools.count(1)
+        for _ in range(workers):
+            threading.Thread(target=self.work, daemon=True).start()
+
+    def submit(self, data: bytes, arguments: list[str]) -> Job:
+        job = Job(next(self._numbers), tempfile.mkdtemp(prefix="job_", dir=self.scratch), arguments)
+        with open(job.input_path, 'wb') as file:
+            file.write(data)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.queue.put(job)
+        return job
+
+    def work(self):
+        while True:
+            job = self.queue.get()
+            if not job.cancelled:
+                self.run(job)
+
+    def run(self, job: Job):
+        job.state = "running"
+        job.started_at = time.time()
+        try:
+            job.process = subprocess.Popen([self.mof_exec, job.input_path, job.output_path] + job.arguments, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace')
+            killer = threading.Timer(self.timeout, job.process.kill) if self.timeout else None
+            if killer:
+                killer.start()
+            for line in job.process.stdout:
+                if line.strip():
+                    job.last_line = line.strip()
+            job.returncode = job.process.wait()
+            if killer:
+                killer.cancel()
+            if self.timeout and time.time() - job.started_at >= self.timeout and job.returncode != 0:
+                job.error = f"MoF timed out after {self.timeout:g} s"
+        except OSError as e:
+            job.error = f"Failed to start MoF: {e}"
+            job.returncode = -1
+        job.finished_at = time.time()
+        job.state = "done" if job.returncode == 0 and os.path.exists(job.output_path) and not job.cancelled else "failed"
+        print(f"MoF job {job.id}: {job.state} in {job.finished_at - job.started_at:.1f} s" + (f" ({job.error or job.last_line})" if job.state == "failed" else ""))
+
+    def cancel(self, job: Job):
+        job.cancelled = True
+        if job.process is not None and job.process.poll() is None:
+            job.process.kill()
+        self.remove(job)
+
+    def remove(self, job: Job):
+        with self.lock:
+            self.jobs.pop(job.id, None)
+        # A running job's files go once its process was killed and its directory is no longer in use
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+    def expire(self):
+        # Results nobody came back for
+        now = time.time()
+        with self.lock:
+            stale = [job for job in self.jobs.values() if job.finished_at and now - job.finished_at > RESULT_TTL]
+        for job in stale:
+            self.remove(job)
+
+    def health(self) -> dict:
+        with self.lock:
+            states = [job.state for job in self.jobs.values()]
+        return {"workers": self.workers, "queued": states.count("queued"), "running": states.count("running")}
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "MoFJobServer/1"
+
+    @property
+    def jobs(self) -> JobServer:
+        return self.server.jobs
+
+    def send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def authorized(self) -> bool:
+        if self.jobs.token and not hmac.compare_digest(self.headers.get("X-MoF-Token", ""), self.jobs.token):
+            self.send_json(403, {"error": "Wrong or missing token"})
+            return False
+        return True
+
+    def find_job(self, job_id: str) -> Job | None:
+        job = self.jobs.jobs.get(job_id)
+        if job is None:
+            self.send_json(404, {"error": f"No job {job_id}"})
+        return job
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        self.jobs.expire()
+        parts = self.path.strip("/").split("/")
+        if parts == ["health"]:
+            self.send_json(200, self.jobs.health())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self.find_job(parts[1])
+            if job is not None:
+                self.send_json(200, job.status())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+            job = self.find_job(parts[1])
+            if job is None:
+                return
+            if job.state != "done":
+                self.send_json(409, {"error": f"Job {job.id} is {job.state}"})
+                return
+            with open(job.output_path, 'rb') as file:
+                data = gzip.compress(file.read(), compresslevel=1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            self.jobs.remove(job)
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        if self.path.strip("/") != "jobs":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if self.jobs.max_upload and length > self.jobs.max_upload:
+            self.send_json(413, {"error": f"Uploads are limited to {self.jobs.max_upload / 2**20:.0f} MB"})
+            return
+        try:
+            arguments = json.loads(self.headers.get("X-MoF-Arguments", "[]"))
+            if not isinstance(arguments, list) or not all(isinstance(argument, str) for argument in arguments):
+                raise ValueError("X-MoF-Arguments must be a JSON list of strings")
+            data = self.rfile.read(length)
+            if self.headers.get("Content-Encoding") == "gzip":
+                # The limit applies to what lands on disk, a small gzip body can inflate to gigabytes
+                data = inflate(data, self.jobs.max_upload)
+        except UploadTooLarge as e:
+            self.send_json(413, {"error": str(e)})
+            return
+        except (ValueError, OSError, EOFError, zlib.error) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        job = self.jobs.submit(data, arguments)
+        print(f"MoF job {job.id}: queued, {len(data) / 2**20:.1f} MB")
+        self.send_json(202, job.status())
+
+    def do_DELETE(self):
+        if not self.authorized():
+            return
+        parts = self.path.strip("/").split("/")
+        job = self.find_job(parts[1]) if len(parts) == 2 and parts[0] == "jobs" else None
+        if job is not None:
+            self.jobs.cancel(job)
+            self.send_json(200, {"id": job.id, "state": "cancelled"})
+        elif len(parts) != 2 or parts[0] != "jobs":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def log_message(self, format, *args):
+        # Status polls would flood the console
+        pass
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run Ministry of Flat jobs sent by the Blender add-on's remote backend.")
+    parser.add_argument("--mof", required=True, help="Path of UnWrapConsole3.exe")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Maximum number of MoF processes running at the same time")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on, 0.0.0.0 to accept other machines")
+    parser.add_argument("--port", type=int, default=8642)
+    parser.add_argument("--timeout", type=float, default=0.0, help="Kill a MoF process after this many seconds, 0 for no limit")
+    parser.add_argument("--max-upload", type=int, default=1024, help="Largest accepted upload in MB, 0 for no limit")
+    parser.add_argument("--token", default=os.environ.get("MOF_SERVER_TOKEN", ""), help="Shared secret clients must send, defaults to $MOF_SERVER_TOKEN")
+    parser.add_argument("--scratch", default="", help="Directory for the job files, the temp directory by default")
+    return parser.parse_args(argv)
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
+    if not os.path.isfile(args.mof):
+        print(f"MoF executable not found: {args.mof}", file=sys.stderr)
+        return 1
+    scratch = tempfile.mkdtemp(prefix="mof_server_", dir=args.scratch or None)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    server.jobs = JobServer(args.mof, max(1, args.workers), scratch, args.timeout, args.max_upload * 2**20, args.token)
+    print(f"MoF job server on {args.host}:{args.port} with {server.jobs.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        shutil.rmtree(scratch, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
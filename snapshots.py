@@ -0,0 +1,87 @@
+# In-memory UV snapshots of every run, so earlier results can be brought back without undo or another MoF run
+
+import collections
+import itertools
+import time
+import numpy as np
+
+# One layout of one object
+class Snapshot:
+    def __init__(self, number: int, name: str, options: list[str] | None, uvs: np.ndarray, metrics: dict | None = None):
+        self.number = number
+        self.name = name
+        # MoF command line the layout was made with, None for the UVs the object had before
+        self.options = options
+        self.uvs = uvs
+        self.metrics = dict(metrics or {})
+        self.created = time.time()
+
+    @property
+    def size(self) -> int:
+        return self.uvs.nbytes
+
+    @property
+    def label(self) -> str:
+        stamp = time.strftime("%H:%M:%S", time.localtime(self.created))
+        if self.options is None:
+            return f"{stamp} Before MoF"
+        if "coverage" in self.metrics:
+            return f"{stamp} #{self.number} {self.metrics['coverage']:.1%} coverage"
+        return f"{stamp} #{self.number}"
+
+# Snapshots of all objects, the least recently used dropped once they take more than `max_size` bytes
+class SnapshotStore:
+    def __init__(self, max_size: int = 256 * 2**20, compact: bool = False):
+        self.max_size = max_size
+        # float16 halves the memory, at about 1/2000 of the UV square of precision
+        self.compact = compact
+        self.snapshots: collections.OrderedDict[tuple[str, str], Snapshot] = collections.OrderedDict()
+        # Snapshot last written to every object
+        self.current: dict[str, int] = {}
+        self._numbers = itertools.count(1)
+
+    @property
+    def size(self) -> int:
+        return sum(snapshot.size for snapshot in self.snapshots.values())
+
+    def add(self, name: str, options: list[str] | None, uvs: np.ndarray, metrics: dict | None = None) -> Snapshot:
+        """
+        Stores the per-loop `uvs` of object `name`, replacing an earlier snapshot made with the same options.
+        """
+        key = (name, " ".join(options) if options is not None else "")
+        self.snapshots.pop(key, None)
+        snapshot = Snapshot(next(self._numbers), name, options, np.array(uvs, dtype=np.float16 if self.compact else np.float32), metrics)
+        self.snapshots[key] = snapshot
+        self.current[name] = snapshot.number
+        self.evict()
+        return snapshot
+
+    def evict(self):
+        total = self.size
+        while total > self.max_size and len(self.snapshots) > 1:
+            _, snapshot = self.snapshots.popitem(last=False)
+            total -= snapshot.size
+
+    def of_object(self, name: str) -> list[Snapshot]:
+        return sorted((snapshot for snapshot in self.snapshots.values() if snapshot.name == name), key=lambda snapshot: snapshot.created)
+
+    def find(self, name: str, number: int) -> Snapshot | None:
+        for key, snapshot in self.snapshots.items():
+            if snapshot.name == name and snapshot.number == number:
+                # Restoring counts as use
+                self.snapshots.move_to_end(key)
+                return snapshot
+        return None
+
+    def has_original(self, name: str) -> bool:
+        return (name, "") in self.snapshots
+
+    def clear(self, name: str | None = None):
+        for key in [key for key in self.snapshots if name is None or key[0] == name]:
+            del self.snapshots[key]
+        if name is None:
+            self.current.clear()
+        else:
+            self.current.pop(name, None)
+
+store = SnapshotStore()
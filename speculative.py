@@ -0,0 +1,191 @@
+# Speculative pre-unwrap: once an edited mesh has settled, unwrap it in the background with the options of the
+# last run and keep the result in the cache, so the next Unwrap applies it right away or picks up the running job
+
+import bpy
+import time
+import types
+
+from bpy.app.handlers import persistent
+from . import core
+from . import lod
+from . import preflight
+from .cache import UVCache, geometry_cache_key
+
+# Never compete with the artist for CPU time
+MINIMUM_NICE = 10
+
+# Seconds between checks while meshes are settling or jobs are running
+TICK = 0.5
+
+# Options of the last run of the operator, None until it ran once in this session
+last_settings: dict | None = None
+
+# Time of the last geometry update of every edited mesh object, by name
+pending: dict[str, float] = {}
+
+# Background job of every object being pre-unwrapped, with its cache key, the exported buffers its UVs map onto
+# and the original ones they are projected onto when modifiers were applied
+jobs: dict[str, tuple[str, core.MofJob, tuple[core.MeshBuffers, core.MeshBuffers | None]]] = {}
+
+pool: core.MofJobPool | None = None
+
+# Geometry of every mesh object when the add-on last wrote its UVs, by name. Writing UVs updates the mesh like an
+# edit does, an unchanged fingerprint tells the two apart
+written: dict[str, bytes] = {}
+
+def addon_preferences():
+    return bpy.context.preferences.addons[__package__].preferences
+
+def remember(settings: dict):
+    """
+    Keeps the operator options pre-unwraps run with.
+    """
+    global last_settings
+    last_settings = settings
+
+def supported(settings: dict) -> bool:
+    # Partial, mirrored, tiled and swept runs look their results up under other keys, or not at all
+    return not settings["selection_only"] and settings["symmetry"] == 'NONE' and not settings["sweep"] and not settings["udim_tiles"]
+
+def ignore_uv_update(obj: bpy.types.Object):
+    """
+    Keeps the geometry update that writing the UVs of `obj` causes from starting a pre-unwrap.
+    """
+    preferences = addon_preferences()
+    if preferences.speculative_unwrap and preferences.use_cache:
+        written[obj.name] = core.mesh_fingerprint(obj.data)
+
+def uvs_only(obj: bpy.types.Object) -> bool:
+    # Modifiers change the exported geometry without touching the mesh
+    if obj.name not in written or (last_settings["apply_modifiers"] and core.modified(obj)):
+        return False
+    return written[obj.name] == core.mesh_fingerprint(obj.data)
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    preferences = addon_preferences()
+    if not preferences.speculative_unwrap or not preferences.use_cache or last_settings is None:
+        return
+    now = time.monotonic()
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and isinstance(update.id, bpy.types.Object) and update.id.type == 'MESH':
+            pending[update.id.original.name] = now
+    if pending and not bpy.app.timers.is_registered(tick):
+        bpy.app.timers.register(tick, first_interval=TICK)
+
+@persistent
+def on_load(*args):
+    cancel()
+
+def take(key: str) -> core.MofJob | None:
+    """
+    Hands over the running pre-unwrap job for cache key `key`, if any, to be finished by the caller.
+    """
+    for name, (job_key, job, _) in list(jobs.items()):
+        if job_key == key and pool.remove(job):
+            del jobs[name]
+            return job
+    return None
+
+def cancel():
+    global pool
+    pending.clear()
+    written.clear()
+    jobs.clear()
+    if pool is not None:
+        for job in pool.cancel():
+            job.cleanup()
+        pool = None
+
+def start(context, obj: bpy.types.Object, preferences):
+    global pool
+    settings = types.SimpleNamespace(**last_settings)
+    options = core.command_line_arguments(core.assemble_options_command_line(settings))
+    apply_modifiers = settings.apply_modifiers and core.modified(obj)
+    buffers = core.MeshBuffers.from_object(context, obj, apply_modifiers, settings.use_normal)
+    if not len(buffers.loop_totals) or (settings.split_chunks and len(buffers.loop_totals) > settings.chunk_size):
+        return
+    if settings.preflight:
+        options = preflight.arguments(settings, buffers)[0]
+    key = geometry_cache_key(buffers, options, len(obj.data.loops))
+
+    previous = jobs.pop(obj.name, None)
+    if previous is not None:
+        if previous[0] == key:
+            jobs[obj.name] = previous
+            return
+        # The mesh changed again while MoF was running, its result is of no use any more
+        previous[1].kill()
+        pool.remove(previous[1])
+        previous[1].cleanup()
+    if UVCache.from_preferences(preferences).get(key, len(obj.data.loops)) is not None:
+        return
+
+    if pool is None:
+        limits = core.ResourceLimits.from_preferences(preferences)
+        limits.nice = max(limits.nice, MINIMUM_NICE)
+        pool = core.MofJobPool(1, limits)
+    original = core.MeshBuffers.from_object(context, obj) if apply_modifiers else None
+    jobs[obj.name] = (key, core.create_job(obj.name, buffers, preferences.mof_executable, options), (buffers, original))
+    pool.submit(jobs[obj.name][1])
+    print(f"MoF {obj.name}: pre-unwrapping in the background")
+
+def finish(job: core.MofJob, preferences):
+    entry = jobs.pop(job.name, None)
+    try:
+        if entry is None or job.error:
+            return
+        key, _, (exported, original) = entry
+        uvs = core.map_uvs_to_loops(core.MofResult.read(job.output_path), exported)
+        if original is not None:
+            uvs = lod.transfer_buffer_uvs(exported, uvs, original)
+        UVCache.from_preferences(preferences).put(key, uvs)
+        print(f"MoF {job.name}: pre-unwrap ready")
+    except Exception as e:
+        print(f"MoF {job.name}: pre-unwrap failed: {e}")
+    finally:
+        job.cleanup()
+
+def tick() -> float | None:
+    """
+    Timer callback: starts pre-unwraps of meshes that settled and caches finished ones.
+    """
+    preferences = addon_preferences()
+    if not preferences.speculative_unwrap or not preferences.use_cache or last_settings is None or not supported(last_settings) or core.executable_error(preferences.mof_executable):
+        cancel()
+        return None
+
+    context = bpy.context
+    now = time.monotonic()
+    for name, updated in list(pending.items()):
+        obj = bpy.data.objects.get(name)
+        if obj is None or obj.type != 'MESH':
+            del pending[name]
+        # Edit mode changes only reach the mesh when leaving it, which counts as another update
+        elif now - updated >= preferences.speculative_delay and obj.mode != 'EDIT':
+            del pending[name]
+            if uvs_only(obj):
+                # Only the add-on's own UVs changed, the geometry is unwrapped already
+                continue
+            try:
+                start(context, obj, preferences)
+            except Exception as e:
+                print(f"MoF {name}: pre-unwrap failed: {e}")
+
+    if pool is not None:
+        for job in pool.update():
+            finish(job, preferences)
+    if pending or (pool is not None and pool.busy):
+        return TICK
+    return None
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.load_pre.append(on_load)
+
+def unregister():
+    bpy.app.handlers.load_pre.remove(on_load)
+    bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    if bpy.app.timers.is_registered(tick):
+        bpy.app.timers.unregister(tick)
+    cancel()
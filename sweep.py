@@ -0,0 +1,123 @@
+# Parameter sweeps: MoF runs with several option sets on the same mesh, keeping the best scoring layout
+
+import bpy
+import itertools
+import os
+import random
+import types
+import numpy as np
+
+# Values tried per swept option, the most influential first so that small grids vary those
+SWEEP_SPACE = {
+    "relax_iterations": [25, 50, 100, 200],
+    "packing_iterations": [2, 4, 8],
+    "rasterization": [32, 64, 128],
+    "cones": [True, False],
+    "tubes": [True, False],
+    "strips": [True, False],
+    "grids": [True, False],
+    "patches": [True, False],
+    "planes": [True, False],
+    "soft_unfold": [True, False],
+    "cut": [True, False],
+    "stretch": [True, False],
+    "match": [True, False],
+}
+
+# Operator properties that describe how to run, not how to unwrap, and stay out of presets
+NOT_PRESET = {
+    "expand_optinos", "selected_objects", "run_in_background", "selection_only", "context_rings",
+    "sweep", "sweep_method", "sweep_samples", "reuse_seams",
+    # Deprecated alias of layout_mode
+    "auto_reunwrap",
+}
+
+def operator_settings(operator) -> dict:
+    """
+    Returns the value of every property declared on `operator`, vectors as tuples.
+    """
+    settings = {}
+    for name in type(operator).__annotations__:
+        value = getattr(operator, name)
+        settings[name] = value if isinstance(value, (bool, int, float, str)) else tuple(value)
+    return settings
+
+def sample_variants(settings: dict, method: str, samples: int, seed: int = 0) -> list[dict]:
+    """
+    Returns up to `samples` option sets: `settings` first, then a grid varying the leading options
+    of SWEEP_SPACE fastest (`'GRID'`) or random picks from all of it (`'RANDOM'`).
+    """
+    if method == 'GRID':
+        # Start every axis at the current value, so options the grid doesn't reach keep it
+        names = list(reversed(SWEEP_SPACE))
+        axes = [sorted(SWEEP_SPACE[name], key=lambda value, name=name: value != settings.get(name)) for name in names]
+        combinations = itertools.product(*axes)
+    else:
+        rng = random.Random(seed)
+        names = list(SWEEP_SPACE)
+        combinations = (tuple(rng.choice(values) for values in SWEEP_SPACE.values()) for _ in range(samples * 4))
+
+    variants = [dict(settings)]
+    for combination in combinations:
+        if len(variants) >= samples:
+            break
+        variant = {**settings, **dict(zip(names, combination))}
+        if variant not in variants:
+            variants.append(variant)
+    return variants
+
+def variant_arguments(core, variant: dict) -> list[str]:
+    return core.command_line_arguments(core.assemble_options_command_line(types.SimpleNamespace(**variant)))
+
+# Scores of every option set tried on one object
+class Sweep:
+    def __init__(self, variants: list[dict]):
+        self.variants = variants
+        self.scores: dict[int, dict[str, float]] = {}
+        self.errors: dict[int, str] = {}
+        self.best: int | None = None
+        self.best_uvs: np.ndarray | None = None
+
+    @property
+    def done(self) -> bool:
+        return len(self.scores) + len(self.errors) == len(self.variants)
+
+    def add(self, variant: int, uvs: np.ndarray, scores: dict[str, float]):
+        self.scores[variant] = scores
+        if self.best is None or scores["score"] > self.scores[self.best]["score"]:
+            self.best = variant
+            self.best_uvs = uvs
+
+    def fail(self, variant: int, error: str):
+        self.errors[variant] = error
+
+    def changes(self, variant: int) -> dict:
+        # Options that differ from the settings the sweep started from
+        return {name: value for name, value in self.variants[variant].items() if value != self.variants[0].get(name)}
+
+    def summary(self) -> list[str]:
+        lines = []
+        for variant in range(len(self.variants)):
+            changes = ", ".join(f"{name}={value}" for name, value in self.changes(variant).items()) or "current settings"
+            if variant in self.scores:
+                scores = self.scores[variant]
+                lines.append(f"{'*' if variant == self.best else ' '} {scores['score']:.4f} coverage {scores['coverage']:.3f} density variance {scores['density_variance']:.3f} area distortion {scores['area_distortion']:.3f}: {changes}")
+            else:
+                lines.append(f"  failed ({self.errors.get(variant, 'not run')}): {changes}")
+        return lines
+
+    def save_preset(self, name: str) -> str:
+        """
+        Writes the winning options as an operator preset, with the scores of every run as comments, and returns its path.
+        """
+        directory = bpy.utils.user_resource('SCRIPTS', path=os.path.join("presets", "operator", "uv.mof_unwrap"), create=True)
+        path = os.path.join(directory, bpy.path.clean_name(f"Sweep {name}") + ".py")
+        lines = [f"# MoF parameter sweep on {name}"]
+        lines += [f"# {line}" for line in self.summary()]
+        lines += ["import bpy", "op = bpy.context.active_operator", ""]
+        for option, value in self.variants[self.best].items():
+            if option not in NOT_PRESET:
+                lines.append(f"op.{option} = {value!r}")
+        with open(path, 'w') as file:
+            file.write("\n".join(lines) + "\n")
+        return path
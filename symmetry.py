@@ -0,0 +1,126 @@
+# Mirror symmetry detection, so MoF only has to unwrap one half of a symmetric mesh
+
+import bpy
+import numpy as np
+
+AXES = {'X': 0, 'Y': 1, 'Z': 2}
+
+# Below this share of mirrored faces, splitting the mesh isn't worth it
+MINIMUM_MIRRORED = 0.2
+
+def lookup(keys: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """
+    Returns the index in `keys` of every query, -1 for queries that aren't there.
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    positions = np.minimum(np.searchsorted(sorted_keys, queries), len(keys) - 1)
+    return np.where(sorted_keys[positions] == queries, order[positions], -1)
+
+def pack_cells(cells: np.ndarray) -> np.ndarray:
+    # One integer per grid cell, 21 bits per axis, hashed when the grid is larger than that
+    if cells.max() - cells.min() < 2**21:
+        cells = (cells - cells.min()).astype(np.uint64)
+        return (cells[:, 0] << np.uint64(42)) | (cells[:, 1] << np.uint64(21)) | cells[:, 2]
+    cells = cells.astype(np.uint64)
+    return cells[:, 0] * np.uint64(0x9E3779B97F4A7C15) ^ cells[:, 1] * np.uint64(0xC2B2AE3D27D4EB4F) ^ cells[:, 2] * np.uint64(0x165667B19E3779F9)
+
+def mirror_vertices(co: np.ndarray, axis: int, tolerance: float) -> np.ndarray:
+    """
+    Returns the vertex mirroring every vertex across the plane `axis` = 0 within `tolerance`, -1 where there is none.
+    """
+    cells = np.round(co / tolerance).astype(np.int64)
+    mirrored = cells.copy()
+    mirrored[:, axis] *= -1
+    packed = pack_cells(np.concatenate([cells, mirrored]))
+    return lookup(packed[:len(co)], packed[len(co):])
+
+def face_keys(vertex_ids: np.ndarray, loop_starts: np.ndarray) -> np.ndarray:
+    # Order independent hash of the vertex set of every polygon, collisions are caught when the loops are matched
+    hashed = (vertex_ids.astype(np.uint64) + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+    hashed ^= hashed >> np.uint64(29)
+    return np.add.reduceat(hashed, loop_starts) ^ np.bitwise_xor.reduceat(hashed * hashed, loop_starts)
+
+# Which polygons MoF unwraps and where the loops of the other half copy their UVs from
+class MirrorPlan:
+    def __init__(self, axis: int, kept: np.ndarray, kept_loops: np.ndarray, dropped_loops: np.ndarray, source_loops: np.ndarray):
+        self.axis = axis
+        self.kept = kept
+        self.kept_loops = kept_loops
+        self.dropped_loops = dropped_loops
+        self.source_loops = source_loops
+
+    @classmethod
+    def from_mesh(cls, mesh: bpy.types.Mesh, axis: str, tolerance: float) -> "MirrorPlan | None":
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        loops = np.empty(len(mesh.loops), dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", loops)
+        loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        return cls.detect(co.reshape(-1, 3), loops, loop_totals, axis, tolerance)
+
+    @classmethod
+    def detect(cls, co: np.ndarray, loops: np.ndarray, loop_totals: np.ndarray, axis: str, tolerance: float) -> "MirrorPlan | None":
+        """
+        Finds the polygons mirrored across the local X, Y or Z = 0 plane (`'AUTO'` tries all three) and keeps one half.
+        Returns None when too little of the mesh is symmetric.
+        """
+        if not len(loop_totals):
+            return None
+        candidates = list(AXES.values()) if axis == 'AUTO' else [AXES[axis]]
+        best = None
+        for candidate in candidates:
+            plan = cls._plan(co, loops, loop_totals, candidate, tolerance)
+            if best is None or len(plan.dropped_loops) > len(best.dropped_loops):
+                best = plan
+        dropped = len(loop_totals) - int(best.kept.sum())
+        if dropped < MINIMUM_MIRRORED * len(loop_totals) / 2:
+            return None
+        return best
+
+    @classmethod
+    def _plan(cls, co: np.ndarray, loops: np.ndarray, loop_totals: np.ndarray, axis: int, tolerance: float) -> "MirrorPlan":
+        count = len(loop_totals)
+        loop_starts = np.cumsum(loop_totals) - loop_totals
+        partners = mirror_vertices(co, axis, tolerance)
+
+        # Match every polygon to the polygon built from the mirrors of its vertices
+        loop_partners = partners[loops]
+        complete = np.minimum.reduceat(loop_partners, loop_starts) >= 0
+        face_partners = np.where(complete, lookup(face_keys(loops, loop_starts), face_keys(np.maximum(loop_partners, 0), loop_starts)), -1)
+        paired = face_partners >= 0
+        paired[paired] = face_partners[face_partners[paired]] == np.flatnonzero(paired)
+
+        # Of every pair keep the polygon on the positive side, polygons on the plane mirror themselves
+        centres = np.add.reduceat(co[loops, axis].astype(np.float64), loop_starts) / loop_totals
+        faces = np.arange(count)
+        partner_centres = centres[np.where(paired, face_partners, faces)]
+        dropped = paired & (face_partners != faces) & ((centres < partner_centres) | ((centres == partner_centres) & (faces > face_partners)))
+
+        # Find the loop of the kept polygon at the mirror of every dropped loop's vertex
+        loop_faces = np.repeat(faces, loop_totals)
+        dropped_loops = np.flatnonzero(dropped[loop_faces])
+        vertex_count = len(co)
+        sources = lookup(loop_faces.astype(np.int64) * vertex_count + loops, face_partners[loop_faces[dropped_loops]] * vertex_count + loop_partners[dropped_loops])
+        found = sources >= 0
+
+        # Polygons whose loops don't line up with their mirror are unwrapped after all
+        broken = np.zeros(count, dtype=bool)
+        broken[loop_faces[dropped_loops[~found]]] = True
+        dropped &= ~broken
+        still_dropped = dropped[loop_faces[dropped_loops]]
+        return cls(axis, ~dropped, ~dropped[loop_faces], dropped_loops[still_dropped], sources[still_dropped])
+
+    def expand(self, uvs: np.ndarray, mode: str) -> np.ndarray:
+        """
+        Returns the UVs of every loop from `uvs`, the UVs of the kept polygons' loops.
+        The mirrored half overlaps the kept half (`'OVERLAP'`) or is flipped beside it (`'MIRROR'`) for repacking.
+        """
+        full = np.empty((len(self.kept_loops), 2), dtype=np.float32)
+        full[self.kept_loops] = uvs
+        mirrored = full[self.source_loops]
+        if mode == 'MIRROR':
+            mirrored[:, 0] = 2.0 - mirrored[:, 0]
+        full[self.dropped_loops] = mirrored
+        return full
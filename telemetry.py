@@ -0,0 +1,137 @@
+# Per-stage timings of MoF runs, shown in the side panel and appended to a JSONL log
+
+import bpy
+import contextlib
+import datetime
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+# Stages in the order they run, an unwrap served from the cache skips export and mof
+STAGES = ("export", "preflight", "mof", "import", "apply", "relayout", "metrics")
+
+# Most recent run of every object, keyed by object name
+last_runs: dict[str, dict] = {}
+
+# Everything measured while unwrapping one object
+class RunRecord:
+    def __init__(self, name: str, polygons: int, options: list[str]):
+        self.name = name
+        self.polygons = polygons
+        self.options = options
+        self.stages: dict[str, float] = {}
+        # Peak Python/NumPy allocations per stage, only measured while tracemalloc is tracing
+        self.memory: dict[str, int] = {}
+        self.cached = False
+        # Blender re-flattened the seams of the last MoF run instead of running MoF
+        self.reused_seams = False
+        self.input_size = 0
+        self.output_size = 0
+        self.exit_code: int | None = None
+        self.peak_memory = 0
+        self.cpu_time = 0.0
+        self.jobs = 0
+        # Faces and quad ratio of what MoF unwrapped, and the wall time and peak memory the cost model expected
+        self.faces = 0
+        self.quad_ratio = 0.0
+        self.predicted_seconds = 0.0
+        self.predicted_memory = 0
+        # UV quality of the final layout, see metrics.layout_metrics
+        self.metrics: dict[str, float] = {}
+        # Mesh features measured before the run and the MoF detectors they turned off, see preflight.analyze
+        self.preflight: dict = {}
+        self.skipped: list[str] = []
+        # MoF seconds the skipped detectors were estimated to save, see preflight.estimated_saving, logged so it can be checked
+        self.estimated_saving = 0.0
+        self.error = ""
+        self._mof_started = 0.0
+        self._mof_finished = 0.0
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            if tracing:
+                self.memory[name] = max(self.memory.get(name, 0), tracemalloc.get_traced_memory()[1] - baseline)
+
+    def add_job(self, job):
+        # Read the file sizes before the job cleans its OBJ files up, chunked unwraps add up all their jobs
+        for attribute, path in (("input_size", job.input_path), ("output_size", job.output_path)):
+            if os.path.exists(path):
+                setattr(self, attribute, getattr(self, attribute) + os.path.getsize(path))
+        if self.exit_code is None or job.returncode != 0:
+            self.exit_code = job.returncode
+        self.peak_memory = max(self.peak_memory, job.peak_memory)
+        self.cpu_time += job.cpu_time
+        self.quad_ratio = (self.quad_ratio * self.faces + job.quad_ratio * job.faces) / max(self.faces + job.faces, 1)
+        self.faces += job.faces
+        self.predicted_seconds = max(self.predicted_seconds, job.predicted_seconds)
+        self.predicted_memory = max(self.predicted_memory, job.predicted_memory)
+        # MoF time runs from the first job starting to the last one finishing
+        if not self.jobs:
+            self._mof_started, self._mof_finished = job.started_at, job.finished_at
+        self._mof_started = min(self._mof_started, job.started_at)
+        self._mof_finished = max(self._mof_finished, job.finished_at)
+        self.jobs += 1
+        self.stages["mof"] = self._mof_finished - self._mof_started
+
+    def to_dict(self) -> dict:
+        return {
+            "time": datetime.datetime.now().astimezone().isoformat(timespec='seconds'),
+            "host": platform.node(),
+            "blender": bpy.app.version_string,
+            "object": self.name,
+            "polygons": self.polygons,
+            "options": self.options,
+            "cached": self.cached,
+            "reused_seams": self.reused_seams,
+            "input_size": self.input_size,
+            "output_size": self.output_size,
+            "exit_code": self.exit_code,
+            "peak_memory": self.peak_memory,
+            "cpu_time": self.cpu_time,
+            "jobs": self.jobs,
+            "faces": self.faces,
+            "quad_ratio": self.quad_ratio,
+            "predicted_seconds": self.predicted_seconds,
+            "predicted_memory": self.predicted_memory,
+            "stages": self.stages,
+            "memory": self.memory,
+            "metrics": self.metrics,
+            "preflight": self.preflight,
+            "skipped": self.skipped,
+            "estimated_saving": self.estimated_saving,
+            "total": sum(self.stages.values()),
+            "error": self.error,
+        }
+
+def log_path(preferences) -> str:
+    if not preferences.use_telemetry:
+        return ""
+    if preferences.telemetry_log:
+        return bpy.path.abspath(preferences.telemetry_log)
+    return os.path.join(bpy.utils.user_resource('CONFIG'), "mof_integration_runs.jsonl")
+
+def finish_run(run: RunRecord, path: str):
+    """
+    Keeps `run` for the side panel and appends it to the JSONL log at `path`, if any.
+    """
+    record = run.to_dict()
+    last_runs[run.name] = record
+    if not path:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as file:
+            file.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"MoF: could not write telemetry to {path}: {e}")
@@ -0,0 +1,108 @@
+# Scratch space for the OBJ files handed to and read back from MoF: one directory per Blender session,
+# on a RAM-backed mount when there is room, removed when Blender exits
+
+import atexit
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+# Shared memory mounts tried before the regular temp directory
+RAM_DIRECTORIES = ("/dev/shm",)
+
+# Session directories are named after the process, so leftovers of crashed sessions can be told apart
+PREFIX = "mof_scratch_"
+
+# Rough OBJ bytes per vertex and per face corner, with and without a normal per corner
+BYTES_PER_VERTEX = 40
+BYTES_PER_CORNER = 8
+BYTES_PER_NORMAL = 32
+
+def estimate_size(vertices: int, corners: int, normals: bool = False) -> int:
+    """
+    Estimates the bytes a job needs: its input OBJ and MoF's output, which adds a UV per corner.
+    """
+    input_size = vertices * BYTES_PER_VERTEX + corners * (BYTES_PER_CORNER + (BYTES_PER_NORMAL if normals else 0))
+    return input_size * 2 + corners * BYTES_PER_VERTEX
+
+def process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+def remove_stale(base: str):
+    # Only POSIX can cheaply tell whether the owning process is gone
+    if sys.platform == 'win32':
+        return
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return
+    for name in names:
+        pid = name[len(PREFIX):].partition("_")[0]
+        if name.startswith(PREFIX) and pid.isdigit() and int(pid) != os.getpid() and not process_exists(int(pid)):
+            shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+# Hands out unique file paths inside per-session scratch directories
+class ScratchSpace:
+    def __init__(self, directory: str = "", stream: bool = False):
+        # Configured base directory, RAM_DIRECTORIES and the system temp directory when empty
+        self.directory = directory
+        # Stream input files through named pipes instead of writing them, see `MofJob.start`
+        self.stream = stream
+        self._sessions: dict[str, str] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def bases(self) -> list[str]:
+        if self.directory:
+            return [self.directory]
+        return [base for base in RAM_DIRECTORIES if os.path.isdir(base) and os.access(base, os.W_OK)] + [tempfile.gettempdir()]
+
+    def session(self, base: str) -> str:
+        with self._lock:
+            if base not in self._sessions:
+                os.makedirs(base, exist_ok=True)
+                remove_stale(base)
+                self._sessions[base] = tempfile.mkdtemp(prefix=f"{PREFIX}{os.getpid()}_", dir=base)
+            return self._sessions[base]
+
+    def paths(self, size: int = 0) -> tuple[str, str]:
+        """
+        Returns unused input and output OBJ paths on the first base directory with `size` bytes free,
+        the last one when none has.
+        """
+        bases = self.bases()
+        base = next((base for base in bases[:-1] if shutil.disk_usage(base).free >= size), bases[-1])
+        directory = self.session(base)
+        number = next(self._counter)
+        return os.path.join(directory, f"{number}_input.obj"), os.path.join(directory, f"{number}_output.obj")
+
+    def cleanup(self):
+        with self._lock:
+            for directory in self._sessions.values():
+                shutil.rmtree(directory, ignore_errors=True)
+            self._sessions.clear()
+
+session = ScratchSpace()
+atexit.register(session.cleanup)
+
+def configure(directory: str = "", stream: bool = False):
+    """
+    Moves new scratch files to `directory` and sets whether inputs are streamed. Directories already in use stay until exit.
+    """
+    session.directory = directory
+    session.stream = stream and hasattr(os, "mkfifo")
+
+def open_fifo_reader(path: str):
+    # Opening the read end lets a writer blocked in open() through, so it sees the broken pipe and returns
+    try:
+        os.close(os.open(path, os.O_RDONLY | os.O_NONBLOCK))
+    except OSError:
+        pass
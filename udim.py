@@ -0,0 +1,79 @@
+# UDIM mode: one MoF job per material slot, every result packed on its own and moved into the slot's UDIM tile
+
+import numpy as np
+
+from .core import MeshBuffers
+from .metrics import face_distortion
+
+# Tile of material slot 0, slot i goes to FIRST_TILE + i
+FIRST_TILE = 1001
+# Tiles per row of UV space
+TILES_PER_ROW = 10
+
+def parse_resolutions(text: str) -> list[int]:
+    """
+    Parses comma separated texture resolutions, one per material slot, e.g. "4096, 2048". Empty entries are 0, the default.
+    """
+    if not text.strip():
+        return []
+    resolutions = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            resolutions.append(0)
+            continue
+        if not part.isdigit() or not 1 <= int(part) <= 65536:
+            raise ValueError(f"Invalid tile resolution '{part}'")
+        resolutions.append(int(part))
+    return resolutions
+
+def tile_offsets(slots: np.ndarray) -> np.ndarray:
+    # UV offset of the tile of every material slot
+    return np.stack([slots % TILES_PER_ROW, slots // TILES_PER_ROW], axis=1).astype(np.float32)
+
+def material_chunks(buffers: MeshBuffers) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the chunk of every polygon, one chunk per used material slot, and the slot of every chunk.
+    """
+    materials = buffers.materials if buffers.materials is not None else np.zeros(len(buffers.loop_totals), dtype=np.int32)
+    slots, chunks = np.unique(materials, return_inverse=True)
+    return chunks.ravel(), slots
+
+def slot_resolutions(slots: np.ndarray, resolutions: list[int], default: int) -> np.ndarray:
+    # Slots left empty or beyond the listed resolutions use the default one
+    return np.array([resolutions[slot] if slot < len(resolutions) and resolutions[slot] else default for slot in slots.tolist()], dtype=np.int64)
+
+def tile_arguments(arguments: list[str], resolution: int) -> list[str]:
+    """
+    Returns MoF's `arguments` with the texture resolution of a tile.
+    """
+    arguments = list(arguments)
+    index = arguments.index("-RESOLUTION")
+    arguments[index + 1] = str(resolution)
+    return arguments
+
+def place_tiles(buffers: MeshBuffers, uvs: np.ndarray, resolutions: list[int], default: int) -> np.ndarray:
+    """
+    Scales the 0-1 layout of every material slot so all tiles get the same texels per unit of surface,
+    the lowest any of them has at its resolution, and moves it into the slot's tile.
+    """
+    chunks, slots = material_chunks(buffers)
+    tile_resolution = slot_resolutions(slots, resolutions, default)
+    areas, uv_areas, _, _ = face_distortion(buffers, uvs)
+    surface = np.bincount(chunks, weights=areas, minlength=len(slots))
+    texture = np.bincount(chunks, weights=uv_areas, minlength=len(slots))
+    densities = np.sqrt(texture / np.maximum(surface, 1e-30)) * tile_resolution
+    valid = (surface > 0) & (texture > 0)
+    target = densities[valid].min() if valid.any() else 1.0
+    # Shrinking about the tile's corner keeps every layout inside its tile
+    scales = np.where(valid, target / np.where(valid, densities, 1.0), 1.0).astype(np.float32)
+
+    loop_chunks = np.repeat(chunks, buffers.loop_totals)
+    return uvs * scales[loop_chunks, None] + tile_offsets(slots)[loop_chunks]
+
+def face_tiles(buffers: MeshBuffers, resolutions: list[int], default: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the UDIM tile number and texture resolution of every polygon.
+    """
+    chunks, slots = material_chunks(buffers)
+    return (slots + FIRST_TILE)[chunks], slot_resolutions(slots, resolutions, default)[chunks]